@@ -1,10 +1,15 @@
 # preprocessing.py
 
 import re
+import sys
 import google.generativeai as genai
 import os
 from dotenv import load_dotenv
 
+# Racine du dépôt : taxonomie des compétences partagée
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from skill_taxonomy import skill_taxonomy
+
 load_dotenv()
 GEN_MODEL = "gemini-1.5-flash"
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
@@ -69,16 +74,9 @@ def extract_name(text):
         return "Unknown"
 
 def extract_skills(text):
-    common_skills = [
-        "Python", "Java", "C++", "C#", "SQL", "JavaScript", "React", "Angular", "Vue.js",
-        "Django", "Flask", "Spring", "Node.js", "Express", "AWS", "Azure", "GCP",
-        "Docker", "Kubernetes", "Git", "Linux", "Windows", "MySQL", "PostgreSQL",
-        "MongoDB", "Redis", "HTML", "CSS", "Bootstrap", "jQuery", "PHP", "Ruby",
-        "Go", "Rust", "Swift", "Kotlin", "TypeScript", "GraphQL", "REST API",
-        "Machine Learning", "AI", "Data Science", "TensorFlow", "PyTorch"
-    ]
-    found = [skill for skill in common_skills if skill.lower() in text.lower()]
-    return found
+    # Même taxonomie compilée que l'application principale (skill_taxonomy.json),
+    # compétences renvoyées telles qu'écrites dans le CV
+    return skill_taxonomy.extract_surface(text)
 
 def preprocess_cv(cv_text: str):
     """
@@ -5,6 +5,7 @@ import json
 import streamlit as st
 from preprocessing import preprocess_cv
 from matching import match_jobs
+from match_cache import cached_job_matches
 from agent import (
     generate_answer_for_question,
     evaluate_answers,
@@ -767,17 +768,15 @@ def process_job_matching(cv_data, jobs_data):
                 subjob["url"] = subjob.get("url", job.get("url"))
                 flat_jobs.append(subjob)
 
-    # ✅ Normalisation des skills
-    cv_data["skills"] = [s.lower() for s in cv_data.get("skills", [])]
-    for job in flat_jobs:
-        if "skills" in job and isinstance(job["skills"], list):
-            job["skills"] = [s.lower() for s in job["skills"]]
+    # ✅ Normalisation des skills : identifiants canoniques calculés une seule fois
+    from skill_vocabulary import skill_ids_of
+    cv_data["skill_ids"] = skill_ids_of(cv_data)
 
     # 🔧 Étape 2 : calculer les scores pour tous les jobs
     from matching import compute_score
     scored_jobs = []
     for job in flat_jobs:
-        score, matched_skills = compute_score(cv_data, job.get("skills", []))
+        score, matched_skills = compute_score(cv_data, job.get("skills", []), job.get("skill_ids"))
         if score > 0:  # Seulement les jobs avec au moins un match
             job_copy = job.copy()
             job_copy["match_score"] = score
@@ -1138,7 +1137,8 @@ if st.session_state.user is None:
                         success_html = create_success_message_html(cv_data.get("skills", []))
                         st.markdown(success_html, unsafe_allow_html=True)
 
-                        matched_jobs = process_job_matching(cv_data, jobs)
+                        # Index inversé + cache versionné : un rerun avec le même CV ne rescore rien
+                        matched_jobs = cached_job_matches(cv_data, k=3)
                     else:
                         st.warning("⚠️ CV analysé mais aucune compétence détectée. Affichage de tous les jobs.")
                         matched_jobs = []
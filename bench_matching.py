@@ -0,0 +1,226 @@
+"""
+Benchmarks du matching CV → jobs
+================================
+
+Génère un catalogue synthétique (N jobs × M compétences, formats imbriqué
+et plat) et K CV, puis mesure chaque moteur de matching : débit (CV/s) et
+latence p50 / p95 par CV. Tout tourne hors ligne (aucun appel LLM ni base).
+
+    python bench_matching.py                      # compare à la baseline
+    python bench_matching.py --update-baseline    # enregistre la baseline
+    python bench_matching.py --jobs 20000 --cvs 200
+
+Le script échoue (code 1) si un moteur est plus lent que sa baseline
+au-delà de la tolérance (--tolerance, 30 % par défaut), et aussi si la
+baseline manque ou a été enregistrée avec d'autres tailles : la
+comparaison n'est ignorée qu'avec --no-baseline.
+
+    python bench_matching.py --jobs 20000 --no-baseline   # mesure seule
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from skill_taxonomy import skill_taxonomy
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_matching_baseline.json")
+DEFAULT_SIZES = {"jobs": 5000, "skills": 400, "cvs": 50, "seed": 42}
+
+
+# ---------- Données synthétiques ----------
+def generate_catalog(n_jobs, n_skills, n_cvs, seed=42, jobs_per_company=10):
+    """Renvoie (companies, flat_jobs, cvs) : même catalogue en format imbriqué et plat"""
+    rng = random.Random(seed)
+    # Vraies compétences (avec alias) puis compétences synthétiques
+    variations = skill_taxonomy.variations
+    vocabulary = list(dict.fromkeys(list(variations) + [v for vs in variations.values() for v in vs]))
+    vocabulary = (vocabulary + [f"skill_{i}" for i in range(n_skills)])[:n_skills]
+
+    companies = []
+    flat_jobs = []
+    for start in range(0, n_jobs, jobs_per_company):
+        company = {"company": f"Company {start // jobs_per_company}", "url": f"https://example.com/{start}", "jobs": []}
+        for i in range(start, min(start + jobs_per_company, n_jobs)):
+            job = {
+                "id": i,
+                "title": f"Job {i}",
+                "location": rng.choice(["Remote", "Paris", "Berlin", "London"]),
+                "type": rng.choice(["full-time", "part-time", "contract"]),
+                "skills": rng.sample(vocabulary, rng.randint(3, min(12, len(vocabulary)))),
+            }
+            company["jobs"].append(job)
+            flat = dict(job)
+            flat["company_name"] = company["company"]
+            flat["url"] = company["url"]
+            flat_jobs.append(flat)
+        companies.append(company)
+
+    cvs = [{"skills": rng.sample(vocabulary, rng.randint(5, min(25, len(vocabulary))))} for _ in range(n_cvs)]
+    return companies, flat_jobs, cvs
+
+
+# ---------- Moteurs ----------
+def _compute_score_loop(flat_jobs):
+    from matching import compute_score
+
+    def run(cv_data):
+        return [compute_score(cv_data, job["skills"]) for job in flat_jobs]
+    return run
+
+
+def _process_job_matching(jobs_data):
+    # Cœur de flask_app.process_job_matching (matching.top_job_matches), sans importer le serveur
+    from matching import top_job_matches
+    return lambda cv_data: top_job_matches(dict(cv_data), jobs_data, k=10, mode="count")
+
+
+def build_engines(companies, flat_jobs, feed_path):
+    """Nom du moteur → fabrique (construction de l'index incluse) renvoyant une fonction cv_data → résultats"""
+    from job_index import JobSkillIndex
+    from job_stream import stream_match_jobs
+    from matching import match_jobs
+    from matching_engine import MatrixMatcher
+
+    def index_engine(mode):
+        index = JobSkillIndex.from_jobs(companies)
+        return lambda cv_data: index.match(cv_data, k=10, mode=mode)
+
+    def matrix_engine():
+        matcher = MatrixMatcher(companies)
+        return lambda cv_data: matcher.match(cv_data, k=10)
+
+    return {
+        "compute_score_loop": lambda: _compute_score_loop(flat_jobs),
+        "match_jobs_nested": lambda: lambda cv_data: match_jobs(cv_data, companies),
+        "match_jobs_flat": lambda: lambda cv_data: match_jobs(cv_data, flat_jobs),
+        "job_index_count": lambda: index_engine("count"),
+        "job_index_idf": lambda: index_engine("idf"),
+        "matrix_matcher": matrix_engine,
+        "stream_match_jobs": lambda: lambda cv_data: stream_match_jobs(cv_data, feed_path, k=10),
+        "process_job_matching_nested": lambda: _process_job_matching(companies),
+        "process_job_matching_flat": lambda: _process_job_matching(flat_jobs),
+    }
+
+
+# ---------- Mesure ----------
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def measure(run, cvs, warmup=2):
+    """Débit et latences d'une fonction de matching sur la liste de CV"""
+    for cv_data in cvs[:warmup]:
+        run(cv_data)
+    latencies = []
+    started = time.perf_counter()
+    for cv_data in cvs:
+        t0 = time.perf_counter()
+        run(cv_data)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    elapsed = time.perf_counter() - started
+    return {
+        "ops_per_s": round(len(cvs) / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(_percentile(latencies, 95), 3),
+    }
+
+
+def run_benchmarks(n_jobs, n_skills, n_cvs, seed=42, engines=None):
+    """Exécute les moteurs demandés (tous par défaut) ; renvoie nom → mesures"""
+    companies, flat_jobs, cvs = generate_catalog(n_jobs, n_skills, n_cvs, seed=seed)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        feed_path = os.path.join(tmp, "jobs.json")
+        with open(feed_path, "w", encoding="utf-8") as f:
+            json.dump(companies, f)
+
+        for name, factory in build_engines(companies, flat_jobs, feed_path).items():
+            if engines and name not in engines:
+                continue
+            # Un moteur qui ne se construit pas fait échouer le benchmark (jamais ignoré en silence)
+            t0 = time.perf_counter()
+            run = factory()
+            build_ms = (time.perf_counter() - t0) * 1000
+            results[name] = measure(run, cvs)
+            results[name]["build_ms"] = round(build_ms, 1)
+    return results
+
+
+# ---------- Baseline ----------
+def compare_to_baseline(results, baseline, tolerance=0.3):
+    """Liste des régressions : moteurs dont le débit est sous baseline × (1 - tolérance)"""
+    regressions = []
+    for name, measured in results.items():
+        reference = baseline.get(name)
+        if not reference or "ops_per_s" not in measured or "ops_per_s" not in reference:
+            continue
+        floor = reference["ops_per_s"] * (1 - tolerance)
+        if measured["ops_per_s"] < floor:
+            regressions.append(f"{name}: {measured['ops_per_s']} CV/s < {round(floor, 2)} (baseline {reference['ops_per_s']})")
+    return regressions
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du matching CV → jobs")
+    parser.add_argument("--jobs", type=int, default=DEFAULT_SIZES["jobs"], help="Nombre de jobs (N)")
+    parser.add_argument("--skills", type=int, default=DEFAULT_SIZES["skills"], help="Taille du vocabulaire (M)")
+    parser.add_argument("--cvs", type=int, default=DEFAULT_SIZES["cvs"], help="Nombre de CV (K)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SIZES["seed"])
+    parser.add_argument("--engine", action="append", help="Ne lancer que ce moteur (répétable)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Fichier de baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Baisse de débit tolérée (0.3 = 30 %%)")
+    parser.add_argument("--update-baseline", action="store_true", help="Enregistrer les résultats comme baseline")
+    parser.add_argument("--no-baseline", action="store_true", help="Mesurer sans comparer à la baseline")
+    args = parser.parse_args(argv)
+
+    sizes = {"jobs": args.jobs, "skills": args.skills, "cvs": args.cvs, "seed": args.seed}
+    results = run_benchmarks(args.jobs, args.skills, args.cvs, seed=args.seed, engines=args.engine)
+
+    print(f"=== Matching benchmarks: {args.jobs} jobs × {args.skills} skills, {args.cvs} CVs ===")
+    for name, measured in results.items():
+        print(f"{name:30s} {measured['ops_per_s']:>10.2f} CV/s  p50 {measured['p50_ms']:>9.3f} ms  "
+              f"p95 {measured['p95_ms']:>9.3f} ms  build {measured['build_ms']:>8.1f} ms")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"sizes": sizes, "engines": results}, f, indent=2)
+        print(f"✅ Baseline enregistrée : {args.baseline}")
+        return 0
+
+    if args.no_baseline:
+        print("⚠️  Comparaison à la baseline ignorée (--no-baseline)")
+        return 0
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"❌ Pas de baseline ({args.baseline}) : lancer avec --update-baseline, ou --no-baseline")
+        return 1
+    if baseline.get("sizes") != sizes:
+        print(f"❌ Tailles {sizes} différentes de la baseline {baseline.get('sizes')} : "
+              "relancer avec les tailles de la baseline, ou --no-baseline")
+        return 1
+
+    regressions = compare_to_baseline(results, baseline.get("engines", {}), args.tolerance)
+    for regression in regressions:
+        print(f"❌ Régression {regression}")
+    if not regressions:
+        print("✅ Aucune régression par rapport à la baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,428 @@
+"""
+Benchmarks du parsing des CV
+============================
+
+Génère un corpus synthétique hors ligne (PDF texte, PDF deux colonnes,
+PDF image seule, DOCX et PNG, à plusieurs tailles) puis mesure
+parsing.parse_cv et chaque extracteur (PyPDF2, pdfplumber, OCR,
+python-docx) sur chaque fichier : pages/s, caractères extraits et pic de
+mémoire (RSS). Chaque mesure tourne par défaut dans un processus neuf pour
+que le pic de RSS soit celui de l'extracteur seul.
+
+    python bench_parsing.py                           # corpus 1 / 3 / 10 pages
+    python bench_parsing.py --sizes 1 20 --runs 5
+    python bench_parsing.py --backend pypdf2 --backend pdfplumber --json parsing.json
+    python bench_parsing.py --corpus-dir corpus --keep-corpus
+
+Les backends OCR sont ignorés si Tesseract n'est pas installé. Le script
+échoue (code 1) si un extracteur lève une exception sur un fichier.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageDraw, ImageFont
+
+from skill_taxonomy import skill_taxonomy
+
+try:
+    import resource
+except ImportError:  # Windows : pas de pic de RSS
+    resource = None
+
+DEFAULT_SIZES = (1, 3, 10)
+PNG_DPIS = (100, 200)
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842  # A4 en points
+LINES_PER_PAGE = 50
+
+
+# ---------- Écriture de PDF minimaux ----------
+class PdfBuilder:
+    """PDF minimal écrit à la main : texte Helvetica et images JPEG, sans dépendance"""
+
+    def __init__(self):
+        self.objects = [None, None]  # 1 : catalogue, 2 : arbre des pages
+        self.pages = []
+        self.font = self.add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    def add(self, body):
+        self.objects.append(body)
+        return len(self.objects)
+
+    @staticmethod
+    def stream(data, header=""):
+        return f"<< {header} /Length {len(data)} >>\nstream\n".encode("latin-1") + data + b"\nendstream"
+
+    def add_page(self, content, resources):
+        contents = self.add(self.stream(content))
+        page = self.add(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources {resources} /Contents {contents} 0 R >>".encode("latin-1")
+        )
+        self.pages.append(page)
+
+    def add_text_page(self, columns):
+        """columns : liste de (x, lignes) ; aucune ligne = page sans couche texte"""
+        ops = []
+        for x, lines in columns:
+            if not lines:
+                continue
+            ops.append(f"BT /F1 11 Tf 14 TL {x} {PAGE_HEIGHT - 60} Td")
+            for line in lines:
+                escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+                ops.append(f"({escaped}) Tj T*")
+            ops.append("ET")
+        content = "\n".join(ops).encode("latin-1", errors="replace")
+        self.add_page(content, f"<< /Font << /F1 {self.font} 0 R >> >>")
+
+    def add_image_page(self, image):
+        """Page entièrement occupée par une image (scan : aucune couche texte)"""
+        buffer = io.BytesIO()
+        image.convert("L").save(buffer, format="JPEG", quality=85)
+        xobject = self.add(self.stream(
+            buffer.getvalue(),
+            f"/Type /XObject /Subtype /Image /Width {image.width} /Height {image.height} "
+            f"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /DCTDecode",
+        ))
+        content = f"q {PAGE_WIDTH} 0 0 {PAGE_HEIGHT} 0 0 cm /Im0 Do Q".encode("ascii")
+        self.add_page(content, f"<< /XObject << /Im0 {xobject} 0 R >> >>")
+
+    def build(self):
+        self.objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+        kids = " ".join(f"{page} 0 R" for page in self.pages)
+        self.objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(self.pages)} >>".encode("ascii")
+
+        out, offsets = io.BytesIO(), []
+        out.write(b"%PDF-1.4\n")
+        for number, body in enumerate(self.objects, start=1):
+            offsets.append(out.tell())
+            out.write(f"{number} 0 obj\n".encode("ascii") + body + b"\nendobj\n")
+        xref = out.tell()
+        out.write(f"xref\n0 {len(self.objects) + 1}\n0000000000 65535 f \n".encode("ascii"))
+        for offset in offsets:
+            out.write(f"{offset:010d} 00000 n \n".encode("ascii"))
+        out.write(f"trailer\n<< /Size {len(self.objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii"))
+        return out.getvalue()
+
+
+def make_text_pdf(pages, columns=1):
+    """PDF avec couche texte : une liste de lignes par page, réparties sur 1 ou 2 colonnes"""
+    builder = PdfBuilder()
+    for lines in pages:
+        if columns == 1:
+            builder.add_text_page([(50, lines)])
+        else:
+            half = (len(lines) + 1) // 2
+            builder.add_text_page([(50, lines[:half]), (PAGE_WIDTH // 2 + 10, lines[half:])])
+    return builder.build()
+
+
+def make_image_pdf(images):
+    """PDF scanné : une image par page, aucune couche texte"""
+    builder = PdfBuilder()
+    for image in images:
+        builder.add_image_page(image)
+    return builder.build()
+
+
+# ---------- Corpus synthétique ----------
+def cv_lines(rng, n_lines, width=90):
+    """Lignes de CV plausibles : identité, expériences datées, compétences de la taxonomie"""
+    skills = list(skill_taxonomy.variations)
+    first = rng.choice(["Alice", "Karim", "Sofia", "Yann", "Lea", "Omar", "Ines", "Hugo"])
+    last = rng.choice(["Martin", "Benali", "Durand", "Rossi", "Nguyen", "Moreau", "Haddad"])
+    lines = [f"{first} {last}", f"{first.lower()}.{last.lower()}@example.com", "+33 6 12 34 56 78"]
+    while len(lines) < n_lines:
+        start = rng.randint(2005, 2020)
+        kind = rng.random()
+        if kind < 0.3:
+            lines.append(f"{start} - {start + rng.randint(1, 4)} {rng.choice(['Developer', 'Engineer', 'Lead', 'Analyst'])} "
+                         f"at {rng.choice(['Acme', 'Globex', 'Initech', 'Umbrella'])} Corp")
+        elif kind < 0.6:
+            lines.append("Skills: " + ", ".join(rng.sample(skills, 4)))
+        else:
+            words = rng.choices(["built", "scalable", "services", "with", "team", "delivered", "data",
+                                 "pipelines", "api", "migration", "cloud", "tests", "platform"], k=12)
+            lines.append(" ".join(words).capitalize() + ".")
+    return [line[:width] for line in lines[:n_lines]]
+
+
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 : police bitmap sans taille
+        return ImageFont.load_default()
+
+
+def render_page_image(lines, dpi=150):
+    """Page A4 en niveaux de gris avec le texte dessiné (équivalent d'un scan)"""
+    width, height = int(PAGE_WIDTH * dpi / 72), int(PAGE_HEIGHT * dpi / 72)
+    image = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    font_size = max(10, int(11 * dpi / 72))
+    font = _font(font_size)
+    y = int(40 * dpi / 72)
+    for line in lines:
+        draw.text((int(50 * dpi / 72), y), line, fill=0, font=font)
+        y += int(font_size * 1.35)
+    return image
+
+
+def generate_corpus(out_dir, sizes=DEFAULT_SIZES, seed=42):
+    """
+    Écrit le corpus dans out_dir et renvoie sa description :
+    [{"path", "kind", "pages", "expected_chars"}] ; kind parmi
+    text_pdf, two_column_pdf, image_pdf, docx, png.
+    """
+    import docx
+
+    os.makedirs(out_dir, exist_ok=True)
+    rng = random.Random(seed)
+    corpus = []
+
+    def add(kind, name, pages, data, lines):
+        path = os.path.join(out_dir, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        corpus.append({"path": path, "kind": kind, "pages": pages,
+                       "expected_chars": sum(len(line) + 1 for line in lines)})
+
+    for size in sizes:
+        pages = [cv_lines(rng, LINES_PER_PAGE) for _ in range(size)]
+        all_lines = [line for page in pages for line in page]
+        add("text_pdf", f"text_{size}p.pdf", size, make_text_pdf(pages), all_lines)
+
+        narrow = [cv_lines(rng, 2 * LINES_PER_PAGE, width=40) for _ in range(size)]
+        add("two_column_pdf", f"two_column_{size}p.pdf", size, make_text_pdf(narrow, columns=2),
+            [line for page in narrow for line in page])
+
+        add("image_pdf", f"image_{size}p.pdf", size,
+            make_image_pdf([render_page_image(page) for page in pages]), all_lines)
+
+        document = docx.Document()
+        for line in all_lines:
+            document.add_paragraph(line)
+        buffer = io.BytesIO()
+        document.save(buffer)
+        add("docx", f"cv_{size}p.docx", size, buffer.getvalue(), all_lines)
+
+    page = cv_lines(rng, LINES_PER_PAGE)
+    for dpi in PNG_DPIS:
+        buffer = io.BytesIO()
+        render_page_image(page, dpi=dpi).save(buffer, format="PNG")
+        add("png", f"scan_{dpi}dpi.png", 1, buffer.getvalue(), page)
+
+    return corpus
+
+
+# ---------- Extracteurs mesurés ----------
+def tesseract_available():
+    from ocr_engine import TESSERACT_CMD
+    return bool(shutil.which(TESSERACT_CMD) or os.path.exists(TESSERACT_CMD))
+
+
+@contextlib.contextmanager
+def _fresh_ocr_engine():
+    """
+    Moteur OCR d'une mesure, installé comme parsing.ocr_engine : cache dans un
+    dossier temporaire (supprimé ensuite), jamais ocr_cache.db de production.
+    Créé une fois par mesure : le pool de processus démarre pendant le warmup.
+    """
+    import parsing
+    from ocr_engine import OCREngine
+    with tempfile.TemporaryDirectory(prefix="bench_ocr_") as tmp:
+        engine = OCREngine(cache_path=os.path.join(tmp, "ocr.db"))
+        saved, parsing.ocr_engine = parsing.ocr_engine, engine
+        try:
+            yield engine
+        finally:
+            parsing.ocr_engine = saved
+            engine.shutdown()
+
+
+# Chaque extracteur reçoit le chemin et le moteur OCR de la mesure (ignoré s'il ne fait pas d'OCR)
+def _run_parse_cv(path, engine):
+    from parsing import parse_cv
+    return parse_cv(path)
+
+
+def _run_pypdf2(path, engine):
+    from PyPDF2 import PdfReader
+    return "\n".join(page.extract_text() or "" for page in PdfReader(path).pages)
+
+
+def _run_pdfplumber(path, engine):
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        return "\n".join(page.extract_text() or "" for page in pdf.pages)
+
+
+def _run_pdf_ocr(path, engine):
+    import pdfplumber
+    from parsing import _render_page, PDF_OCR_DPI
+    with pdfplumber.open(path) as pdf:
+        return "\n".join(engine.ocr([_render_page(page, PDF_OCR_DPI) for page in pdf.pages]))
+
+
+def _run_docx(path, engine):
+    from parsing import extract_text_from_docx
+    return extract_text_from_docx(path)
+
+
+def _run_image_ocr(path, engine):
+    with Image.open(path) as image:
+        return engine.ocr_image(image)
+
+
+PDF_KINDS = ("text_pdf", "two_column_pdf", "image_pdf")
+
+# nom → (types de fichiers concernés, fonction, besoin de Tesseract)
+BACKENDS = {
+    "parse_cv": (PDF_KINDS + ("docx",), _run_parse_cv, False),
+    "pypdf2": (PDF_KINDS, _run_pypdf2, False),
+    "pdfplumber": (PDF_KINDS, _run_pdfplumber, False),
+    "pdf_ocr": (PDF_KINDS, _run_pdf_ocr, True),
+    "python_docx": (("docx",), _run_docx, False),
+    "image_ocr": (("png",), _run_image_ocr, True),
+}
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Ko sous Linux, octets sous macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def measure(backend, path, pages, runs=3, warmup=1):
+    """Exécute un extracteur runs fois sur un fichier : médiane, pages/s, caractères, pic RSS"""
+    run = BACKENDS[backend][1]
+    durations, text = [], ""
+    with _fresh_ocr_engine() as engine:
+        for _ in range(warmup):
+            run(path, engine)  # imports, initialisations et pool OCR hors mesure
+        for _ in range(runs):
+            engine.clear()  # cache vidé hors mesure : chaque exécution refait l'OCR
+            started = time.perf_counter()
+            text = run(path, engine) or ""
+            durations.append(time.perf_counter() - started)
+    median = statistics.median(durations)
+    return {
+        "median_ms": round(median * 1000, 2),
+        "pages_per_s": round(pages / median, 2) if median > 0 else None,
+        "chars": len(text.strip()),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_benchmarks(corpus, backends=None, runs=3, isolate=True):
+    """Mesure chaque extracteur sur chaque fichier du corpus qui le concerne"""
+    backends = backends or list(BACKENDS)
+    ocr_ok = tesseract_available()
+    results = []
+    context = multiprocessing.get_context("spawn")
+
+    for item in corpus:
+        for backend in backends:
+            kinds, _, needs_ocr = BACKENDS[backend]
+            if item["kind"] not in kinds:
+                continue
+            row = {"file": os.path.basename(item["path"]), "kind": item["kind"], "pages": item["pages"],
+                   "backend": backend, "expected_chars": item["expected_chars"]}
+            if needs_ocr and not ocr_ok:
+                row["skipped"] = "tesseract introuvable"
+                results.append(row)
+                continue
+            try:
+                if isolate:
+                    # Processus neuf par mesure : pic de RSS propre à cet extracteur
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                        row.update(pool.submit(measure, backend, item["path"], item["pages"], runs).result())
+                else:
+                    row.update(measure(backend, item["path"], item["pages"], runs))
+            except Exception as e:
+                row["error"] = f"{type(e).__name__}: {e}"
+            results.append(row)
+    return results
+
+
+def summarize(results):
+    """Moyenne des pages/s et des caractères extraits par (backend, type de fichier)"""
+    groups = {}
+    for row in results:
+        if "pages_per_s" in row:
+            groups.setdefault((row["backend"], row["kind"]), []).append(row)
+    return {
+        f"{backend}/{kind}": {
+            "pages_per_s": round(statistics.mean(r["pages_per_s"] for r in rows), 2),
+            "chars_ratio": round(statistics.mean(r["chars"] / r["expected_chars"] for r in rows), 3),
+            "peak_rss_mb": max((r["peak_rss_mb"] for r in rows if r["peak_rss_mb"] is not None), default=None),
+        }
+        for (backend, kind), rows in sorted(groups.items())
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks du parsing des CV")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="Nombre de pages des documents")
+    parser.add_argument("--runs", type=int, default=3, help="Exécutions par mesure (médiane)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--backend", action="append", choices=list(BACKENDS), help="Ne lancer que cet extracteur (répétable)")
+    parser.add_argument("--corpus-dir", help="Dossier du corpus (temporaire par défaut)")
+    parser.add_argument("--keep-corpus", action="store_true", help="Ne pas supprimer le corpus généré")
+    parser.add_argument("--no-isolate", action="store_true", help="Mesurer dans ce processus (pic RSS cumulé)")
+    parser.add_argument("--json", help="Écrire les résultats détaillés dans ce fichier")
+    args = parser.parse_args(argv)
+
+    corpus_dir = args.corpus_dir or tempfile.mkdtemp(prefix="cv_corpus_")
+    try:
+        corpus = generate_corpus(corpus_dir, sizes=args.sizes, seed=args.seed)
+        print(f"📁 Corpus : {len(corpus)} fichiers dans {corpus_dir}")
+        if not tesseract_available():
+            print("⚠️  Tesseract introuvable : backends OCR ignorés")
+
+        results = run_benchmarks(corpus, backends=args.backend, runs=args.runs, isolate=not args.no_isolate)
+
+        print(f"\n{'fichier':<26}{'backend':<14}{'pages/s':>10}{'ms':>10}{'chars':>9}{'attendus':>10}{'RSS Mo':>9}")
+        for row in results:
+            if "pages_per_s" in row:
+                print(f"{row['file']:<26}{row['backend']:<14}{row['pages_per_s']:>10}{row['median_ms']:>10}"
+                      f"{row['chars']:>9}{row['expected_chars']:>10}{str(row['peak_rss_mb']):>9}")
+            else:
+                print(f"{row['file']:<26}{row['backend']:<14}  {row.get('skipped') or row.get('error')}")
+
+        summary = summarize(results)
+        print("\n📊 Moyennes par extracteur et type de fichier")
+        for name, values in summary.items():
+            print(f"- {name}: {values['pages_per_s']} pages/s, {values['chars_ratio']:.0%} du texte, "
+                  f"pic RSS {values['peak_rss_mb']} Mo")
+
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump({"results": results, "summary": summary}, f, indent=2, ensure_ascii=False)
+            print(f"💾 Résultats écrits dans {args.json}")
+    finally:
+        if not args.corpus_dir and not args.keep_corpus:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    # Un extracteur en erreur fait échouer le benchmark (code 1), comme bench_matching
+    errors = [row for row in results if "error" in row]
+    for row in errors:
+        print(f"❌ {row['backend']} sur {row['file']}: {row['error']}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Matching CV → jobs en masse (campagnes de recrutement)
+======================================================
+
+Traite un dossier (ou un manifeste) de milliers de CV sans passer par Flask :
+
+    python bulk_match.py cvs/ --jobs jobs.json --out results.jsonl --workers 8
+    python bulk_match.py manifest.txt --db --out results.jsonl --resume
+
+- parse_cv + preprocess_cv tournent dans un pool de processus ;
+- le catalogue de jobs est chargé une seule fois (MatrixMatcher) dans le
+  processus principal et les CV préprocessés y sont scorés par lots ;
+- chaque résultat est écrit immédiatement dans le fichier JSONL de sortie,
+  qui sert aussi de point de reprise (--resume saute les CV déjà traités) ;
+- un résumé débit / latence est affiché à la fin.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+CV_EXTENSIONS = (".pdf", ".png", ".jpg", ".jpeg", ".docx", ".txt")
+MATCH_FIELDS = ("id", "title", "company_name", "location", "type", "url", "match_score", "matched_skills")
+
+
+# ---------- Entrées ----------
+def collect_cv_paths(source):
+    """Chemins des CV d'un dossier (récursif) ou d'un manifeste (.txt : un chemin par ligne, .jsonl : {"path": ...})"""
+    source = Path(source)
+    if source.is_dir():
+        return sorted(str(p) for p in source.rglob("*") if p.suffix.lower() in CV_EXTENSIONS)
+
+    paths = []
+    base = source.parent
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if source.suffix.lower() == ".jsonl":
+                line = json.loads(line)["path"]
+            path = Path(line)
+            paths.append(str(path if path.is_absolute() else base / path))
+    return paths
+
+
+def load_catalog(jobs_path=None, from_db=False):
+    """Catalogue de jobs sous forme de MatrixMatcher (base de données ou fichier .json / .jsonl)"""
+    from matching_engine import MatrixMatcher
+
+    if from_db:
+        import db
+        return MatrixMatcher(db.get_all_jobs())
+
+    from job_stream import iter_job_feed
+    return MatrixMatcher(list(iter_job_feed(jobs_path)))
+
+
+def read_checkpoint(out_path):
+    """CV déjà traités avec succès dans un fichier de sortie existant"""
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # dernière ligne tronquée par une interruption
+            if record.get("status") == "ok":
+                done.add(record["path"])
+    return done
+
+
+# ---------- Travail d'un processus ----------
+def _init_worker(quiet):
+    if quiet:
+        sys.stdout = open(os.devnull, "w")
+
+
+def process_cv_file(path):
+    """Parse et préprocesse un CV ; renvoie les données et les durées (exécuté dans un processus du pool)"""
+    from parsing import parse_cv
+    from preprocessing import preprocess_cv
+
+    record = {"path": path}
+    started = time.perf_counter()
+    try:
+        cv_text = parse_cv(path)
+        parsed = time.perf_counter()
+        cv_data = preprocess_cv(cv_text)
+        record["status"] = "ok"
+        record["cv"] = cv_data
+        record["parse_ms"] = round((parsed - started) * 1000, 1)
+        record["preprocess_ms"] = round((time.perf_counter() - parsed) * 1000, 1)
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = str(e)
+    record["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return record
+
+
+# ---------- Orchestration ----------
+def _percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def _write_batch(out, matcher, batch, top_k):
+    ok = [record for record in batch if record["status"] == "ok"]
+    results = matcher.match_batch([record["cv"] for record in ok], k=top_k)
+    for record, matches in zip(ok, results):
+        cv_data = record.pop("cv")
+        record["name"] = cv_data.get("name")
+        record["email"] = cv_data.get("email")
+        record["skills"] = cv_data.get("skills", [])
+        record["matches"] = [{field: job.get(field) for field in MATCH_FIELDS} for job in matches]
+    for record in batch:
+        out.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+    out.flush()
+    os.fsync(out.fileno())
+
+
+def run_bulk_match(cv_paths, matcher, out_path, workers=None, top_k=10, batch_size=32, resume=False, quiet=True,
+                   process=process_cv_file):
+    """
+    Traite tous les CV et écrit un enregistrement JSONL par CV dans out_path.
+    process : fonction chemin → enregistrement exécutée dans le pool (process_cv_file par défaut).
+    Renvoie le résumé (compteurs, débit, latences).
+    """
+    done = read_checkpoint(out_path) if resume else set()
+    todo = [path for path in cv_paths if path not in done]
+
+    latencies = []
+    counts = {"ok": 0, "error": 0}
+    started = time.perf_counter()
+
+    with open(out_path, "a" if resume else "w", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(quiet,)) as pool:
+        futures = [pool.submit(process, path) for path in todo]
+        batch = []
+        for future in as_completed(futures):
+            record = future.result()
+            counts[record["status"]] += 1
+            latencies.append(record["latency_ms"])
+            batch.append(record)
+            if len(batch) >= batch_size:
+                _write_batch(out, matcher, batch, top_k)
+                batch = []
+        if batch:
+            _write_batch(out, matcher, batch, top_k)
+
+    elapsed = time.perf_counter() - started
+    return {
+        "total": len(cv_paths),
+        "skipped": len(cv_paths) - len(todo),
+        "processed": len(todo),
+        "ok": counts["ok"],
+        "errors": counts["error"],
+        "elapsed_s": round(elapsed, 2),
+        "cv_per_s": round(len(todo) / elapsed, 2) if elapsed > 0 else 0.0,
+        "latency_p50_ms": _percentile(latencies, 50),
+        "latency_p95_ms": _percentile(latencies, 95),
+        "latency_max_ms": max(latencies) if latencies else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Matching CV → jobs en masse")
+    parser.add_argument("source", help="Dossier de CV ou manifeste (.txt ou .jsonl)")
+    parser.add_argument("--jobs", default="jobs.json", help="Catalogue de jobs (.json imbriqué ou .jsonl)")
+    parser.add_argument("--db", action="store_true", help="Utiliser les jobs de la base de données")
+    parser.add_argument("--out", default="bulk_results.jsonl", help="Fichier JSONL de sortie (et de reprise)")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus (défaut : nombre de CPU)")
+    parser.add_argument("--top-k", type=int, default=10, help="Nombre de jobs gardés par CV")
+    parser.add_argument("--batch-size", type=int, default=32, help="CV scorés et écrits par lot")
+    parser.add_argument("--resume", action="store_true", help="Reprendre en sautant les CV déjà traités")
+    parser.add_argument("--verbose", action="store_true", help="Garder les logs des processus")
+    args = parser.parse_args(argv)
+
+    cv_paths = collect_cv_paths(args.source)
+    matcher = load_catalog(args.jobs, from_db=args.db)
+    print(f"📄 {len(cv_paths)} CV à traiter, {len(matcher)} jobs dans le catalogue")
+
+    summary = run_bulk_match(
+        cv_paths, matcher, args.out,
+        workers=args.workers, top_k=args.top_k, batch_size=args.batch_size,
+        resume=args.resume, quiet=not args.verbose,
+    )
+
+    print(f"✅ {summary['ok']} CV traités, {summary['errors']} erreurs, {summary['skipped']} déjà faits")
+    print(f"⏱️  {summary['elapsed_s']} s — {summary['cv_per_s']} CV/s — "
+          f"latence p50 {summary['latency_p50_ms']} ms, p95 {summary['latency_p95_ms']} ms")
+    print(f"Résultats : {args.out}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
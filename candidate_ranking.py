@@ -0,0 +1,59 @@
+"""
+Classement des candidats pour une offre (matching inverse)
+==========================================================
+
+Score chaque candidature d'un job à partir des skill_ids précalculés
+et stockés dans resumes.skill_ids : aucun extracted_data JSON n'est
+re-parsé, et seuls les k candidats de la page demandée sont construits.
+"""
+
+import heapq
+
+import db
+from skill_vocabulary import skill_vocabulary
+
+
+def rank_candidates_for_job(job_id, k=20, offset=0):
+    """
+    Renvoie les candidats d'un job triés par score de matching décroissant,
+    paginés par (offset, k). None si le job n'existe pas.
+    """
+    job = db.get_job_by_id(job_id)
+    if not job:
+        return None
+
+    job_skill_ids = set(job.get("skill_ids") or [])
+    resumes = db.get_resume_skills_by_job(job_id)
+
+    scored = []
+    for position, resume in enumerate(resumes):
+        matched = job_skill_ids.intersection(resume["skill_ids"])
+        score = round(len(matched) / len(job_skill_ids) * 100, 2) if job_skill_ids else 0.0
+        # Égalités : ordre de get_resume_skills_by_job
+        scored.append((score, -position, matched))
+
+    offset = max(int(offset), 0)
+    k = max(int(k), 0)
+    top = heapq.nlargest(offset + k, scored, key=lambda item: (item[0], item[1]))[offset:]
+
+    candidates = []
+    for score, neg_position, matched in top:
+        resume = resumes[-neg_position]
+        candidates.append({
+            "resume_id": resume["id"],
+            "candidate_id": resume["candidate_id"],
+            "username": resume["username"],
+            "email": resume["email"],
+            "applied_at": str(resume["applied_at"]) if resume.get("applied_at") else None,
+            "match_score": score,
+            "matched_skills": list(dict.fromkeys(s for s in job["skills"] if skill_vocabulary.id_of(s) in matched)),
+        })
+
+    return {
+        "job_id": job_id,
+        "job_title": job.get("title"),
+        "total": len(resumes),
+        "offset": offset,
+        "k": k,
+        "candidates": candidates,
+    }
@@ -0,0 +1,201 @@
+"""
+Cache persistant du preprocessing des CV
+========================================
+
+Un candidat qui postule à plusieurs offres avec le même fichier ne repasse
+ni par le parsing ni par l'extraction LLM : le résultat de preprocess_cv est
+stocké dans une base SQLite locale et survit aux redémarrages.
+
+Deux niveaux de clé :
+- SHA-256 des octets du fichier uploadé (même fichier → aucun parsing) ;
+- SHA-256 du texte normalisé (fichier ré-exporté, même contenu → pas de LLM).
+
+Les entrées expirent après CV_CACHE_TTL secondes et les moins récemment
+utilisées sont évincées au-delà de CV_CACHE_MAX_ENTRIES. Ce ménage parcourt
+la table : il est fait au plus une fois par CV_CACHE_MAINTENANCE_INTERVAL
+secondes, pas à chaque écriture (une entrée expirée n'est de toute façon
+jamais servie par get).
+
+Seuls les résultats fiables sont stockés (is_cacheable) : un profil de
+secours produit pendant une panne du LLM serait sinon servi pendant toute
+la durée du TTL, même après un nouvel upload. Il en va de même d'un profil
+LLM dont des morceaux ont échoué ("llm_partial") et d'un CV tronqué par
+l'échéance du parsing ("truncated_by" == "deadline") : l'échec ou la
+coupure dépend de la charge du moment, pas du fichier.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+CV_CACHE_PATH = os.environ.get("CV_CACHE_PATH", "cv_cache.db")
+CV_CACHE_TTL = float(os.environ.get("CV_CACHE_TTL", str(7 * 24 * 3600)))
+CV_CACHE_MAX_ENTRIES = int(os.environ.get("CV_CACHE_MAX_ENTRIES", "5000"))
+CV_CACHE_MAINTENANCE_INTERVAL = float(os.environ.get("CV_CACHE_MAINTENANCE_INTERVAL", "60"))
+
+# Niveaux d'extraction de preprocess_cv ("extraction_tier") dont le résultat peut être gardé
+CACHEABLE_TIERS = ("local", "llm")
+
+
+def bytes_key(file_content):
+    """Clé de premier niveau : contenu exact du fichier"""
+    return "bytes:" + hashlib.sha256(file_content).hexdigest()
+
+
+def text_key(cv_text):
+    """Clé de second niveau : texte extrait, casse et espaces normalisés"""
+    normalized = " ".join(cv_text.lower().split())
+    return "text:" + hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(cv_data):
+    """
+    Vrai si le résultat vient d'un niveau fiable (local ou llm), pas d'un
+    fallback, et que le texte n'a pas été coupé par l'échéance du parsing
+    """
+    return (bool(cv_data) and cv_data.get("extraction_tier") in CACHEABLE_TIERS
+            and cv_data.get("truncated_by") != "deadline")
+
+
+class CVCache:
+    """Table SQLite clé → (texte du CV, résultat de preprocess_cv)"""
+
+    def __init__(self, path=CV_CACHE_PATH, ttl=CV_CACHE_TTL, max_entries=CV_CACHE_MAX_ENTRIES,
+                 maintenance_interval=CV_CACHE_MAINTENANCE_INTERVAL):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.maintenance_interval = maintenance_interval
+        self._next_maintenance = 0.0
+        self._lock = threading.Lock()
+        self._ready = False
+        self.hits = {"bytes": 0, "text": 0}
+        self.misses = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        if not self._ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cv_cache (
+                    key TEXT PRIMARY KEY,
+                    cv_text TEXT NOT NULL,
+                    cv_data TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cv_cache_accessed ON cv_cache (accessed_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cv_cache_created ON cv_cache (created_at)")
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def get(self, key):
+        """(cv_text, cv_data) si la clé est en cache et non expirée, sinon None"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT cv_text, cv_data, created_at FROM cv_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[2] <= self.ttl:
+                conn.execute("UPDATE cv_cache SET accessed_at = ?, hits = hits + 1 WHERE key = ?", (now, key))
+                conn.commit()
+                with self._lock:
+                    level = key.split(":", 1)[0]
+                    self.hits[level] = self.hits.get(level, 0) + 1
+                return row[0], json.loads(row[1])
+            if row:
+                conn.execute("DELETE FROM cv_cache WHERE key = ?", (key,))
+                conn.commit()
+        finally:
+            conn.close()
+        return None
+
+    def put(self, keys, cv_text, cv_data):
+        """Enregistre le même résultat sous une ou plusieurs clés (ménage périodique, voir maintain)"""
+        now = time.time()
+        payload = json.dumps(cv_data, ensure_ascii=False, default=str)
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO cv_cache (key, cv_text, cv_data, created_at, accessed_at, hits) "
+                "VALUES (?, ?, ?, ?, ?, 0)",
+                [(key, cv_text, payload, now, now) for key in keys],
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        if self._maintenance_due():
+            self.maintain()
+
+    def _maintenance_due(self):
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_maintenance:
+                return False
+            self._next_maintenance = now + self.maintenance_interval
+            return True
+
+    def maintain(self):
+        """Supprime les entrées expirées puis évince les moins récemment utilisées au-delà de max_entries"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM cv_cache WHERE created_at < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM cv_cache WHERE key IN ("
+                "SELECT key FROM cv_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def put_result(self, keys, cv_text, cv_data):
+        """put, seulement pour un résultat fiable (is_cacheable) ; renvoie True s'il a été stocké"""
+        if not is_cacheable(cv_data):
+            return False
+        self.put(keys, cv_text, cv_data)
+        return True
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def clear(self):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM cv_cache")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            entries = conn.execute("SELECT COUNT(*) FROM cv_cache").fetchone()[0]
+        finally:
+            conn.close()
+        with self._lock:
+            hits = sum(self.hits.values())
+            total = hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits_bytes": self.hits.get("bytes", 0),
+                "hits_text": self.hits.get("text", 0),
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+            }
+
+
+# Instance globale
+cv_cache = CVCache()
+
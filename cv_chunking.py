@@ -0,0 +1,122 @@
+"""
+Découpage des CV longs pour l'extraction map-reduce
+===================================================
+
+Au lieu de n'envoyer au LLM que les 2000 premiers caractères, le texte
+complet est découpé en morceaux bornés en tokens (tiktoken si installé,
+sinon estimation à ~4 caractères par token). Chaque morceau est extrait en
+parallèle, puis les profils partiels sont fusionnés : compétences
+dédoublonnées via la taxonomie canonique, nom du premier morceau qui en
+contient un, expérience maximale, diplôme le plus élevé.
+"""
+
+import os
+import re
+
+from skill_vocabulary import skill_vocabulary
+
+CV_CHUNK_TOKENS = int(os.environ.get("CV_CHUNK_TOKENS", "1500"))
+TOKEN_ENCODING = "o200k_base"  # encodage des modèles gpt-4o
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+except Exception:  # tiktoken absent ou encodage indisponible hors ligne
+    _encoding = None
+
+# Du plus faible au plus élevé : sert à garder le diplôme le plus haut entre morceaux
+EDUCATION_RANKS = [
+    ("phd", 5), ("doctor", 5), ("doctorat", 5),
+    ("master", 4), ("msc", 4), ("mba", 4), ("engineer", 4), ("ingénieur", 4),
+    ("bachelor", 3), ("licence", 3), ("bsc", 3),
+    ("associate", 2), ("bts", 2), ("dut", 2),
+    ("high school", 1), ("baccalauréat", 1),
+]
+
+LIST_FIELDS = ("skills", "programming_languages", "frameworks", "tools")
+
+
+def count_tokens(text):
+    """Nombre de tokens du texte (estimation si tiktoken n'est pas installé)"""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def split_cv_chunks(text, max_tokens=CV_CHUNK_TOKENS):
+    """
+    Découpe le texte en morceaux de max_tokens au plus, en coupant de
+    préférence entre deux lignes (une ligne trop longue est coupée en mots).
+    """
+    text = (text or "").strip()
+    if not text:
+        return []
+    if count_tokens(text) <= max_tokens:
+        return [text]
+
+    pieces = []
+    for line in text.splitlines():
+        if count_tokens(line) <= max_tokens:
+            pieces.append(line)
+            continue
+        words, current = re.split(r"(\s+)", line), ""
+        for word in words:
+            if current and count_tokens(current + word) > max_tokens:
+                pieces.append(current)
+                current = ""
+            current += word
+        if current:
+            pieces.append(current)
+
+    chunks, current, size = [], [], 0
+    for piece in pieces:
+        tokens = count_tokens(piece) + 1  # + saut de ligne
+        if current and size + tokens > max_tokens:
+            chunks.append("\n".join(current).strip())
+            current, size = [], 0
+        current.append(piece)
+        size += tokens
+    if current:
+        chunks.append("\n".join(current).strip())
+    return [chunk for chunk in chunks if chunk]
+
+
+def _education_rank(level):
+    level = str(level or "").lower()
+    return max((rank for key, rank in EDUCATION_RANKS if key in level), default=0)
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def merge_profiles(profiles):
+    """Fusionne les profils extraits de chaque morceau en un seul profil"""
+    merged = {field: [] for field in LIST_FIELDS}
+    seen = {field: set() for field in LIST_FIELDS}
+    merged["name"] = None
+    merged["experience_years"] = 0
+    merged["education_level"] = "Unknown"
+
+    for profile in profiles:
+        if not profile:
+            continue
+        if not merged["name"] and profile.get("name"):
+            merged["name"] = profile["name"]
+        for field in LIST_FIELDS:
+            for skill in profile.get(field) or []:
+                key = skill_vocabulary.canonical(skill)
+                if key and key not in seen[field]:
+                    seen[field].add(key)
+                    merged[field].append(skill)
+        years = _number(profile.get("experience_years"))
+        if years > _number(merged["experience_years"]):
+            merged["experience_years"] = profile.get("experience_years")
+        level = profile.get("education_level")
+        if level and (merged["education_level"] == "Unknown"
+                      or _education_rank(level) > _education_rank(merged["education_level"])):
+            merged["education_level"] = level
+    return merged
@@ -0,0 +1,303 @@
+"""
+File d'attente locale pour le traitement des CV
+===============================================
+
+/upload-cv et /apply/<job_id> ne font plus le parsing, l'extraction LLM,
+les écritures en base et les envois d'emails dans la requête : le fichier
+est déposé dans une file SQLite locale (aucun broker externe) et la requête
+répond tout de suite avec un identifiant de tâche. Un pool de threads
+(CV_QUEUE_WORKERS) traite les tâches dans l'ordre d'arrivée ; l'avancement
+(status, stage) est consultable par l'identifiant.
+
+Plusieurs processus Flask peuvent partager la même base : une tâche est
+réservée par une transaction BEGIN IMMEDIATE, donc traitée une seule fois.
+Pendant le traitement, le worker rafraîchit updated_at plusieurs fois par
+délai CV_QUEUE_STALE_AFTER : une tâche restée "running" sans mise à jour
+depuis ce délai a donc perdu son worker (arrêté en cours de route) et est
+remise en file, au plus CV_QUEUE_MAX_ATTEMPTS fois. Les workers démarrent avec l'application et
+refont cette vérification régulièrement, pas seulement au démarrage : la
+tâche d'un autre processus arrêté est reprise sans redémarrage.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from pipeline_metrics import pipeline_metrics
+
+logger = logging.getLogger(__name__)
+
+CV_QUEUE_PATH = os.environ.get("CV_QUEUE_PATH", "cv_queue.db")
+CV_QUEUE_WORKERS = int(os.environ.get("CV_QUEUE_WORKERS", "2"))
+CV_QUEUE_POLL_INTERVAL = float(os.environ.get("CV_QUEUE_POLL_INTERVAL", "1.0"))
+CV_QUEUE_STALE_AFTER = float(os.environ.get("CV_QUEUE_STALE_AFTER", "900"))
+CV_QUEUE_MAX_ATTEMPTS = int(os.environ.get("CV_QUEUE_MAX_ATTEMPTS", "2"))
+CV_QUEUE_RETENTION = float(os.environ.get("CV_QUEUE_RETENTION", str(24 * 3600)))
+
+STATUS_FIELDS = ("id", "kind", "status", "stage", "error", "attempts", "created_at", "updated_at", "finished_at")
+
+
+class CVQueue:
+    """Table SQLite de tâches (queued → running → done / failed) et threads de traitement"""
+
+    def __init__(self, path=CV_QUEUE_PATH, workers=CV_QUEUE_WORKERS, poll_interval=CV_QUEUE_POLL_INTERVAL,
+                 stale_after=CV_QUEUE_STALE_AFTER, max_attempts=CV_QUEUE_MAX_ATTEMPTS, retention=CV_QUEUE_RETENTION):
+        self.path = path
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self.handlers = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._started = False
+        self._ready = False
+        # Vérification des tâches abandonnées : plusieurs fois par délai stale_after
+        self.recovery_interval = max(poll_interval, stale_after / 4)
+        # Battement d'une tâche en cours : bien avant que stale_after ne la fasse passer pour abandonnée
+        self.heartbeat_interval = stale_after / 4
+        self._next_recovery = 0.0
+
+    # ---------- Base ----------
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cv_jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    stage TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    file_name TEXT,
+                    file_content BLOB,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    finished_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_cv_jobs_status ON cv_jobs (status, created_at)")
+            self._ready = True
+        return conn
+
+    def _update(self, job_id, **fields):
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        conn = self._connect()
+        try:
+            conn.execute(f"UPDATE cv_jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+        finally:
+            conn.close()
+
+    # ---------- Côté requête ----------
+    def register(self, kind, handler):
+        """handler(payload, file_content, file_name, progress) → résultat (JSON) ; progress(stage)"""
+        self.handlers[kind] = handler
+
+    def enqueue(self, kind, payload, file_content=None, file_name=None):
+        """Ajoute une tâche et renvoie son identifiant ; démarre les workers s'ils ne tournent pas encore"""
+        if kind not in self.handlers:
+            raise ValueError(f"Type de tâche inconnu: {kind}")
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO cv_jobs (id, kind, status, stage, payload, file_name, file_content, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', 'queued', ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload, ensure_ascii=False), file_name, file_content, now, now),
+            )
+            # Ménage des tâches terminées depuis plus de CV_QUEUE_RETENTION secondes
+            conn.execute("DELETE FROM cv_jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                         (now - self.retention,))
+        finally:
+            conn.close()
+        self.start()
+        self._wakeup.set()
+        return job_id
+
+    def status(self, job_id, include_result=False):
+        """État de la tâche (et nombre de tâches devant elle si elle attend), None si inconnue"""
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM cv_jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            status = {field: row[field] for field in STATUS_FIELDS}
+            if row["status"] == "queued":
+                status["queued_ahead"] = conn.execute(
+                    "SELECT COUNT(*) FROM cv_jobs WHERE status = 'queued' AND created_at < ?", (row["created_at"],)
+                ).fetchone()[0]
+            if include_result:
+                status["payload"] = json.loads(row["payload"])
+                status["result"] = json.loads(row["result"]) if row["result"] else None
+            return status
+        finally:
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM cv_jobs GROUP BY status").fetchall())
+        finally:
+            conn.close()
+        return {"workers": self.workers, "running_threads": sum(t.is_alive() for t in self._threads), **counts}
+
+    # ---------- Côté worker ----------
+    def requeue_stale(self):
+        """Remet en file les tâches abandonnées par un worker arrêté (ou les marque en échec)"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "UPDATE cv_jobs SET status = 'failed', stage = 'failed', error = 'Traitement interrompu', "
+                "finished_at = ?, updated_at = ? WHERE status = 'running' AND updated_at < ? AND attempts >= ?",
+                (now, now, now - self.stale_after, self.max_attempts),
+            )
+            requeued = conn.execute(
+                "UPDATE cv_jobs SET status = 'queued', stage = 'queued', updated_at = ? "
+                "WHERE status = 'running' AND updated_at < ?",
+                (now, now - self.stale_after),
+            ).rowcount
+        finally:
+            conn.close()
+        if requeued:
+            logger.warning(f"🔁 {requeued} tâche(s) CV interrompue(s) remise(s) en file")
+        return requeued
+
+    def _claim(self):
+        """Réserve la plus ancienne tâche en attente (transaction exclusive entre processus)"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, kind, payload, file_name, file_content FROM cv_jobs "
+                "WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE cv_jobs SET status = 'running', stage = 'starting', attempts = attempts + 1, updated_at = ? "
+                "WHERE id = ?",
+                (time.time(), row["id"]),
+            )
+            conn.execute("COMMIT")
+            return dict(row)
+        except BaseException:
+            # BEGIN IMMEDIATE en échec (base verrouillée) : pas de transaction à annuler
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _heartbeat(self, job_id):
+        """Rafraîchit updated_at tant que le traitement tourne (tâche longue ≠ worker arrêté)"""
+        finished = threading.Event()
+
+        def beat():
+            while not finished.wait(self.heartbeat_interval):
+                try:
+                    conn = self._connect()
+                    try:
+                        conn.execute("UPDATE cv_jobs SET updated_at = ? WHERE id = ? AND status = 'running'",
+                                     (time.time(), job_id))
+                    finally:
+                        conn.close()
+                except Exception as e:
+                    logger.warning(f"⚠️  Battement de la tâche CV {job_id} en échec: {e}")
+
+        thread = threading.Thread(target=beat, name=f"cv-queue-heartbeat-{job_id[:8]}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            finished.set()
+            thread.join()
+
+    def run_once(self):
+        """Traite une tâche si une est en attente ; renvoie False si la file est vide"""
+        job = self._claim()
+        if job is None:
+            return False
+
+        job_id = job["id"]
+        handler = self.handlers.get(job["kind"])
+        progress = lambda stage: self._update(job_id, stage=stage)
+        try:
+            if handler is None:
+                raise ValueError(f"Aucun traitement enregistré pour {job['kind']}")
+            with self._heartbeat(job_id), pipeline_metrics.trace(job_id), \
+                    pipeline_metrics.stage("cv_queue_job", kind=job["kind"]):
+                result = handler(json.loads(job["payload"]), job["file_content"], job["file_name"], progress)
+            # Le fichier n'est plus utile une fois traité
+            self._update(job_id, status="done", stage="done", file_content=None, finished_at=time.time(),
+                         result=json.dumps(result, ensure_ascii=False, default=str))
+        except Exception as e:
+            logger.error(f"❌ Tâche CV {job_id} en échec: {e}")
+            self._update(job_id, status="failed", stage="failed", file_content=None, finished_at=time.time(),
+                         error=str(e))
+        return True
+
+    def _recover_if_due(self):
+        """requeue_stale au plus une fois par recovery_interval, tous workers confondus"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_recovery:
+                return
+            self._next_recovery = now + self.recovery_interval
+        self.requeue_stale()
+
+    def _worker_loop(self):
+        while not self._stopping.is_set():
+            try:
+                self._recover_if_due()
+                if self.run_once():
+                    continue
+            except Exception as e:  # base verrouillée trop longtemps, disque plein...
+                logger.error(f"❌ File CV: {e}")
+            # File vide : attendre un enqueue de ce processus ou le prochain tour (autres processus)
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def start(self):
+        """Démarre les threads de traitement (une seule fois par processus)"""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+            self._stopping.clear()
+            self.requeue_stale()
+            self._next_recovery = time.monotonic() + self.recovery_interval
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker_loop, name=f"cv-queue-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        self._wakeup.set()
+        with self._lock:
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+            self._started = False
+
+
+# Instance globale
+cv_queue = CVQueue()
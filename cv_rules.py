@@ -0,0 +1,96 @@
+"""
+Règles locales d'extraction (sans LLM)
+======================================
+
+Estimations déterministes utilisées par la passe locale de preprocess_cv :
+années d'expérience (mentions explicites ou périodes datées), niveau
+d'études (mots-clés de diplômes) et score de confiance de l'extraction.
+Si la confiance est suffisante, le CV n'est jamais envoyé au LLM.
+"""
+
+import re
+from datetime import date
+
+# Du plus élevé au plus faible : le premier niveau trouvé l'emporte
+EDUCATION_PATTERNS = [
+    ("PhD", r"\bph\.?\s?d\b|\bdoctorate\b|\bdoctorat\b"),
+    ("Master", r"(?<!scrum )\bmaster'?s?\b|\bm\.?sc\b|\bmba\b|\bdipl[ôo]me d'ing[ée]nieur\b|\bengineering degree\b"),
+    ("Bachelor", r"\bbachelor'?s?\b|\blicence\b|\bb\.?sc?\b|\bb\.?a\b"),
+    ("Associate", r"\bassociate degree\b|\bbts\b|\bdut\b"),
+    ("High School", r"\bhigh school\b|\bbaccalaur[ée]at\b"),
+]
+_EDUCATION_REGEXES = [(level, re.compile(pattern, re.IGNORECASE)) for level, pattern in EDUCATION_PATTERNS]
+
+_EXPLICIT_YEARS = re.compile(
+    r"(\d{1,2})\s*\+?\s*(?:years?|yrs?|ans?|années?)\s*(?:of\s+)?(?:experience|expérience|d'expérience|exp)",
+    re.IGNORECASE,
+)
+_PERIOD = re.compile(
+    r"\b((?:19|20)\d{2})\s*(?:-|–|—|to|à|au)\s*((?:19|20)\d{2}|present|current|now|today|présent|aujourd'hui|actuel)",
+    re.IGNORECASE,
+)
+
+# Poids des signaux dans la confiance (total 1.0)
+CONFIDENCE_WEIGHTS = {
+    "name": 0.15,
+    "email": 0.10,
+    "phone": 0.05,
+    "skills": 0.40,        # proportionnel au nombre de compétences, plein à SKILLS_FOR_FULL_CONFIDENCE
+    "experience": 0.15,
+    "education": 0.15,
+}
+SKILLS_FOR_FULL_CONFIDENCE = 5
+
+
+def estimate_experience_years(text, today=None):
+    """
+    Années d'expérience : mention explicite ("5+ years of experience") ou,
+    à défaut, durée couverte par les périodes datées (chevauchements fusionnés).
+    None si rien n'est trouvé.
+    """
+    explicit = [int(value) for value in _EXPLICIT_YEARS.findall(text or "")]
+    if explicit:
+        return max(explicit)
+
+    current_year = (today or date.today()).year
+    spans = []
+    for start, end in _PERIOD.findall(text or ""):
+        start = int(start)
+        end = int(end) if end.isdigit() else current_year
+        if start <= end <= current_year:
+            spans.append((start, end))
+    if not spans:
+        return None
+
+    spans.sort()
+    total, (cur_start, cur_end) = 0, spans[0]
+    for start, end in spans[1:]:
+        if start <= cur_end:
+            cur_end = max(cur_end, end)
+        else:
+            total += cur_end - cur_start
+            cur_start, cur_end = start, end
+    total += cur_end - cur_start
+    return total
+
+
+def detect_education_level(text):
+    """Plus haut niveau d'études mentionné, None si aucun"""
+    for level, regex in _EDUCATION_REGEXES:
+        if regex.search(text or ""):
+            return level
+    return None
+
+
+def local_confidence(signals):
+    """
+    Confiance (0 à 1) de la passe locale à partir des signaux trouvés :
+    name / email / phone / experience / education (bool), skills (nombre).
+    """
+    score = 0.0
+    for signal, weight in CONFIDENCE_WEIGHTS.items():
+        if signal == "skills":
+            score += weight * min(signals.get("skills", 0) / SKILLS_FOR_FULL_CONFIDENCE, 1.0)
+        elif signals.get(signal):
+            score += weight
+    return round(score, 3)
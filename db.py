@@ -2,6 +2,7 @@ import os
 import secrets
 import string
 from dotenv import load_dotenv
+from skill_vocabulary import skill_vocabulary
 
 load_dotenv()
 
@@ -126,10 +127,26 @@ def create_tables():
                 job_id INTEGER REFERENCES jobs(id) ON DELETE CASCADE,
                 resume_data TEXT,
                 extracted_data TEXT,
+                skill_ids TEXT,  -- JSON list of canonical skill ids
                 applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
         """)
 
+        # Catalog version, bumped on every job change (used to invalidate match caches)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS catalog_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        cur.execute("INSERT OR IGNORE INTO catalog_meta (key, value) VALUES ('jobs_version', 0);")
+
+        # Add skill_ids column to existing databases (SQLite has no ADD COLUMN IF NOT EXISTS)
+        try:
+            cur.execute("ALTER TABLE resumes ADD COLUMN skill_ids TEXT;")
+        except sqlite3.OperationalError:
+            pass
+
     else:
         # PostgreSQL syntax (original)
         cur.execute("""
@@ -215,12 +232,22 @@ def create_tables():
                 job_id INTEGER REFERENCES jobs(id) ON DELETE CASCADE,
                 resume_data TEXT,
                 extracted_data TEXT,
+                skill_ids TEXT,
                 applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
         """)
 
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS catalog_meta (
+                key VARCHAR(64) PRIMARY KEY,
+                value BIGINT NOT NULL DEFAULT 0
+            );
+        """)
+        cur.execute("INSERT INTO catalog_meta (key, value) VALUES ('jobs_version', 0) ON CONFLICT (key) DO NOTHING;")
+
         # Add new columns if they don't exist
         try:
+            cur.execute("ALTER TABLE resumes ADD COLUMN IF NOT EXISTS skill_ids TEXT;")
             cur.execute("ALTER TABLE candidates ADD COLUMN IF NOT EXISTS questions TEXT;")
             cur.execute("ALTER TABLE candidates ADD COLUMN IF NOT EXISTS answers TEXT;")
             cur.execute("ALTER TABLE candidates ADD COLUMN IF NOT EXISTS password VARCHAR(255);")
@@ -540,6 +567,32 @@ def update_candidate_evaluation(candidate_id, answers, correct_answers, evaluati
     cur.close()
     conn.close()
 
+# Catalog version functions
+def get_catalog_version():
+    """Current version of the jobs catalog (changes whenever a job is added or deleted)"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("SELECT value FROM catalog_meta WHERE key = 'jobs_version'")
+    row = cur.fetchone()
+    cur.close()
+    conn.close()
+    return row[0] if row else 0
+
+def bump_catalog_version():
+    """Increment the jobs catalog version and return the new value"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    if DB_TYPE == 'sqlite':
+        cur.execute("UPDATE catalog_meta SET value = value + 1 WHERE key = 'jobs_version'")
+        cur.execute("SELECT value FROM catalog_meta WHERE key = 'jobs_version'")
+    else:
+        cur.execute("UPDATE catalog_meta SET value = value + 1 WHERE key = 'jobs_version' RETURNING value")
+    row = cur.fetchone()
+    conn.commit()
+    cur.close()
+    conn.close()
+    return row[0] if row else None
+
 # Jobs functions
 def add_company(name, url, remote_friendly, market, size):
     conn = get_db_connection()
@@ -600,12 +653,41 @@ def add_job(company_id, recruiter_id, position, title, description, url, job_typ
         cur.execute("""
             INSERT INTO jobs (company_id, recruiter_id, position, title, description, url, type, posted, location, skills, salary_from, salary_to, salary_currency, equity_from, equity_to, perks, apply_url, job_image)
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            RETURNING id
         """, (company_id, recruiter_id, position, title, description, url, job_type, posted, location, skills, salary_from, salary_to, salary_currency, equity_from, equity_to, perks, apply_url, job_image))
 
+    job_id = cur.lastrowid if DB_TYPE == 'sqlite' else cur.fetchone()[0]
+
     conn.commit()
     cur.close()
     conn.close()
 
+    # Nouvelle version du catalogue + mise à jour de l'index de matching en mémoire
+    version = bump_catalog_version()
+    from job_index import job_index
+    if job_index.loaded:
+        job_index.add_job(get_job_by_id(job_id), version=version)
+    return job_id
+
+def _normalize_job_skills(job):
+    """Skills en liste minuscule + identifiants canoniques (skill_ids) pour le matching"""
+    skills = job.get("skills", [])
+    if isinstance(skills, str):
+        # Ex: "{Python,SQL}" → ["Python","SQL"] (PostgreSQL)
+        # Ou JSON string (SQLite)
+        try:
+            import json
+            skills = json.loads(skills)
+        except:
+            skills = [s.strip() for s in skills.strip("{}").split(",") if s.strip()]
+    elif skills is None:
+        skills = []
+    elif isinstance(skills, list):
+        skills = [str(s).strip() for s in skills]
+
+    job["skills"] = [s.lower() for s in skills]
+    job["skill_ids"] = skill_vocabulary.encode(job["skills"])
+
 def get_all_jobs():
     conn = get_db_connection()
 
@@ -648,22 +730,7 @@ def get_all_jobs():
 
     # ✅ Normalisation des skills
     for job in jobs:
-        skills = job.get("skills", [])
-        if isinstance(skills, str):
-            # Ex: "{Python,SQL}" → ["Python","SQL"] (PostgreSQL)
-            # Ou JSON string (SQLite)
-            try:
-                import json
-                skills = json.loads(skills)
-            except:
-                skills = [s.strip() for s in skills.strip("{}").split(",") if s.strip()]
-        elif skills is None:
-            skills = []
-        elif isinstance(skills, list):
-            skills = [str(s).strip() for s in skills]
-
-        # Mettre en lowercase
-        job["skills"] = [s.lower() for s in skills]
+        _normalize_job_skills(job)
 
     return jobs
 
@@ -713,19 +780,7 @@ def get_jobs_by_recruiter(recruiter_id):
 
     # Normalize skills for both database types
     for job in jobs:
-        skills = job.get("skills", [])
-        if isinstance(skills, str):
-            try:
-                import json
-                skills = json.loads(skills)
-            except:
-                skills = [s.strip() for s in skills.strip("{}").split(",") if s.strip()]
-        elif skills is None:
-            skills = []
-        elif isinstance(skills, list):
-            skills = [str(s).strip() for s in skills]
-
-        job["skills"] = [s.lower() for s in skills]
+        _normalize_job_skills(job)
 
     return jobs
 
@@ -771,20 +826,7 @@ def get_job_by_id(job_id):
     conn.close()
 
     if job:
-        # Normalize skills
-        skills = job.get("skills", [])
-        if isinstance(skills, str):
-            try:
-                import json
-                skills = json.loads(skills)
-            except:
-                skills = [s.strip() for s in skills.strip("{}").split(",") if s.strip()]
-        elif skills is None:
-            skills = []
-        elif isinstance(skills, list):
-            skills = [str(s).strip() for s in skills]
-
-        job["skills"] = [s.lower() for s in skills]
+        _normalize_job_skills(job)
 
     return job
 
@@ -876,6 +918,10 @@ def delete_job(job_id):
     cur.close()
     conn.close()
 
+    version = bump_catalog_version()
+    from job_index import job_index
+    job_index.remove_job(job_id, version=version)
+
 def delete_company(company_id):
     conn = get_db_connection()
     cur = conn.cursor()
@@ -891,6 +937,24 @@ def delete_company(company_id):
     cur.close()
     conn.close()
 
+    # Les jobs supprimés en cascade ne sont pas connus ici : reconstruire l'index
+    bump_catalog_version()
+    from job_index import job_index
+    job_index.invalidate()
+
+def delete_all_jobs():
+    """Vide le catalogue (ex. avant un import complet) ; les candidatures suivent par CASCADE"""
+    conn = get_db_connection()
+    cur = conn.cursor()
+    cur.execute("DELETE FROM jobs")
+    conn.commit()
+    cur.close()
+    conn.close()
+
+    bump_catalog_version()
+    from job_index import job_index
+    job_index.invalidate()
+
 def get_all_companies():
     conn = get_db_connection()
 
@@ -1023,6 +1087,10 @@ def delete_recruiter(recruiter_id):
     cur.close()
     conn.close()
 
+    bump_catalog_version()
+    from job_index import job_index
+    job_index.invalidate()
+
 def delete_candidate(candidate_id):
     """Delete a candidate"""
     conn = get_db_connection()
@@ -1038,21 +1106,41 @@ def delete_candidate(candidate_id):
     conn.close()
 
 # Resume functions
-def add_resume(candidate_id, recruiter_id, job_id, resume_data, extracted_data):
+def _resume_skill_ids(extracted_data):
+    """skill_ids canoniques d'un CV à partir de extracted_data (dict ou JSON)"""
+    import json
+    if isinstance(extracted_data, str):
+        try:
+            extracted_data = json.loads(extracted_data)
+        except (json.JSONDecodeError, TypeError):
+            extracted_data = {}
+    if not isinstance(extracted_data, dict):
+        return []
+    skill_ids = extracted_data.get("skill_ids")
+    if skill_ids is None:
+        skill_ids = skill_vocabulary.encode(extracted_data.get("skills"))
+    return skill_ids
+
+def add_resume(candidate_id, recruiter_id, job_id, resume_data, extracted_data, skill_ids=None):
     """Add a resume application"""
+    import json
+    if skill_ids is None:
+        skill_ids = _resume_skill_ids(extracted_data)
+    skill_ids_json = json.dumps(skill_ids)
+
     conn = get_db_connection()
     cur = conn.cursor()
 
     if DB_TYPE == 'sqlite':
         cur.execute("""
-            INSERT INTO resumes (candidate_id, recruiter_id, job_id, resume_data, extracted_data)
-            VALUES (?, ?, ?, ?, ?)
-        """, (candidate_id, recruiter_id, job_id, resume_data, extracted_data))
+            INSERT INTO resumes (candidate_id, recruiter_id, job_id, resume_data, extracted_data, skill_ids)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (candidate_id, recruiter_id, job_id, resume_data, extracted_data, skill_ids_json))
     else:
         cur.execute("""
-            INSERT INTO resumes (candidate_id, recruiter_id, job_id, resume_data, extracted_data)
-            VALUES (%s, %s, %s, %s, %s)
-        """, (candidate_id, recruiter_id, job_id, resume_data, extracted_data))
+            INSERT INTO resumes (candidate_id, recruiter_id, job_id, resume_data, extracted_data, skill_ids)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, (candidate_id, recruiter_id, job_id, resume_data, extracted_data, skill_ids_json))
 
     conn.commit()
     cur.close()
@@ -1094,6 +1182,55 @@ def get_resumes_by_job(job_id):
     conn.close()
     return resumes
 
+def get_resume_skills_by_job(job_id):
+    """
+    Get the precomputed skill_ids of every resume for a job (without the CV text).
+    Resumes stored before the skill_ids column existed are backfilled once.
+    """
+    import json
+    conn = get_db_connection()
+
+    query = """
+        SELECT r.id, r.candidate_id, r.applied_at, r.skill_ids, c.username, c.email
+        FROM resumes r
+        JOIN candidates c ON r.candidate_id = c.id
+        WHERE r.job_id = {0}
+    """
+    if DB_TYPE == 'sqlite':
+        cur = conn.cursor()
+        cur.execute(query.format("?"), (job_id,))
+        columns = [desc[0] for desc in cur.description]
+        resumes = [dict(zip(columns, row)) for row in cur.fetchall()]
+    else:
+        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cur.execute(query.format("%s"), (job_id,))
+        resumes = cur.fetchall()
+
+    # Backfill: parse extracted_data only for rows without skill_ids
+    missing = [resume for resume in resumes if resume.get('skill_ids') is None]
+    for resume in missing:
+        if DB_TYPE == 'sqlite':
+            cur.execute("SELECT extracted_data FROM resumes WHERE id = ?", (resume['id'],))
+        else:
+            cur.execute("SELECT extracted_data FROM resumes WHERE id = %s", (resume['id'],))
+        row = cur.fetchone()
+        extracted_data = row[0] if DB_TYPE == 'sqlite' else row['extracted_data']
+        skill_ids = _resume_skill_ids(extracted_data)
+        resume['skill_ids'] = json.dumps(skill_ids)
+        if DB_TYPE == 'sqlite':
+            cur.execute("UPDATE resumes SET skill_ids = ? WHERE id = ?", (resume['skill_ids'], resume['id']))
+        else:
+            cur.execute("UPDATE resumes SET skill_ids = %s WHERE id = %s", (resume['skill_ids'], resume['id']))
+    if missing:
+        conn.commit()
+
+    cur.close()
+    conn.close()
+
+    for resume in resumes:
+        resume['skill_ids'] = json.loads(resume['skill_ids'] or "[]")
+    return resumes
+
 def get_resume_by_candidate_and_job(candidate_id, job_id):
     """Check if candidate already applied for this job"""
     conn = get_db_connection()
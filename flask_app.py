@@ -4,7 +4,7 @@ from dotenv import load_dotenv
 load_dotenv()
 import json
 from preprocessing import preprocess_cv
-from matching import match_jobs
+from matching import match_jobs, top_job_matches
 from agent import (
     generate_answer_for_question,
     evaluate_answers,
@@ -24,8 +24,16 @@ import smtplib
 from email.mime.text import MIMEText
 import time
 import base64
-from parsing import parse_cv
+from parsing import parse_cv_bytes_bounded, CV_MAX_UPLOAD_BYTES
 from pathlib import Path
+from job_index import job_index
+from skill_vocabulary import skill_ids_of
+from candidate_ranking import rank_candidates_for_job
+from match_cache import match_cache
+from cv_cache import cv_cache, bytes_key, text_key
+from pipeline_metrics import pipeline_metrics
+from ocr_engine import ocr_engine
+from cv_queue import cv_queue
 
 # Import functions from app.py for question generation
 # We'll define Flask-compatible versions without Streamlit dependencies
@@ -257,6 +265,8 @@ def generate_answer_for_question(question, index=None, texts=None, max_context_l
 
 app = Flask(__name__, template_folder='.')
 app.secret_key = os.environ.get('SECRET_KEY', 'your-secret-key-here')
+# Uploads plafonnés : au-delà, Werkzeug refuse la requête (413) avant de lire le corps
+app.config['MAX_CONTENT_LENGTH'] = CV_MAX_UPLOAD_BYTES
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -268,6 +278,28 @@ print("📊 DEBUG - Database initialization...")
 
 GEN_MODEL = "gemini-1.5-flash"
 
+# Mode de scoring du matching CV → jobs : "count" (défaut), "idf" ou "semantic"
+MATCH_SCORING_MODE = os.environ.get('MATCH_SCORING_MODE', 'count').lower()
+
+# Une trace par requête : toutes les étapes d'un même upload partagent un identifiant
+@app.before_request
+def start_pipeline_trace():
+    request.environ["pipeline_trace_token"] = pipeline_metrics.begin_trace()
+
+@app.teardown_request
+def end_pipeline_trace(exc=None):
+    token = request.environ.pop("pipeline_trace_token", None)
+    if token is not None:
+        try:
+            pipeline_metrics.end_trace(token)
+        except ValueError:
+            pass  # contexte différent (ex. teardown hors du thread de la requête)
+
+@app.errorhandler(413)
+def upload_too_large(e):
+    flash(f'File too large (max {CV_MAX_UPLOAD_BYTES // (1024 * 1024)} MB)', 'error')
+    return redirect(request.referrer or url_for('jobs'))
+
 # Initialize database (will use SQLite by default from .env)
 try:
     db.create_tables()
@@ -452,35 +484,9 @@ def upload_cv():
 
     if file and (file.filename.lower().endswith('.pdf') or file.filename.lower().endswith('.docx')):
         try:
-            # Process the CV
-            file_content = file.read()
-            file_name = file.filename
-            cv_text, cv_data = process_cv_cached(file_content, file_name)
-
-            if cv_data and cv_data.get("skills"):
-                # Store CV data in session
-                session['cv_data'] = cv_data
-                session['cv_text'] = cv_text
-
-                # Get matched jobs
-                jobs_data = db.get_all_jobs()
-                matched_jobs = process_job_matching(cv_data, jobs_data)
-
-                flash(f'CV processed successfully! Found {len(cv_data.get("skills", []))} skills.', 'success')
-
-                # Extract unique locations and types for filters
-                locations = ["All"] + sorted(list(set([job['location'] for job in jobs_data if job.get('location')])))
-                job_types = ["All"] + sorted(list(set([job['type'] for job in jobs_data if job.get('type')])))
-
-                return render_template("jobs.html",
-                                     jobs=matched_jobs,
-                                     locations=locations,
-                                     job_types=job_types,
-                                     cv_data=cv_data,
-                                     matched_jobs=matched_jobs)
-            else:
-                flash('Could not extract skills from CV. Please try again.', 'error')
-                return redirect(url_for('jobs'))
+            # Parsing, extraction et matching : traités par cv_queue, la requête répond tout de suite
+            task_id = cv_queue.enqueue("upload", {}, file.read(), file.filename)
+            return redirect(url_for('cv_job_wait', task_id=task_id))
 
         except Exception as e:
             flash(f'Error processing CV: {str(e)}', 'error')
@@ -489,6 +495,18 @@ def upload_cv():
         flash('Please upload a PDF or DOCX file.', 'error')
         return redirect(url_for('jobs'))
 
+def _run_upload_job(payload, file_content, file_name, progress):
+    """Traitement d'un CV déposé sur /upload-cv dans un worker de cv_queue : extraction puis matching"""
+    progress("processing_cv")
+    cv_text, cv_data = process_cv_cached(file_content, file_name)
+    if not (cv_data and cv_data.get("skills")):
+        raise ValueError('Could not extract skills from CV. Please try again.')
+
+    # Get matched jobs (index inversé : seuls les jobs partageant une compétence sont scorés)
+    progress("matching")
+    matched_jobs = process_job_matching(cv_data)
+    return {"cv_text": cv_text, "cv_data": cv_data, "matched_jobs": matched_jobs}
+
 @app.route("/login")
 def login():
     return render_template("login.html")
@@ -1067,90 +1085,124 @@ def apply_for_job(job_id):
             resume_file = request.files.get('resume')
             print(f"   📄 Resume file details:")
             print(f"      File object: {resume_file}")
-            if resume_file:
-                print(f"      Filename: '{resume_file.filename}'")
-                print(f"      Content type: '{resume_file.content_type}'")
-                print(f"      File size: {len(resume_file.read()) if resume_file else 0} bytes")
-                resume_file.seek(0)  # Reset file pointer
-            else:
+            if not resume_file:
                 print(f"      No file uploaded")
 
             if not name or not email or not resume_file:
                 flash('Veuillez remplir tous les champs obligatoires', 'error')
                 return redirect(request.url)
 
-            # Process the resume
+            # Process the resume : lu une seule fois, ces octets servent au cache et au parsing
             file_content = resume_file.read()
             file_name = resume_file.filename
+            print(f"      Filename: '{file_name}'")
+            print(f"      Content type: '{resume_file.content_type}'")
+            print(f"      File size: {len(file_content)} bytes")
+
+            # Parsing, extraction, enregistrement et emails : traités par cv_queue, hors de la requête
+            task_id = cv_queue.enqueue("application", {
+                "job_id": job_id,
+                "name": name,
+                "email": email,
+                "phone": phone,
+                "cover_letter": cover_letter,
+            }, file_content, file_name)
+            print(f"📥 Candidature mise en file: {task_id}")
+            return redirect(url_for('cv_job_wait', task_id=task_id))
 
-            # Parse and preprocess CV
-            cv_text, cv_data = process_cv_cached(file_content, file_name)
-
-            if cv_data:
-                # Initialize generated_password variable
-                generated_password = None
-    
-                # Check if candidate already exists
-                existing_candidate = db.get_candidate_by_email(email)
-                if existing_candidate:
-                    candidate_id = existing_candidate['id']
-                    # Update candidate's recruiter association if different
-                    if existing_candidate['recruiter_id'] != job['recruiter_id']:
-                        print(f"🔄 Updating candidate {candidate_id} recruiter from {existing_candidate['recruiter_id']} to {job['recruiter_id']}")
-                        conn = db.get_db_connection()
-                        cur = conn.cursor()
-                        if db.DB_TYPE == 'sqlite':
-                            cur.execute("UPDATE candidates SET recruiter_id = ? WHERE id = ?", (job['recruiter_id'], candidate_id))
-                        else:
-                            cur.execute("UPDATE candidates SET recruiter_id = %s WHERE id = %s", (job['recruiter_id'], candidate_id))
-                        conn.commit()
-                        cur.close()
-                        conn.close()
-
-                    # Ensure candidate has a password for test access
-                    if not existing_candidate.get('password'):
-                        # Generate password if missing
-                        generated_password = db.generate_password()
-                        # Update candidate with password
-                        conn = db.get_db_connection()
-                        cur = conn.cursor()
-                        if db.DB_TYPE == 'sqlite':
-                            cur.execute("UPDATE candidates SET password = ? WHERE id = ?", (generated_password, candidate_id))
-                        else:
-                            cur.execute("UPDATE candidates SET password = %s WHERE id = %s", (generated_password, candidate_id))
-                        conn.commit()
-                        cur.close()
-                        conn.close()
-                    else:
-                        # Use existing password for email
-                        generated_password = existing_candidate.get('password')
-                else:
-                    # Create job matching info for the candidate
-                    job_matching_info = f"Applied to: {job['title']} at {job['company_name']} - {job['location']} ({job['type']})"
-
-                    # Create new candidate with generated password
-                    generated_password = db.generate_password()
-                    candidate_added, _ = db.add_candidate(name, email, job_matching_info, "", job['recruiter_id'])
-                    if candidate_added:
-                        candidate = db.get_candidate_by_email(email)
-                        candidate_id = candidate['id']
-                    else:
-                        flash('Erreur lors de la création du profil candidat', 'error')
-                        return redirect(request.url)
+        except Exception as e:
+            print(f"Erreur lors du traitement de la candidature: {e}")
+            flash(f'❌ Erreur lors du traitement: {str(e)}', 'error')
+            return redirect(request.url)
+
+    return render_template('apply.html', job=job)
+
+def _run_application_job(payload, file_content, file_name, progress):
+    """
+    Traitement d'une candidature dans un worker de cv_queue : parsing et
+    extraction du CV, profil candidat, CV enregistré dans resumes
+    (extracted_data), puis emails au candidat et au recruteur.
+    Renvoie les messages à afficher une fois la tâche terminée.
+    """
+    job_id = payload["job_id"]
+    name, email, phone = payload["name"], payload["email"], payload.get("phone")
+    job = db.get_job_by_id(job_id)
+    if not job:
+        raise ValueError('Offre d\'emploi introuvable')
+
+    progress("processing_cv")
+    cv_text, cv_data = process_cv_cached(file_content, file_name)
+    if not cv_data:
+        raise ValueError('❌ Impossible d\'analyser votre CV. Assurez-vous qu\'il s\'agit d\'un fichier PDF ou DOCX valide.')
+
+    progress("saving")
+    messages = []
+
+    # Initialize generated_password variable
+    generated_password = None
+
+    # Check if candidate already exists
+    existing_candidate = db.get_candidate_by_email(email)
+    if existing_candidate:
+        candidate_id = existing_candidate['id']
+        # Update candidate's recruiter association if different
+        if existing_candidate['recruiter_id'] != job['recruiter_id']:
+            print(f"🔄 Updating candidate {candidate_id} recruiter from {existing_candidate['recruiter_id']} to {job['recruiter_id']}")
+            conn = db.get_db_connection()
+            cur = conn.cursor()
+            if db.DB_TYPE == 'sqlite':
+                cur.execute("UPDATE candidates SET recruiter_id = ? WHERE id = ?", (job['recruiter_id'], candidate_id))
+            else:
+                cur.execute("UPDATE candidates SET recruiter_id = %s WHERE id = %s", (job['recruiter_id'], candidate_id))
+            conn.commit()
+            cur.close()
+            conn.close()
+
+        # Ensure candidate has a password for test access
+        if not existing_candidate.get('password'):
+            # Generate password if missing
+            generated_password = db.generate_password()
+            # Update candidate with password
+            conn = db.get_db_connection()
+            cur = conn.cursor()
+            if db.DB_TYPE == 'sqlite':
+                cur.execute("UPDATE candidates SET password = ? WHERE id = ?", (generated_password, candidate_id))
+            else:
+                cur.execute("UPDATE candidates SET password = %s WHERE id = %s", (generated_password, candidate_id))
+            conn.commit()
+            cur.close()
+            conn.close()
+        else:
+            # Use existing password for email
+            generated_password = existing_candidate.get('password')
+    else:
+        # Create job matching info for the candidate
+        job_matching_info = f"Applied to: {job['title']} at {job['company_name']} - {job['location']} ({job['type']})"
+
+        # Create new candidate with generated password
+        generated_password = db.generate_password()
+        candidate_added, _ = db.add_candidate(name, email, job_matching_info, "", job['recruiter_id'])
+        if candidate_added:
+            candidate = db.get_candidate_by_email(email)
+            candidate_id = candidate['id']
+        else:
+            raise RuntimeError('Erreur lors de la création du profil candidat')
+
+    # Check if already applied for this job
+    existing_resume = db.get_resume_by_candidate_and_job(candidate_id, job_id)
+    if existing_resume:
+        return {"messages": [("warning", 'Vous avez déjà postulé pour cette offre.')]}
 
-                # Check if already applied for this job
-                existing_resume = db.get_resume_by_candidate_and_job(candidate_id, job_id)
-                if existing_resume:
-                    flash(f'Vous avez déjà postulé pour cette offre.', 'warning')
-                    return redirect(url_for('jobs'))
+    # Save resume to database
+    extracted_data_json = json.dumps(cv_data) if cv_data else "{}"
+    db.add_resume(candidate_id, job['recruiter_id'], job_id, cv_text, extracted_data_json,
+                  skill_ids=skill_ids_of(cv_data))
 
-                # Save resume to database
-                extracted_data_json = json.dumps(cv_data) if cv_data else "{}"
-                db.add_resume(candidate_id, job['recruiter_id'], job_id, cv_text, extracted_data_json)
+    progress("notifying")
 
-                # Send confirmation email to candidate
-                subject = f"Candidature reçue - {job['title']}"
-                body = f"""Bonjour {name},
+    # Send confirmation email to candidate
+    subject = f"Candidature reçue - {job['title']}"
+    body = f"""Bonjour {name},
 
 Merci d'avoir postulé au poste de {job['title']} chez {job['company_name']}.
 
@@ -1166,25 +1218,25 @@ Cordialement,
 L'équipe de recrutement
 {job['company_name']}"""
 
-                print("📧 DEBUG - About to send confirmation email:")
-                print(f"   To: {email}")
-                print(f"   Subject: {subject}")
-                print(f"   Body preview: {body[:100]}...")
+    print("📧 DEBUG - About to send confirmation email:")
+    print(f"   To: {email}")
+    print(f"   Subject: {subject}")
+    print(f"   Body preview: {body[:100]}...")
 
-                email_sent = send_email(email, subject, body)
-                if not email_sent:
-                    print("❌ Failed to send confirmation email to candidate")
-                    flash('Candidature enregistrée mais email de confirmation non envoyé. Vérifiez la configuration email.', 'warning')
-                else:
-                    print("✅ Confirmation email sent successfully")
+    email_sent = send_email(email, subject, body)
+    if not email_sent:
+        print("❌ Failed to send confirmation email to candidate")
+        messages.append(('warning', 'Candidature enregistrée mais email de confirmation non envoyé. Vérifiez la configuration email.'))
+    else:
+        print("✅ Confirmation email sent successfully")
 
-                flash(f'✅ Merci {name}! Votre candidature pour "{job["title"]}" a été soumise avec succès.', 'success')
+    messages.append(('success', f'✅ Merci {name}! Votre candidature pour "{job["title"]}" a été soumise avec succès.'))
 
-                # Send notification to recruiter
-                recruiter_email = db.get_recruiter_email_by_candidate(candidate_id)
-                if recruiter_email:
-                    recruiter_subject = f"Nouvelle candidature - {job['title']}"
-                    recruiter_body = f"""Bonjour,
+    # Send notification to recruiter
+    recruiter_email = db.get_recruiter_email_by_candidate(candidate_id)
+    if recruiter_email:
+        recruiter_subject = f"Nouvelle candidature - {job['title']}"
+        recruiter_body = f"""Bonjour,
 
 Une nouvelle candidature a été reçue pour le poste "{job['title']}".
 
@@ -1199,29 +1251,19 @@ Veuillez vous connecter à votre tableau de bord pour consulter le CV complet.
 Cordialement,
 Système de recrutement automatisé"""
 
-                    print("📧 DEBUG - About to send recruiter notification:")
-                    print(f"   To: {recruiter_email}")
-                    print(f"   Subject: {recruiter_subject}")
-                    print(f"   Body preview: {recruiter_body[:100]}...")
+        print("📧 DEBUG - About to send recruiter notification:")
+        print(f"   To: {recruiter_email}")
+        print(f"   Subject: {recruiter_subject}")
+        print(f"   Body preview: {recruiter_body[:100]}...")
 
-                    recruiter_email_sent = send_email(recruiter_email, recruiter_subject, recruiter_body)
-                    if not recruiter_email_sent:
-                        print("❌ Failed to send notification email to recruiter")
-                        flash('Candidature enregistrée mais notification recruteur non envoyée.', 'warning')
-                    else:
-                        print("✅ Recruiter notification email sent successfully")
-
-                return redirect(url_for('jobs'))
-            else:
-                flash('❌ Impossible d\'analyser votre CV. Assurez-vous qu\'il s\'agit d\'un fichier PDF ou DOCX valide.', 'error')
-                return redirect(request.url)
-
-        except Exception as e:
-            print(f"Erreur lors du traitement de la candidature: {e}")
-            flash(f'❌ Erreur lors du traitement: {str(e)}', 'error')
-            return redirect(request.url)
+        recruiter_email_sent = send_email(recruiter_email, recruiter_subject, recruiter_body)
+        if not recruiter_email_sent:
+            print("❌ Failed to send notification email to recruiter")
+            messages.append(('warning', 'Candidature enregistrée mais notification recruteur non envoyée.'))
+        else:
+            print("✅ Recruiter notification email sent successfully")
 
-    return render_template('apply.html', job=job)
+    return {"messages": messages}
 
 @app.route("/recruiter/<int:recruiter_id>")
 def recruiter_profile(recruiter_id):
@@ -1349,12 +1391,67 @@ def delete_job(job_id):
         print(f"Error deleting job: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route("/recruiter/job/<int:job_id>/candidates")
+def rank_job_candidates(job_id):
+    """Rank all applicants of a job by skill match (paginated with ?k=&offset=)"""
+    if 'user' not in session or session.get('user_type') != 'recruiter':
+        return jsonify({'success': False, 'error': 'Not authorized'}), 403
+
+    recruiter = session['user']
+    recruiter_id = recruiter.get('id') if isinstance(recruiter, dict) else recruiter['id']
+
+    try:
+        k = min(request.args.get('k', 20, type=int), 100)
+        offset = request.args.get('offset', 0, type=int)
+
+        job = db.get_job_by_id(job_id)
+        if not job:
+            return jsonify({'success': False, 'error': 'Job not found'}), 404
+
+        if job['recruiter_id'] != recruiter_id:
+            return jsonify({'success': False, 'error': 'Not authorized to view this job'}), 403
+
+        ranking = rank_candidates_for_job(job_id, k=k, offset=offset)
+        return jsonify({'success': True, **ranking})
+
+    except Exception as e:
+        print(f"Error ranking candidates: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # ========== UTILITY FUNCTIONS ==========
 def process_cv_cached(file_content, file_name):
-    """Cache le traitement du CV pour éviter la répétition avec gestion d'erreur Google Gemini"""
-    cv_text = parse_cv_from_content(file_content, file_name)
+    """
+    Traitement du CV mis en cache (cv_cache, SQLite local) avec gestion d'erreur Google Gemini :
+    même fichier → ni parsing ni LLM ; même texte dans un autre fichier → pas de LLM
+    Mesuré comme étape process_cv (cache : hit_bytes / hit_text / miss).
+    """
+    with pipeline_metrics.stage("process_cv", input_size=len(file_content)):
+        return _process_cv_cached(file_content, file_name)
+
+def _process_cv_cached(file_content, file_name):
+    first_key = bytes_key(file_content)
+    cached = cv_cache.get(first_key)
+    if cached is not None:
+        pipeline_metrics.annotate(cache="hit_bytes")
+        return cached
+
+    parsed = parse_cv_from_content(file_content, file_name)
+    cv_text, truncated_by = parsed["text"], parsed["truncated_by"]
     if not cv_text.strip():
         return None, None
+    if truncated_by:
+        pipeline_metrics.annotate(truncated_by=truncated_by)
+
+    second_key = text_key(cv_text)
+    cached = cv_cache.get(second_key)
+    if cached is not None:
+        pipeline_metrics.annotate(cache="hit_text")
+        # Texte coupé par l'échéance : le même fichier pourra être lu en entier la prochaine fois
+        if truncated_by != "deadline":
+            cv_cache.put([first_key], *cached)
+        return cached
+    pipeline_metrics.annotate(cache="miss")
+    cv_cache.record_miss()
 
     try:
         cv_data = preprocess_cv(cv_text)
@@ -1365,7 +1462,12 @@ def process_cv_cached(file_content, file_name):
                 cv_data = json.loads(cv_data)
             except:
                 cv_data = {}
+        # CV partiel (limite de pages, de caractères ou échéance) : gardé avec le résultat et le CV
+        if truncated_by and cv_data:
+            cv_data["truncated_by"] = truncated_by
 
+        # Seuls les résultats fiables sont mis en cache : ni le fallback d'une panne LLM, ni un CV coupé par l'échéance
+        cv_cache.put_result([first_key, second_key], cv_text, cv_data)
         return cv_text, cv_data
 
     except Exception as e:
@@ -1395,46 +1497,97 @@ def process_cv_cached(file_content, file_name):
             return cv_text, None
 
 def parse_cv_from_content(file_content, file_name):
-    """Parse CV à partir du contenu binaire"""
-    import io
-    file_obj = io.BytesIO(file_content)
-    file_obj.name = file_name
-    return parse_cv(file_obj)
-
-def process_job_matching(cv_data, jobs_data):
-    """Filtrer et scorer les jobs qui matchent avec le CV"""
-    # 🔧 Étape 1 : normaliser les jobs
-    flat_jobs = []
-    for job in jobs_data:
-        if isinstance(job, dict) and "skills" in job:
-            flat_jobs.append(job)
-        elif isinstance(job, dict) and "jobs" in job:
-            for subjob in job["jobs"]:
-                subjob = subjob.copy()
-                subjob["company_name"] = job["company"]
-                subjob["url"] = subjob.get("url", job.get("url"))
-                flat_jobs.append(subjob)
-
-    # ✅ Normalisation des skills
-    cv_data["skills"] = [s.lower() for s in cv_data.get("skills", [])]
-    for job in flat_jobs:
-        if "skills" in job and isinstance(job["skills"], list):
-            job["skills"] = [s.lower() for s in job["skills"]]
-
-    # 🔧 Étape 2 : calculer les scores pour tous les jobs
-    from matching import compute_score
-    scored_jobs = []
-    for job in flat_jobs:
-        score, matched_skills = compute_score(cv_data, job.get("skills", []))
-        if score > 0:  # Seulement les jobs avec au moins un match
-            job_copy = job.copy()
-            job_copy["match_score"] = score
-            job_copy["matched_skills"] = matched_skills
-            scored_jobs.append(job_copy)
-
-    # 🔧 Étape 3 : trier par score décroissant et prendre top 3
-    scored_jobs.sort(key=lambda j: j["match_score"], reverse=True)
-    return scored_jobs[:3]
+    """
+    Parse CV à partir du contenu binaire, en mémoire (sans fichier temporaire) ;
+    renvoie {"text", "truncated", "truncated_by"} (parse_cv_bytes_bounded)
+    """
+    return parse_cv_bytes_bounded(file_content, file_name)
+
+def process_job_matching(cv_data, jobs_data=None, k=3, mode=None):
+    """
+    Filtrer et scorer les jobs qui matchent avec le CV
+    mode : "count" (part des compétences du job couvertes), "idf"
+    (compétences rares pondérées plus fort) ou "semantic" (compétences
+    proches en embedding) ; par défaut MATCH_SCORING_MODE.
+    Mesuré comme étape process_job_matching (taille d'entrée : nombre de compétences du CV).
+    """
+    mode = mode or MATCH_SCORING_MODE
+    with pipeline_metrics.stage("process_job_matching", input_size=len((cv_data or {}).get("skills") or []),
+                                mode=mode, k=k) as record:
+        matches = top_job_matches(cv_data, jobs_data, k, mode)
+        record["matches"] = len(matches)
+        return matches
+
+# ========== CV PROCESSING QUEUE ==========
+@app.route("/cv-jobs/<task_id>")
+def cv_job_status(task_id):
+    """Avancement d'une tâche cv_queue (status, stage, position dans la file)"""
+    status = cv_queue.status(task_id)
+    if status is None:
+        return jsonify({"success": False, "error": "Unknown task"}), 404
+    if status["status"] in ("done", "failed"):
+        status["result_url"] = url_for('cv_job_result', task_id=task_id)
+    return jsonify(status)
+
+@app.route("/cv-jobs/<task_id>/wait")
+def cv_job_wait(task_id):
+    """Page d'attente qui interroge /cv-jobs/<task_id> jusqu'à la fin du traitement"""
+    status = cv_queue.status(task_id)
+    if status is None:
+        flash('Traitement introuvable ou expiré', 'error')
+        return redirect(url_for('jobs'))
+    return render_template("cv_job_status.html", task=status)
+
+@app.route("/cv-jobs/<task_id>/result")
+def cv_job_result(task_id):
+    """Affiche le résultat d'une tâche terminée (jobs correspondants ou confirmation de candidature)"""
+    task = cv_queue.status(task_id, include_result=True)
+    if task is None:
+        flash('Traitement introuvable ou expiré', 'error')
+        return redirect(url_for('jobs'))
+    if task["status"] not in ("done", "failed"):
+        return redirect(url_for('cv_job_wait', task_id=task_id))
+
+    if task["kind"] == "application":
+        if task["status"] == "failed":
+            flash(f'❌ Erreur lors du traitement: {task["error"]}', 'error')
+            return redirect(url_for('apply_for_job', job_id=task["payload"]["job_id"]))
+        for category, message in task["result"]["messages"]:
+            flash(message, category)
+        return redirect(url_for('jobs'))
+
+    if task["status"] == "failed":
+        flash(f'Error processing CV: {task["error"]}', 'error')
+        return redirect(url_for('jobs'))
+
+    cv_data = task["result"]["cv_data"]
+    matched_jobs = task["result"]["matched_jobs"]
+    # Store CV data in session
+    session['cv_data'] = cv_data
+    session['cv_text'] = task["result"]["cv_text"]
+
+    flash(f'CV processed successfully! Found {len(cv_data.get("skills", []))} skills.', 'success')
+    if cv_data.get("truncated_by"):
+        flash(f'Your CV was only partially read (limit reached: {cv_data["truncated_by"]}). Some skills may be missing.', 'warning')
+
+    # Extract unique locations and types for filters
+    locations, job_types = job_index.filter_values()
+
+    return render_template("jobs.html",
+                         jobs=matched_jobs,
+                         locations=locations,
+                         job_types=job_types,
+                         cv_data=cv_data,
+                         matched_jobs=matched_jobs)
+
+cv_queue.register("upload", _run_upload_job)
+cv_queue.register("application", _run_application_job)
+
+# Workers démarrés avec l'application, pas au premier upload : les tâches laissées en file
+# par un redémarrage reprennent tout de suite. Avec le reloader de debug, seul le processus
+# enfant (celui qui sert les requêtes) les démarre.
+if __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    cv_queue.start()
 
 @app.route("/debug/evaluation")
 def debug_evaluation():
@@ -1454,5 +1607,33 @@ def debug_evaluation():
             "error": str(e)
         })
 
+@app.route("/debug/match-cache")
+def debug_match_cache():
+    """Hit/miss counters of the match result cache"""
+    return jsonify(match_cache.stats())
+
+@app.route("/debug/cv-cache")
+def debug_cv_cache():
+    """Hit/miss counters of the persistent CV preprocessing cache"""
+    return jsonify(cv_cache.stats())
+
+@app.route("/debug/ocr-cache")
+def debug_ocr_cache():
+    """Hit/miss counters of the OCR page cache"""
+    return jsonify(ocr_engine.stats())
+
+@app.route("/debug/cv-queue")
+def debug_cv_queue():
+    """Task counts per status of the CV processing queue"""
+    return jsonify(cv_queue.stats())
+
+@app.route("/debug/pipeline-metrics")
+def debug_pipeline_metrics():
+    """Rolling per-stage latency percentiles, cache hits and LLM tokens of the CV pipeline"""
+    stage = request.args.get("stage")
+    if stage:
+        return jsonify(pipeline_metrics.recent(stage, n=request.args.get("n", 20, type=int)))
+    return jsonify(pipeline_metrics.stats())
+
 if __name__ == "__main__":
     app.run(port=5000,host="0.0.0.0" ,debug=True)
@@ -87,12 +87,7 @@ if __name__ == "__main__":
     print(f"Assigning jobs to recruiter: {recruiters[0]['username']} (ID: {default_recruiter_id})")
 
     # Clear existing jobs to avoid duplicates
-    conn = db.get_db_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM jobs")
-    conn.commit()
-    cur.close()
-    conn.close()
+    db.delete_all_jobs()
     print("Cleared existing jobs")
 
     # Import jobs
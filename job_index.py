@@ -0,0 +1,293 @@
+"""
+Index inversé des compétences pour le matching CV → jobs
+========================================================
+
+Garde en mémoire un index compétence (identifiant canonique du
+skill_vocabulary) → ids de jobs. Au lieu de scorer
+toutes les offres à chaque upload de CV, on ne parcourt que les listes
+de jobs (postings) des compétences présentes dans le CV.
+
+L'index est chargé depuis la base au premier usage puis maintenu à jour
+par db.add_job / db.delete_job, avec la fréquence documentaire de chaque
+compétence (mode de scoring "idf" : les compétences rares pèsent plus).
+Le mode "semantic" élargit les compétences du CV aux compétences du
+catalogue proches en embedding (voir skill_embeddings).
+"""
+
+import heapq
+import logging
+import math
+import threading
+from collections import Counter, defaultdict
+
+from matching import iter_flat_jobs
+from skill_vocabulary import skill_vocabulary, skill_ids_of
+
+logger = logging.getLogger(__name__)
+
+
+class JobSkillIndex:
+    """Index inversé compétence → jobs"""
+
+    def __init__(self, loader=None, version_loader=None):
+        # loader : fonction sans argument qui renvoie la liste des jobs
+        # version_loader : fonction qui renvoie la version courante du catalogue
+        self._loader = loader
+        self._version_loader = version_loader
+        self._lock = threading.RLock()
+        self._loaded = False
+        self.catalog_version = None
+        self.taxonomy_generation = None
+        self._reset()
+
+    def _reset(self):
+        self.jobs = {}                    # job_id → dict du job
+        self.job_skills = {}              # job_id → set des skill_ids
+        self.postings = defaultdict(set)  # skill_id → set des job_id
+        self.doc_freq = Counter()         # skill_id → nombre de jobs qui la demandent
+        self.skill_names = {}             # skill_id → nom canonique (pour les embeddings)
+        self.order = {}                   # job_id → rang (ordre de chargement)
+        self.locations = Counter()
+        self.job_types = Counter()
+        self._next_rank = 0
+        self._semantic_rows = None        # (ids, lignes de la matrice d'embeddings) du catalogue
+
+    @classmethod
+    def from_jobs(cls, jobs_data):
+        """Construit un index à partir d'une liste de jobs (format plat ou imbriqué)"""
+        index = cls()
+        index._load(jobs_data)
+        return index
+
+    # ---------- Chargement ----------
+    def _load(self, jobs_data):
+        with self._lock:
+            self._reset()
+            self.taxonomy_generation = skill_vocabulary.generation
+            for job in iter_flat_jobs(jobs_data):
+                self._add(job)
+            self._loaded = True
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def ensure_loaded(self):
+        """Charge l'index depuis la source au premier appel"""
+        if self._loaded or self._loader is None:
+            return
+        with self._lock:
+            if not self._loaded:
+                # Lire la version avant les jobs : un changement concurrent forcera un rechargement
+                version = self._version_loader() if self._version_loader else None
+                self._load(self._loader())
+                self.catalog_version = version
+
+    def invalidate(self):
+        """Force un rechargement complet au prochain usage"""
+        with self._lock:
+            self._reset()
+            self._loaded = False
+            self.catalog_version = None
+
+    def sync(self, version):
+        """
+        Recharge l'index si le catalogue a changé (ex: job ajouté par un autre
+        processus) ou si la taxonomie des compétences a été rechargée.
+        """
+        with self._lock:
+            if self._loaded and (version != self.catalog_version
+                                 or skill_vocabulary.generation != self.taxonomy_generation):
+                self.invalidate()
+
+    def _advance_version(self, version):
+        # Une mise à jour incrémentale n'est sûre que si aucune autre n'a été manquée
+        if version is None:
+            return
+        if self.catalog_version is not None and version == self.catalog_version + 1:
+            self.catalog_version = version
+        else:
+            self.invalidate()
+
+    # ---------- Mise à jour incrémentale ----------
+    def _add(self, job):
+        job_id = job.get("id")
+        if job_id is None:
+            job_id = self._next_rank
+        if job_id in self.jobs:
+            self._remove(job_id)
+
+        skills = set(skill_ids_of(job))
+        self.jobs[job_id] = job
+        self.job_skills[job_id] = skills
+        self.order[job_id] = self._next_rank
+        self._next_rank += 1
+        for skill in skills:
+            self.postings[skill].add(job_id)
+            self.doc_freq[skill] += 1
+        for name in job.get("skills") or []:
+            skill_id = skill_vocabulary.id_of(name)
+            if skill_id is not None and skill_id not in self.skill_names:
+                self.skill_names[skill_id] = skill_vocabulary.canonical(name)
+                self._semantic_rows = None
+        if job.get("location"):
+            self.locations[job["location"]] += 1
+        if job.get("type"):
+            self.job_types[job["type"]] += 1
+
+    def _remove(self, job_id):
+        job = self.jobs.pop(job_id, None)
+        if job is None:
+            return
+        for skill in self.job_skills.pop(job_id, ()):
+            postings = self.postings.get(skill)
+            if postings is not None:
+                postings.discard(job_id)
+                if not postings:
+                    del self.postings[skill]
+            self.doc_freq[skill] -= 1
+            if self.doc_freq[skill] <= 0:
+                del self.doc_freq[skill]
+                # Plus aucun job ne la demande : elle ne doit plus ressortir du matching sémantique
+                if self.skill_names.pop(skill, None) is not None:
+                    self._semantic_rows = None
+        self.order.pop(job_id, None)
+        for counter, key in ((self.locations, job.get("location")), (self.job_types, job.get("type"))):
+            if key:
+                counter[key] -= 1
+                if counter[key] <= 0:
+                    del counter[key]
+
+    def add_job(self, job, version=None):
+        """Ajoute (ou remplace) un job dans l'index s'il est déjà chargé"""
+        with self._lock:
+            if self._loaded and job:
+                self._add(job)
+                self._advance_version(version)
+
+    def remove_job(self, job_id, version=None):
+        """Retire un job de l'index"""
+        with self._lock:
+            if self._loaded:
+                self._remove(job_id)
+                self._advance_version(version)
+
+    # ---------- Requêtes ----------
+    def __len__(self):
+        self.ensure_loaded()
+        return len(self.jobs)
+
+    def filter_values(self):
+        """Listes des localisations et types de contrat pour les filtres"""
+        self.ensure_loaded()
+        with self._lock:
+            locations = ["All"] + sorted(self.locations)
+            job_types = ["All"] + sorted(self.job_types)
+        return locations, job_types
+
+    def idf(self, skill_id):
+        """Inverse document frequency lissée d'une compétence sur le catalogue"""
+        return math.log((1 + len(self.jobs)) / (1 + self.doc_freq.get(skill_id, 0))) + 1
+
+    def match(self, cv_data, k=3, mode="count"):
+        """
+        Renvoie les k meilleurs jobs pour le CV (tous si k=None), en ne
+        visitant que les postings des compétences du CV.
+        mode="count" : part des compétences du job présentes dans le CV.
+        mode="idf"   : même ratio pondéré par l'IDF de chaque compétence.
+        mode="semantic" : comme "count", mais une compétence du job proche
+                          d'une compétence du CV (cosinus) compte comme acquise.
+        Même format que process_job_matching.
+        """
+        self.ensure_loaded()
+        cv_skills = set(skill_ids_of(cv_data or {}))
+        if mode == "semantic":
+            cv_skills |= self._semantic_skill_ids((cv_data or {}).get("skills") or [])
+
+        with self._lock:
+            # Compter les compétences communes job par job
+            counts = Counter()
+            for skill in cv_skills:
+                postings = self.postings.get(skill)
+                if postings:
+                    counts.update(postings)
+
+            if mode == "idf":
+                idf = {skill: self.idf(skill) for skill in cv_skills}
+
+                def score_of(job_id, count):
+                    job_skills = self.job_skills[job_id]
+                    matched = sum(idf[s] for s in job_skills if s in cv_skills)
+                    return round(matched / sum(self.idf(s) for s in job_skills) * 100, 2)
+            else:
+                def score_of(job_id, count):
+                    return round(count / len(self.job_skills[job_id]) * 100, 2)
+
+            scored = ((score_of(job_id, count), -self.order[job_id], job_id) for job_id, count in counts.items())
+
+            # Tas borné à k éléments au lieu d'un tri complet ; égalités : ordre de chargement (posted DESC)
+            if k is None:
+                top = sorted(scored, reverse=True)
+            else:
+                top = heapq.nlargest(k, scored)
+
+            # Seuls les k jobs retenus sont copiés
+            matches = []
+            for score, _, job_id in top:
+                job_copy = self.jobs[job_id].copy()
+                job_copy["match_score"] = score
+                job_copy["matched_skills"] = self._matched_skills(job_copy, cv_skills)
+                matches.append(job_copy)
+
+        return matches
+
+    def _semantic_skill_ids(self, cv_skill_names):
+        """Compétences du catalogue sémantiquement proches des compétences du CV"""
+        from skill_embeddings import skill_embeddings
+
+        if not cv_skill_names:
+            return set()
+        if not skill_embeddings.available():
+            logger.warning("⚠️  sentence-transformers non installé - matching exact utilisé")
+            return set()
+
+        try:
+            with self._lock:
+                cached = self._semantic_rows
+                if cached is None:
+                    ids = list(self.skill_names)
+                    names = list(self.skill_names.values())
+            if cached is None:
+                # Les compétences du catalogue ne sont encodées qu'une fois (cache disque)
+                cached = (ids, skill_embeddings.row_ids(names))
+                with self._lock:
+                    self._semantic_rows = cached
+
+            ids, rows = cached
+            mask = skill_embeddings.similar(cv_skill_names, rows)
+        except Exception as e:
+            # Modèle non chargeable (hors ligne...) : le matching continue en mode exact
+            logger.warning(f"⚠️  Matching sémantique indisponible - matching exact utilisé: {e}")
+            return set()
+        return {ids[i] for i in mask.nonzero()[0]}
+
+    @staticmethod
+    def _matched_skills(job, cv_skills):
+        """Compétences du job (telles qu'affichées) dont l'identifiant est dans le CV"""
+        return list(dict.fromkeys(
+            str(s).lower() for s in job.get("skills") or [] if skill_vocabulary.id_of(s) in cv_skills
+        ))
+
+
+def _load_jobs_from_db():
+    import db
+    return db.get_all_jobs()
+
+
+def _load_catalog_version():
+    import db
+    return db.get_catalog_version()
+
+
+# Instance globale de l'index (chargée depuis la base au premier usage)
+job_index = JobSkillIndex(loader=_load_jobs_from_db, version_loader=_load_catalog_version)
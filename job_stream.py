@@ -0,0 +1,133 @@
+"""
+Matching en streaming sur de très gros catalogues de jobs
+=========================================================
+
+Lit un fichier de jobs au format imbriqué (liste JSON company → jobs,
+comme jobs.json) ou JSONL (une entreprise ou un job par ligne) élément par
+élément, sans json.load du fichier entier, et ne garde en mémoire qu'un
+tas des k meilleurs jobs. La mémoire reste constante quelle que soit la
+taille du flux (plusieurs Go).
+
+Le résultat a le même format que matching.match_jobs.
+"""
+
+import heapq
+import json
+import re
+
+from matching import iter_flat_jobs, score_with_ids
+from skill_vocabulary import skill_ids_of
+
+_WHITESPACE = re.compile(r"[\s,]*")
+
+# Taille maximale (caractères) d'un élément du tableau : au-delà, élément mal formé ou flux invalide
+MAX_ELEMENT_SIZE = 64 << 20
+
+
+def iter_json_array(f, chunk_size=1 << 16, max_element_size=MAX_ELEMENT_SIZE):
+    """
+    Renvoie un à un les éléments d'un tableau JSON lu par morceaux depuis un
+    fichier texte. Un élément incomplet n'est re-décodé qu'après une lecture
+    au moins aussi grande que sa partie déjà lue : coût linéaire même pour un
+    élément de plusieurs Mo. Un élément qui dépasse max_element_size sans se
+    décoder lève ValueError, sans lire le reste du fichier.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill(size=chunk_size):
+        nonlocal buffer, pos, eof
+        chunk = f.read(size)
+        if not chunk:
+            eof = True
+        # Jeter la partie déjà décodée pour que le buffer reste petit
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def grow():
+        # Élément incomplet : doubler au moins la partie en attente avant le prochain essai
+        pending = len(buffer) - pos
+        if max_element_size and pending >= max_element_size:
+            raise ValueError(f"Élément JSON mal formé ou de plus de {max_element_size} caractères")
+        fill(max(chunk_size, pending))
+
+    # Ouverture du tableau
+    while True:
+        stripped = buffer.lstrip()
+        if stripped:
+            if stripped[0] != "[":
+                raise ValueError("Le fichier de jobs doit contenir un tableau JSON")
+            pos = len(buffer) - len(stripped) + 1
+            break
+        if eof:
+            return
+        fill()
+
+    while True:
+        pos = _WHITESPACE.match(buffer, pos).end()
+        if pos >= len(buffer):
+            if eof:
+                raise ValueError("Tableau JSON incomplet")
+            fill()
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Élément coupé en fin de buffer : lire la suite
+            if eof:
+                raise
+            grow()
+            continue
+        # Un nombre en fin de buffer peut être incomplet : s'assurer qu'un séparateur suit
+        if end == len(buffer) and not eof:
+            grow()
+            continue
+        pos = end
+        yield item
+
+
+def iter_job_feed(path):
+    """Éléments (entreprises ou jobs) d'un fichier .json (tableau) ou .jsonl"""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from iter_json_array(f)
+
+
+def stream_match_jobs(cv_data, path, k=10):
+    """
+    Les k meilleurs jobs du fichier pour ce CV (même format que match_jobs),
+    en une seule passe et avec un tas borné à k éléments.
+    """
+    cv_ids = set(skill_ids_of(cv_data or {}))
+
+    heap = []  # (score, -rang, job) : le plus petit score est en tête
+    position = 0
+    for item in iter_job_feed(path):
+        for job in iter_flat_jobs([item]):
+            score, matched_skills = score_with_ids(cv_ids, job.get("skills", []), job.get("skill_ids"))
+            position += 1
+            if score <= 0:
+                continue
+            entry = (score, -position)
+            if len(heap) < k:
+                heapq.heappush(heap, (entry, job, matched_skills))
+            elif entry > heap[0][0]:
+                heapq.heapreplace(heap, (entry, job, matched_skills))
+
+    matches = []
+    for (score, _), job, matched_skills in sorted(heap, key=lambda item: item[0], reverse=True):
+        job = dict(job)
+        job["company_name"] = job.get("company_name", job.get("company", "Sans nom"))
+        job["match_score"] = score
+        job["matched_skills"] = matched_skills
+        matches.append(job)
+    return matches
@@ -0,0 +1,95 @@
+"""
+Cache des résultats de matching CV → jobs
+=========================================
+
+Un même CV ré-uploadé (ou une page Streamlit relancée) contre un catalogue
+inchangé renvoie directement le résultat précédent, sans toucher aux jobs.
+
+Clé : (hash des skill_ids normalisés du CV, k, mode, version du catalogue,
+version de la taxonomie des compétences).
+La version du catalogue (db.get_catalog_version) change à chaque
+add_job / delete_job / import : les anciennes entrées ne sont plus jamais
+relues et finissent évincées (LRU).
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from skill_vocabulary import skill_vocabulary, skill_ids_of
+from pipeline_metrics import pipeline_metrics
+
+
+class MatchCache:
+    """Cache LRU en mémoire avec compteurs hit/miss"""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(cv_data, k, mode, catalog_version):
+        skill_ids = sorted(skill_ids_of(cv_data or {}))
+        digest = hashlib.sha1(json.dumps(skill_ids).encode("utf-8")).hexdigest()
+        return (digest, k, mode, catalog_version, skill_vocabulary.generation)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Copies : l'appelant peut modifier les jobs sans abîmer le cache
+        return [dict(job) for job in value]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = [dict(job) for job in value]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+# Instance globale
+match_cache = MatchCache(max_entries=int(os.environ.get("MATCH_CACHE_SIZE", "1024")))
+
+
+def cached_job_matches(cv_data, k=3, mode="count"):
+    """Top-k des jobs en base pour ce CV, servi depuis le cache si le catalogue n'a pas changé"""
+    import db
+    from job_index import job_index
+
+    version = db.get_catalog_version()
+    key = match_cache.key(cv_data, k, mode, version)
+    matches = match_cache.get(key)
+    if matches is not None:
+        pipeline_metrics.annotate(cache="hit")
+        return matches
+    pipeline_metrics.annotate(cache="miss")
+
+    job_index.sync(version)
+    matches = job_index.match(cv_data, k=k, mode=mode)
+    match_cache.put(key, matches)
+    return matches
@@ -1,26 +1,75 @@
+import heapq
 import json
+from skill_vocabulary import skill_vocabulary, skill_ids_of
 
-def compute_score(cv_data, job_skills):
+def compute_score(cv_data, job_skills, job_skill_ids=None):
     """
     Calcule un score de matching entre les skills du CV et les skills du job.
+    Les compétences sont comparées par identifiant canonique (skill_vocabulary) :
+    "postgres" et "postgresql" comptent comme la même compétence.
     """
-    cv_skills = set([s.lower() for s in cv_data.get("skills", [])])
-    job_skills = set([s.lower() for s in job_skills])
+    return score_with_ids(set(skill_ids_of(cv_data)), job_skills, job_skill_ids)
 
-    if not job_skills:
+
+def score_with_ids(cv_ids, job_skills, job_skill_ids=None):
+    """
+    compute_score avec les identifiants du CV déjà calculés (set) : à utiliser
+    dans les boucles sur les jobs, pour n'encoder le CV qu'une fois.
+    """
+    id_of = skill_vocabulary.id_of
+    skill_ids = None
+    if job_skill_ids is None:
+        # Un seul passage par compétence du job : identifiants gardés pour matched_skills
+        skill_ids = [id_of(s) for s in job_skills or []]
+        job_skill_ids = {skill_id for skill_id in skill_ids if skill_id is not None}
+
+    if not job_skill_ids:
         return 0.0, []
 
-    matched = cv_skills.intersection(job_skills)
-    score = len(matched) / len(job_skills)
+    matched_ids = cv_ids.intersection(job_skill_ids)
+    # Cas le plus fréquent : aucune compétence commune, rien d'autre à calculer
+    if not matched_ids:
+        return 0.0, []
+    if skill_ids is None:
+        skill_ids = [id_of(s) for s in job_skills]
+    score = len(matched_ids) / len(job_skill_ids)
+    matched = list(dict.fromkeys(s.lower() for s, skill_id in zip(job_skills, skill_ids) if skill_id in matched_ids))
 
-    return round(score * 100, 2), list(matched)
+    return round(score * 100, 2), matched
+
+
+def iter_flat_jobs(jobs_data):
+    """
+    Parcourt une liste de jobs au format imbriqué (company → jobs) ou plat
+    et renvoie chaque job avec son company_name.
+    """
+    for item in jobs_data or []:
+        if "jobs" in item and "skills" not in item:
+            company_name = item.get("company", "Sans nom")
+            for job in item.get("jobs", []):
+                job = job.copy()
+                job["company_name"] = company_name
+                job["url"] = job.get("url", item.get("url"))
+                yield job
+        else:
+            yield item
 
 
 def match_jobs(cv_data, jobs_data):
     """
     Parcourt toutes les entreprises et leurs jobs (format imbriqué ou plat),
     calcule le score de matching et renvoie la liste des jobs correspondants.
+    jobs_data peut aussi être un JobSkillIndex ou un MatrixMatcher déjà
+    construit : le scoring passe alors par l'index ou par la matrice.
     """
+    from job_index import JobSkillIndex
+    from matching_engine import MatrixMatcher
+
+    if isinstance(jobs_data, (JobSkillIndex, MatrixMatcher)):
+        return jobs_data.match(cv_data, k=None)
+
+    # Compétences du CV encodées une seule fois, pas à chaque job
+    cv_ids = set(skill_ids_of(cv_data or {}))
     matches = []
 
     for item in jobs_data:
@@ -28,7 +77,7 @@ def match_jobs(cv_data, jobs_data):
         if "jobs" in item:
             company_name = item.get("company", "Sans nom")
             for job in item.get("jobs", []):
-                score, matched_skills = compute_score(cv_data, job.get("skills", []))
+                score, matched_skills = score_with_ids(cv_ids, job.get("skills", []), job.get("skill_ids"))
                 if score > 0:
                     job_copy = job.copy()
                     job_copy["company_name"] = company_name
@@ -38,7 +87,7 @@ def match_jobs(cv_data, jobs_data):
 
         # Cas 2 : format plat (déjà un job dict)
         else:
-            score, matched_skills = compute_score(cv_data, item.get("skills", []))
+            score, matched_skills = score_with_ids(cv_ids, item.get("skills", []), item.get("skill_ids"))
             if score > 0:
                 job_copy = item.copy()
                 job_copy["company_name"] = item.get("company_name", item.get("company", "Sans nom"))
@@ -50,3 +99,54 @@ def match_jobs(cv_data, jobs_data):
     matches.sort(key=lambda j: j["match_score"], reverse=True)
 
     return matches
+
+
+def top_job_matches(cv_data, jobs_data=None, k=3, mode="count"):
+    """
+    k meilleurs jobs pour un CV (cœur de flask_app.process_job_matching,
+    sans dépendance au serveur : mesurable par bench_matching).
+    Sans jobs_data : index inversé des jobs en base, derrière le cache versionné.
+    """
+    if jobs_data is None:
+        from match_cache import cached_job_matches
+        return cached_job_matches(cv_data, k=k, mode=mode)
+
+    # IDF et sémantique ont besoin de toute la liste : passer par un index temporaire
+    if mode in ("idf", "semantic"):
+        from job_index import JobSkillIndex
+        return JobSkillIndex.from_jobs(jobs_data).match(cv_data, k=k, mode=mode)
+
+    # 🔧 Étape 1 : normaliser les jobs
+    flat_jobs = []
+    for job in jobs_data:
+        if isinstance(job, dict) and "skills" in job:
+            flat_jobs.append(job)
+        elif isinstance(job, dict) and "jobs" in job:
+            for subjob in job["jobs"]:
+                subjob = subjob.copy()
+                subjob["company_name"] = job["company"]
+                subjob["url"] = subjob.get("url", job.get("url"))
+                flat_jobs.append(subjob)
+
+    # ✅ Normalisation des skills : identifiants canoniques calculés une seule fois (cv_data non modifié)
+    cv_ids = set(skill_ids_of(cv_data or {}))
+
+    # 🔧 Étape 2 : calculer les scores pour tous les jobs
+    scored = []
+    for position, job in enumerate(flat_jobs):
+        score, matched_skills = score_with_ids(cv_ids, job.get("skills", []), job.get("skill_ids"))
+        if score > 0:  # Seulement les jobs avec au moins un match
+            scored.append((score, -position, matched_skills))
+
+    # 🔧 Étape 3 : garder les k meilleurs avec un tas borné, ne copier que ceux-là
+    if k is None:
+        top = sorted(scored, key=lambda item: (item[0], item[1]), reverse=True)
+    else:
+        top = heapq.nlargest(k, scored, key=lambda item: (item[0], item[1]))
+    matches = []
+    for score, neg_position, matched_skills in top:
+        job_copy = flat_jobs[-neg_position].copy()
+        job_copy["match_score"] = score
+        job_copy["matched_skills"] = matched_skills
+        matches.append(job_copy)
+    return matches
@@ -0,0 +1,142 @@
+"""
+Moteur de matching vectorisé (jobs × compétences)
+=================================================
+
+Représente tout le catalogue de jobs comme une matrice creuse (format CSR)
+sur les identifiants canoniques de compétences (skill_vocabulary). Un CV,
+ou un lot de milliers de CV, est scoré contre tous les jobs en opérations
+NumPy au lieu d'appeler compute_score job par job.
+
+Le produit CV × jobsᵀ passe par la transposée de la matrice (compétence →
+jobs, format CSC) : pour chaque CV, seules les listes de jobs de ses
+compétences sont lues, sans matrice intermédiaire CV × compétences des jobs.
+
+Les résultats ont le même format que matching.match_jobs
+(company_name, match_score, matched_skills).
+"""
+
+import numpy as np
+
+from matching import iter_flat_jobs
+from skill_vocabulary import skill_vocabulary, skill_ids_of
+
+
+class MatrixMatcher:
+    """Catalogue de jobs stocké en matrice creuse jobs × compétences"""
+
+    def __init__(self, jobs_data):
+        self.jobs = []
+        self.vocabulary = {}   # skill_id → colonne
+        self.skills = []       # colonne → skill_id
+
+        indptr = [0]
+        indices = []
+        for job in iter_flat_jobs(jobs_data):
+            indices.extend(self._column(skill_id) for skill_id in skill_ids_of(job))
+            indptr.append(len(indices))
+            self.jobs.append(job)
+
+        # Matrice CSR : les colonnes du job i sont indices[indptr[i]:indptr[i + 1]]
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.job_sizes = np.diff(self.indptr)
+
+        # Transposée (CSC) : les jobs de la colonne c sont job_rows[col_ptr[c]:col_ptr[c + 1]]
+        order = np.argsort(self.indices, kind="stable")
+        self.job_rows = np.repeat(np.arange(len(self.jobs), dtype=np.int32), self.job_sizes)[order]
+        self.col_ptr = np.zeros(len(self.skills) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=len(self.skills)), out=self.col_ptr[1:])
+
+    def _column(self, skill_id):
+        column = self.vocabulary.get(skill_id)
+        if column is None:
+            column = len(self.skills)
+            self.vocabulary[skill_id] = column
+            self.skills.append(skill_id)
+        return column
+
+    def __len__(self):
+        return len(self.jobs)
+
+    # ---------- Vectorisation des CV ----------
+    def cv_matrix(self, cv_list):
+        """Matrice booléenne CV × compétences (compétences hors vocabulaire ignorées)"""
+        matrix = np.zeros((len(cv_list), len(self.skills)), dtype=np.uint8)
+        for row, cv_data in enumerate(cv_list):
+            for skill_id in skill_ids_of(cv_data or {}):
+                column = self.vocabulary.get(skill_id)
+                if column is not None:
+                    matrix[row, column] = 1
+        return matrix
+
+    # ---------- Scoring ----------
+    def _counts(self, cv_matrix):
+        """Nombre de compétences communes pour chaque couple (CV, job) : cv_matrix @ jobsᵀ"""
+        counts = np.zeros((cv_matrix.shape[0], len(self.jobs)), dtype=np.int32)
+        for row in range(cv_matrix.shape[0]):
+            columns = np.flatnonzero(cv_matrix[row])
+            if len(columns):
+                # Jobs de chaque compétence du CV, comptés : coût proportionnel à ces seules listes
+                jobs = np.concatenate([self.job_rows[self.col_ptr[c]:self.col_ptr[c + 1]] for c in columns])
+                counts[row] = np.bincount(jobs, minlength=len(self.jobs))
+        return counts
+
+    def score_batch(self, cv_list, chunk_size=512):
+        """
+        Scores (en %) de chaque CV contre chaque job : tableau n_cv × n_jobs.
+        Les CV sont traités par paquets pour borner la mémoire.
+        """
+        scores = np.zeros((len(cv_list), len(self.jobs)), dtype=np.float64)
+        sizes = np.maximum(self.job_sizes, 1)
+        for start in range(0, len(cv_list), chunk_size):
+            chunk = self.cv_matrix(cv_list[start:start + chunk_size])
+            scores[start:start + chunk_size] = self._counts(chunk) / sizes * 100
+        return scores
+
+    def score(self, cv_data):
+        """Scores (en %) d'un CV contre tous les jobs"""
+        return self.score_batch([cv_data])[0]
+
+    # ---------- Résultats au format match_jobs ----------
+    def _results(self, cv_row, scores, k):
+        candidates = np.flatnonzero(scores > 0)
+        if k is not None and k < len(candidates):
+            # Sélection partielle des k meilleurs (argpartition), ex aequo départagés par position
+            values = scores[candidates]
+            kth = values[np.argpartition(-values, k - 1)[k - 1]]
+            above = candidates[values > kth]
+            ties = candidates[values == kth][:k - len(above)]
+            candidates = np.sort(np.concatenate([above, ties]))
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        matches = []
+        for job_pos in order:
+            job = self.jobs[job_pos]
+            columns = self.indices[self.indptr[job_pos]:self.indptr[job_pos + 1]]
+            matched = columns[cv_row[columns] > 0]
+
+            job_copy = job.copy()
+            job_copy["company_name"] = job.get("company_name", job.get("company", "Sans nom"))
+            # Même arrondi que compute_score
+            job_copy["match_score"] = round(int(len(matched)) / int(self.job_sizes[job_pos]) * 100, 2)
+            matched_ids = {self.skills[c] for c in matched}
+            job_copy["matched_skills"] = list(dict.fromkeys(
+                str(s).lower() for s in job.get("skills") or [] if skill_vocabulary.id_of(s) in matched_ids
+            ))
+            matches.append(job_copy)
+        return matches
+
+    def match(self, cv_data, k=None):
+        """Jobs correspondant au CV, triés par score décroissant (les k premiers si k est donné)"""
+        return self.match_batch([cv_data], k=k)[0]
+
+    def match_batch(self, cv_list, k=None, chunk_size=512):
+        """Résultats de match pour chaque CV d'un lot, dans le même ordre que cv_list"""
+        results = []
+        sizes = np.maximum(self.job_sizes, 1)
+        for start in range(0, len(cv_list), chunk_size):
+            chunk = self.cv_matrix(cv_list[start:start + chunk_size])
+            scores = self._counts(chunk) / sizes * 100
+            for row in range(chunk.shape[0]):
+                results.append(self._results(chunk[row], scores[row], k))
+        return results
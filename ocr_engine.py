@@ -0,0 +1,228 @@
+"""
+OCR des pages scannées (Tesseract) en parallèle, avec cache
+===========================================================
+
+Les pages sans couche texte sont reconnues par Tesseract dans un pool de
+processus (OCR_WORKERS) au lieu d'être traitées une à une dans le worker
+Flask. Le texte de chaque page est mis en cache dans une base SQLite locale,
+indexé par le hash des pixels de l'image : un CV scanné ré-uploadé (ou
+ré-exporté avec les mêmes pages) n'est jamais reconnu deux fois.
+
+Le binaire Tesseract est configurable (TESSERACT_CMD) ; à défaut il est
+cherché dans le PATH, puis à l'emplacement d'installation Windows.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import pytesseract
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+WINDOWS_TESSERACT_CMD = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+
+
+def _default_tesseract_cmd():
+    configured = os.environ.get("TESSERACT_CMD")
+    if configured:
+        return configured
+    found = shutil.which("tesseract")
+    if found:
+        return found
+    if os.path.exists(WINDOWS_TESSERACT_CMD):
+        return WINDOWS_TESSERACT_CMD
+    return "tesseract"
+
+
+TESSERACT_CMD = _default_tesseract_cmd()
+OCR_LANG = os.environ.get("OCR_LANG", "eng")
+OCR_WORKERS = int(os.environ.get("OCR_WORKERS", str(min(4, os.cpu_count() or 1))))
+OCR_CACHE_PATH = os.environ.get("OCR_CACHE_PATH", "ocr_cache.db")
+OCR_CACHE_MAX_ENTRIES = int(os.environ.get("OCR_CACHE_MAX_ENTRIES", "20000"))
+
+pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+
+
+def image_key(image, lang=OCR_LANG, data=None):
+    """Hash des pixels (mode, taille, octets bruts) et de la langue ; data : image.tobytes() déjà calculé"""
+    digest = hashlib.sha256()
+    digest.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:{lang}:".encode("ascii"))
+    digest.update(image.tobytes() if data is None else data)
+    return digest.hexdigest()
+
+
+def _recognize(payload):
+    """Exécuté dans un processus du pool : image brute → texte"""
+    cmd, lang, mode, size, data = payload
+    pytesseract.pytesseract.tesseract_cmd = cmd
+    return pytesseract.image_to_string(Image.frombytes(mode, size, data), lang=lang)
+
+
+class OCREngine:
+    """Pool de processus Tesseract + cache SQLite hash de page → texte"""
+
+    def __init__(self, tesseract_cmd=TESSERACT_CMD, lang=OCR_LANG, workers=OCR_WORKERS,
+                 cache_path=OCR_CACHE_PATH, max_entries=OCR_CACHE_MAX_ENTRIES, recognize=_recognize):
+        self.tesseract_cmd = tesseract_cmd
+        self.lang = lang
+        self.workers = workers
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.recognize = recognize
+        self._pool = None
+        self._lock = threading.Lock()
+        self._ready = False
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- Cache ----------
+    def _connect(self):
+        conn = sqlite3.connect(self.cache_path, timeout=10)
+        if not self._ready:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_cache (
+                    key TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_created ON ocr_cache (created_at)")
+            conn.commit()
+            self._ready = True
+        return conn
+
+    def _cached(self, keys):
+        conn = self._connect()
+        try:
+            found = {}
+            for key in set(keys):
+                row = conn.execute("SELECT text FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+                if row:
+                    found[key] = row[0]
+            return found
+        finally:
+            conn.close()
+
+    def _store(self, results):
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO ocr_cache (key, text, created_at) VALUES (?, ?, ?)",
+                [(key, text, now) for key, text in results.items()],
+            )
+            conn.execute(
+                "DELETE FROM ocr_cache WHERE key IN ("
+                "SELECT key FROM ocr_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    # ---------- Reconnaissance ----------
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def _run_local(self, payloads, deadline):
+        # L'échéance est vérifiée avant chaque page : une page commencée va à son terme
+        return [None if deadline is not None and time.monotonic() >= deadline else self.recognize(payload)
+                for payload in payloads]
+
+    def _run(self, payloads, deadline=None):
+        """Texte de chaque payload, None pour ceux qui n'ont pas abouti avant l'échéance (time.monotonic)"""
+        # Une seule page ou pas de pool : dans le processus courant, sans coût de démarrage
+        if len(payloads) == 1 or self.workers <= 1:
+            return self._run_local(payloads, deadline)
+        try:
+            futures = [self._get_pool().submit(self.recognize, payload) for payload in payloads]
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            done, late = wait(futures, timeout=timeout)
+            for future in late:
+                future.cancel()  # pages pas encore commencées ; les autres finissent dans le pool, ignorées
+            return [future.result() if future in done else None for future in futures]
+        except BrokenProcessPool:
+            logger.warning("⚠️  Pool OCR interrompu, reconnaissance dans le processus courant")
+            with self._lock:
+                self._pool = None
+            return self._run_local(payloads, deadline)
+
+    def ocr(self, images, deadline=None):
+        """
+        Texte de chaque image, dans le même ordre ; seules les pages inconnues du
+        cache sont reconnues. Avec une échéance (time.monotonic), les pages non
+        reconnues à temps valent None et ne sont pas mises en cache.
+        """
+        # Modes que Image.frombytes sait reconstruire dans le pool (une palette "P" serait perdue)
+        images = [image if image.mode in ("1", "L", "RGB") else image.convert("RGB") for image in images]
+        # Octets bruts extraits une seule fois par page : pour la clé et, si besoin, pour le pool
+        raw = [image.tobytes() for image in images]
+        keys = [image_key(image, self.lang, data) for image, data in zip(images, raw)]
+        texts = self._cached(keys)
+
+        pending = {}
+        for key, image, data in zip(keys, images, raw):
+            if key not in texts and key not in pending:
+                pending[key] = (self.tesseract_cmd, self.lang, image.mode, image.size, data)
+        with self._lock:
+            self.hits += len(keys) - len(pending)
+            self.misses += len(pending)
+
+        if pending:
+            results = dict(zip(pending, self._run(list(pending.values()), deadline)))
+            results = {key: text for key, text in results.items() if text is not None}
+            if results:
+                self._store(results)
+            texts.update(results)
+        return [texts.get(key) for key in keys]
+
+    def ocr_image(self, image):
+        return self.ocr([image])[0]
+
+    def clear(self):
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM ocr_cache")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            entries = conn.execute("SELECT COUNT(*) FROM ocr_cache").fetchone()[0]
+        finally:
+            conn.close()
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "tesseract_cmd": self.tesseract_cmd,
+                "workers": self.workers,
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+
+# Instance globale
+ocr_engine = OCREngine()
@@ -22,6 +22,11 @@ from openai import OpenAI
 from dotenv import load_dotenv
 import json
 import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from skill_taxonomy import skill_taxonomy
+from cv_chunking import split_cv_chunks, merge_profiles
+from pipeline_metrics import pipeline_metrics
 
 # Charger les variables d'environnement
 load_dotenv()
@@ -81,6 +86,11 @@ class OpenRouterClient:
 
             response = completion.choices[0].message.content
 
+            # Tokens consommés, comptés dans l'étape instrumentée en cours
+            usage = getattr(completion, "usage", None)
+            if usage is not None:
+                pipeline_metrics.add_tokens(getattr(usage, "prompt_tokens", 0), getattr(usage, "completion_tokens", 0))
+
             # S'assurer que la réponse est en UTF-8
             if isinstance(response, str):
                 response = response.encode('utf-8').decode('utf-8')
@@ -160,6 +170,212 @@ def extract_skills_from_cv(cv_text):
         logger.warning(f"⚠️  AI extraction error: {e}")
         return _basic_skill_extraction(cv_text)
 
+# Champs renvoyés par l'extraction structurée d'un CV (un seul appel LLM)
+CV_PROFILE_SCHEMA = """{
+        "name": "full name of the candidate, or Unknown",
+        "skills": ["skill1", "skill2", ...],
+        "experience_years": number,
+        "education_level": "level",
+        "programming_languages": ["language1", "language2", ...],
+        "frameworks": ["framework1", "framework2", ...],
+        "tools": ["tool1", "tool2", ...]
+    }"""
+
+# Taille maximale d'un CV dans un prompt et d'un lot de CV dans une requête
+CV_PROMPT_CHARS = 2000
+CV_BATCH_CHARS = 6000
+
+# "chunked" : texte complet découpé en morceaux extraits en parallèle puis fusionnés
+# "truncate" : un seul appel sur les CV_PROMPT_CHARS premiers caractères
+CV_EXTRACTION_MODE = os.environ.get("CV_EXTRACTION_MODE", "chunked").lower()
+CV_MAX_CHUNKS = int(os.environ.get("CV_MAX_CHUNKS", "8"))
+
+# Pool dédié aux morceaux (distinct du pool des étapes de preprocessing qui l'appelle)
+_chunk_pool = ThreadPoolExecutor(max_workers=CV_MAX_CHUNKS, thread_name_prefix="cv-chunk")
+
+def _parse_json_response(response):
+    """Décode une réponse JSON du modèle (éventuellement entourée de ```json)"""
+    response = response.strip()
+    if response.startswith('```json'):
+        response = response[7:]
+    elif response.startswith('```'):
+        response = response[3:]
+    if response.endswith('```'):
+        response = response[:-3]
+    return json.loads(response.strip())
+
+def _clean_name(profile):
+    name = str(profile.get("name") or "").strip()
+    profile["name"] = name if name and name.lower() != "unknown" else None
+    return profile
+
+def _fallback_profile(cv_text):
+    """
+    Profil sans LLM : extraction basique, nom à déterminer par l'appelant.
+    Marqué "fallback" : ses valeurs par défaut (expérience, diplôme) ne
+    doivent pas passer pour un résultat du modèle.
+    """
+    profile = _basic_skill_extraction(cv_text)
+    profile["name"] = None
+    profile["fallback"] = True
+    return profile
+
+def _extract_profile_once(cv_text, part=None):
+    """Un appel LLM sur ce texte (déjà borné par l'appelant) ; lève une exception en cas d'échec"""
+    scope = "this CV" if part is None else f"this excerpt (part {part[0]} of {part[1]}) of a CV"
+    prompt = f"""
+    Analyze {scope}. Extract the candidate's full name and main technical skills.
+    Return only a JSON object with this structure:
+    {CV_PROFILE_SCHEMA}
+
+    Instructions:
+    - The name is the person's full name (first and last name), usually at the top
+    - If no clear name is found, use "Unknown"
+
+    CV to analyze:
+    {cv_text}
+    """
+    response = openrouter_client.generate_content(prompt, max_tokens=600)
+    profile = _parse_json_response(response)
+    if not isinstance(profile, dict):
+        raise ValueError("Réponse inattendue du modèle")
+    return _clean_name(profile)
+
+def _extract_chunks(chunks):
+    """
+    Map : un appel par morceau, en parallèle. Reduce : fusion des profils partiels.
+    Les morceaux en échec sont réessayés une fois ; s'il en manque encore, le
+    profil fusionné est marqué "partial" (il ne couvre pas tout le CV).
+    """
+    def extract(numbered):
+        position, chunk = numbered
+        try:
+            return _extract_profile_once(chunk, part=(position + 1, len(chunks)))
+        except Exception as e:
+            logger.warning(f"⚠️  AI extraction error on chunk {position + 1}/{len(chunks)}: {e}")
+            return None
+
+    # Contexte copié : les tokens de chaque morceau restent rattachés à l'étape appelante
+    futures = [_chunk_pool.submit(contextvars.copy_context().run, extract, item) for item in enumerate(chunks)]
+    profiles = [future.result() for future in futures]
+    if not any(profiles):
+        raise ValueError("Aucun morceau du CV n'a pu être analysé")
+
+    # Erreur passagère sur certains morceaux seulement : un nouvel essai avant la fusion
+    failed = [position for position, profile in enumerate(profiles) if profile is None]
+    retries = [_chunk_pool.submit(contextvars.copy_context().run, extract, (position, chunks[position]))
+               for position in failed]
+    for position, future in zip(failed, retries):
+        profiles[position] = future.result()
+
+    profile = merge_profiles(profiles)
+    missing = sum(1 for profile_part in profiles if profile_part is None)
+    if missing:
+        logger.warning(f"⚠️  {missing}/{len(chunks)} morceaux du CV non analysés : profil partiel")
+        profile["partial"] = True
+    return profile
+
+def extract_cv_profile(cv_text, mode=None):
+    """
+    Extrait le nom, les compétences, langages, frameworks, outils, années
+    d'expérience et niveau d'études d'un CV.
+    En mode "chunked" (défaut), un CV qui tient dans un morceau fait un seul
+    appel ; un CV plus long est découpé et ses morceaux extraits en parallèle.
+    "name" vaut None si le modèle n'a pas trouvé de nom (ou en fallback) ;
+    "fallback" vaut True si le modèle n'a pas pu être utilisé, "partial"
+    vaut True si des morceaux du CV n'ont pas pu être analysés.
+    """
+    if not openrouter_client.is_available():
+        return _fallback_profile(cv_text)
+
+    mode = (mode or CV_EXTRACTION_MODE).lower()
+    if mode == "chunked":
+        chunks = split_cv_chunks(cv_text)
+        if len(chunks) > CV_MAX_CHUNKS:
+            logger.warning(f"⚠️  CV en {len(chunks)} morceaux, seuls les {CV_MAX_CHUNKS} premiers sont analysés")
+            chunks = chunks[:CV_MAX_CHUNKS]
+    else:
+        chunks = [cv_text[:CV_PROMPT_CHARS]]
+
+    try:
+        if len(chunks) > 1:
+            profile = _extract_chunks(chunks)
+        else:
+            profile = _extract_profile_once(chunks[0] if chunks else "")
+        logger.info(f"✅ CV profile extracted: {profile['name']}, {len(profile.get('skills', []))} skills")
+        return profile
+
+    except json.JSONDecodeError as e:
+        logger.warning(f"⚠️  JSON parsing error: {e}")
+        return _fallback_profile(cv_text)
+    except Exception as e:
+        logger.warning(f"⚠️  AI extraction error: {e}")
+        return _fallback_profile(cv_text)
+
+def _pack_batches(cv_texts, max_chars=CV_BATCH_CHARS):
+    """
+    Regroupe les indices des CV en lots dont le texte tient dans max_chars.
+    Un CV plus long que CV_PROMPT_CHARS reste seul (extraction unitaire, découpée si besoin).
+    """
+    batches, current, size = [], [], 0
+    for position, cv_text in enumerate(cv_texts):
+        length = len(cv_text or "")
+        if length > CV_PROMPT_CHARS:
+            batches.append([position])
+            continue
+        if current and size + length > max_chars:
+            batches.append(current)
+            current, size = [], 0
+        current.append(position)
+        size += length
+    if current:
+        batches.append(current)
+    return batches
+
+def extract_cv_profiles_batch(cv_texts, max_chars=CV_BATCH_CHARS):
+    """
+    Version par lots d'extract_cv_profile : plusieurs CV courts sont envoyés
+    dans une même requête. Renvoie un profil par CV, dans le même ordre ;
+    un CV absent de la réponse passe par l'extraction unitaire.
+    """
+    cv_texts = list(cv_texts)
+    if not openrouter_client.is_available():
+        return [_fallback_profile(cv_text) for cv_text in cv_texts]
+
+    profiles = [None] * len(cv_texts)
+    for batch in _pack_batches(cv_texts, max_chars):
+        if len(batch) == 1:
+            profiles[batch[0]] = extract_cv_profile(cv_texts[batch[0]])
+            continue
+
+        documents = "\n\n".join(f"### CV {i}\n{cv_texts[i]}" for i in batch)
+        prompt = f"""
+    Analyze each of the following CVs separately. For each CV, extract the candidate's
+    full name and main technical skills.
+    Return only a JSON object with this structure:
+    {{"cvs": [{{"id": cv_number, ...fields}}, ...]}}
+    where the fields of each CV follow this structure:
+    {CV_PROFILE_SCHEMA}
+
+    CVs to analyze:
+    {documents}
+    """
+        try:
+            response = openrouter_client.generate_content(prompt, max_tokens=500 * len(batch))
+            for profile in _parse_json_response(response).get("cvs", []):
+                position = profile.pop("id", None)
+                if isinstance(position, str) and position.isdigit():
+                    position = int(position)
+                if position in batch and profiles[position] is None:
+                    profiles[position] = _clean_name(profile)
+        except Exception as e:
+            logger.warning(f"⚠️  AI batch extraction error: {e}")
+
+    for position, profile in enumerate(profiles):
+        if profile is None:
+            profiles[position] = extract_cv_profile(cv_texts[position])
+    return profiles
+
 def generate_interview_questions(knowledge_chunks, n=3):
     """Génère des questions d'entretien à partir des connaissances"""
     if not openrouter_client.is_available():
@@ -243,31 +459,21 @@ def evaluate_candidate_answer(user_answer, correct_answer, question):
         return _basic_evaluation(user_answer, correct_answer)
 
 def _basic_skill_extraction(cv_text):
-    """Extraction basique des compétences (fallback)"""
-    # Liste de compétences communes à rechercher
-    common_skills = [
-        'python', 'javascript', 'java', 'c++', 'c#', 'php', 'ruby', 'go', 'rust',
-        'react', 'angular', 'vue', 'django', 'flask', 'spring', 'laravel',
-        'sql', 'mysql', 'postgresql', 'mongodb', 'redis',
-        'docker', 'kubernetes', 'aws', 'azure', 'gcp',
-        'git', 'linux', 'windows', 'html', 'css', 'sass', 'bootstrap',
-        'machine learning', 'ai', 'data science', 'pandas', 'numpy', 'tensorflow'
-    ]
-
-    cv_lower = cv_text.lower()
-    found_skills = []
+    """Extraction basique des compétences (fallback), via la taxonomie partagée"""
+    taxonomy = skill_taxonomy.current()
+    # Compétences telles qu'écrites dans le CV ("kubernetes", pas son canonique "docker")
+    found_skills = [skill.lower() for skill in taxonomy.extract_surface(cv_text)]
 
-    for skill in common_skills:
-        if skill in cv_lower:
-            found_skills.append(skill)
+    def of_category(*categories):
+        return [s for s in found_skills if taxonomy.category_of(s) in categories]
 
     return {
         "skills": found_skills[:10],  # Limiter à 10 compétences
         "experience_years": 2,  # Valeur par défaut
         "education_level": "Bachelor",
-        "programming_languages": [s for s in found_skills if s in ['python', 'javascript', 'java', 'c++', 'c#', 'php', 'ruby', 'go', 'rust']],
-        "frameworks": [s for s in found_skills if s in ['react', 'angular', 'vue', 'django', 'flask', 'spring', 'laravel']],
-        "tools": [s for s in found_skills if s in ['docker', 'kubernetes', 'git', 'aws', 'azure', 'gcp']]
+        "programming_languages": of_category("language"),
+        "frameworks": of_category("framework"),
+        "tools": of_category("tool", "cloud")
     }
 
 def _fallback_questions(n=3):
@@ -1,9 +1,13 @@
+import io
 import os
+import time
+import hashlib
 import tempfile
-import pytesseract
 from PIL import Image
 from pathlib import Path
 import pdfplumber
+from pipeline_metrics import pipeline_metrics
+from ocr_engine import ocr_engine
 
 # Fallback PDF reader
 try:
@@ -13,64 +17,238 @@ except ImportError:
     PYPDF2_AVAILABLE = False
 
 
-# Chemin vers Tesseract (si tu fais de l'OCR sur images)
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+# Taille maximale d'un CV uploadé (octets)
+CV_MAX_UPLOAD_BYTES = int(os.environ.get("CV_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+
+# Budget de parsing d'un upload : pages lues, caractères gardés, durée maximale (secondes)
+CV_PARSE_MAX_PAGES = int(os.environ.get("CV_PARSE_MAX_PAGES", "10"))
+CV_PARSE_MAX_CHARS = int(os.environ.get("CV_PARSE_MAX_CHARS", "40000"))
+CV_PARSE_TIMEOUT = float(os.environ.get("CV_PARSE_TIMEOUT", "20"))
+
+# Dossier optionnel où conserver le texte extrait (vide = rien n'est écrit sur disque)
+CV_TEXT_STORE_DIR = os.environ.get("CV_TEXT_STORE_DIR", "")
+
+def store_extracted_text(text, store_dir=CV_TEXT_STORE_DIR):
+    """
+    Enregistre le texte sous <store_dir>/<sha256 du texte>.txt et renvoie le
+    chemin. Chaque contenu a son propre fichier : des uploads simultanés ne
+    s'écrasent pas, et un texte déjà stocké n'est pas réécrit.
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    output_path = os.path.join(store_dir, f"{digest}.txt")
+    if not os.path.exists(output_path):
+        # Écriture dans un fichier temporaire puis renommage atomique
+        fd, tmp_path = tempfile.mkstemp(dir=store_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, output_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    return output_path
+
+def _rewind(source):
+    """Remet un flux au début avant de le relire (sans effet sur un chemin)"""
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
 
 # --- PDF ---
-def extract_text_from_pdf(pdf_path, output_folder="mycv", output_file="resume.txt"):
-    text = ""
+# Extraction par niveaux, page par page :
+# 1. couche texte rapide (PyPDF2) ;
+# 2. analyse de mise en page (pdfplumber) seulement pour les pages dont le texte rapide est inexploitable ;
+# 3. OCR seulement pour les pages sans couche texte, rendues à PDF_OCR_DPI, au plus PDF_OCR_MAX_PAGES pages.
+PDF_MIN_PAGE_CHARS = int(os.environ.get("PDF_MIN_PAGE_CHARS", "20"))
+PDF_OCR_DPI = int(os.environ.get("PDF_OCR_DPI", "200"))
+PDF_OCR_MAX_PAGES = int(os.environ.get("PDF_OCR_MAX_PAGES", "5"))
+
+def _needs_layout(page_text):
+    """Texte rapide absent ou mal reconstitué : la page repasse par pdfplumber"""
+    text = (page_text or "").strip()
+    if len(text) < PDF_MIN_PAGE_CHARS:
+        return True
+    words = text.split()
+    lines = [line for line in text.splitlines() if line.strip()]
+    if len(words) / len(lines) < 1.5:
+        return True  # un mot par ligne : lignes découpées à chaque fragment de texte
+    if sum(len(word) for word in words) / len(words) > 15:
+        return True  # mots collés : espaces perdus
+    garbled = sum(1 for char in text if char == "\ufffd" or not (char.isprintable() or char.isspace()))
+    return garbled / len(text) > 0.05
+
+class ParseBudget:
+    """
+    Limites d'un parsing : nombre de pages, nombre de caractères et échéance
+    (secondes depuis la création). Une limite à None ou 0 est désactivée.
+    truncated_by garde la première limite atteinte ("pages", "chars" ou
+    "deadline"), None si tout le document a été lu.
+    """
+
+    def __init__(self, max_pages=None, max_chars=None, timeout=None):
+        self.max_pages = max_pages or None
+        self.max_chars = max_chars or None
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.truncated_by = None
+
+    @classmethod
+    def default(cls):
+        """Limites des uploads (CV_PARSE_MAX_PAGES, CV_PARSE_MAX_CHARS, CV_PARSE_TIMEOUT)"""
+        return cls(CV_PARSE_MAX_PAGES, CV_PARSE_MAX_CHARS, CV_PARSE_TIMEOUT)
+
+    def _hit(self, reason):
+        if self.truncated_by is None:
+            self.truncated_by = reason
+        return True
+
+    def expired(self):
+        return self.deadline is not None and time.monotonic() >= self.deadline and self._hit("deadline")
+
+    def full(self, chars_read):
+        return bool(self.max_chars) and chars_read >= self.max_chars and self._hit("chars")
+
+    def stop(self, pages_read, chars_read):
+        """À appeler avant de lire une page de plus"""
+        if self.max_pages and pages_read >= self.max_pages:
+            return self._hit("pages")
+        return self.full(chars_read) or self.expired()
+
+    def clip(self, text):
+        if self.max_chars and len(text) > self.max_chars:
+            self._hit("chars")
+            return text[:self.max_chars]
+        return text
+
+def _fast_text_layer(source, budget):
+    """
+    Niveau 1 : texte des pages avec PyPDF2, dans la limite du budget.
+    Renvoie (textes des pages lues, nombre total de pages), (None, None) si le fichier ne s'ouvre pas.
+    """
+    if not PYPDF2_AVAILABLE:
+        return None, None
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-    except Exception as e:
-        # Si le PDF est corrompu ou invalide, essayer avec PyPDF2 comme fallback
-        if PYPDF2_AVAILABLE:
-            try:
-                reader = PdfReader(pdf_path)
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-            except Exception as e2:
-                # Si les deux méthodes échouent, lever une erreur informative
-                raise ValueError(f"Impossible de lire le PDF. Le fichier est peut-être corrompu ou n'est pas un PDF valide. Erreur: {str(e)}")
-        else:
-            raise ValueError(f"Impossible de lire le PDF. Le fichier est peut-être corrompu ou n'est pas un PDF valide. Erreur: {str(e)}")
+        reader = PdfReader(_rewind(source))
+        total = len(reader.pages)
+        pages, chars = [], 0
+        for index in range(total):
+            if budget.stop(index, chars):
+                break
+            page_text = reader.pages[index].extract_text() or ""
+            pages.append(page_text)
+            chars += len(page_text.strip())
+        return pages, total
+    except Exception:
+        return None, None
 
-    # Si aucun texte n'a été extrait, essayer l'OCR
-    if not text.strip():
-        try:
-            # Convertir PDF en image et utiliser OCR
-            from pdf2image import convert_from_path
-            images = convert_from_path(pdf_path)
-            for img in images:
-                text += pytesseract.image_to_string(img, lang="eng") + "\n"
-        except ImportError:
-            pass  # pdf2image n'est pas installé
-        except Exception as e:
-            pass  # OCR a échoué
+def _render_page(page, dpi=PDF_OCR_DPI):
+    """Image PIL d'une page pdfplumber (rendu pypdfium2, sans poppler)"""
+    return page.to_image(resolution=dpi).original
+
+def extract_pdf_pages(source, dpi=PDF_OCR_DPI, max_ocr_pages=PDF_OCR_MAX_PAGES, budget=None):
+    """
+    Texte de chaque page lue (liste) et nombre de pages traitées par niveau.
+    source est un chemin ou un flux binaire. Avec un budget (ParseBudget),
+    la lecture s'arrête dès qu'une limite est atteinte : pages, caractères
+    ou échéance (vérifiée avant chaque page, y compris pendant le rendu et
+    l'OCR : les pages scannées non reconnues à temps sont abandonnées).
+    """
+    budget = budget or ParseBudget()
+    pages, total = _fast_text_layer(source, budget)
+    stats = {"pages": 0, "total_pages": total, "fast_pages": 0, "layout_pages": 0, "ocr_pages": 0}
+    if pages is not None:
+        pending = [index for index, page_text in enumerate(pages) if _needs_layout(page_text)]
+        stats.update(pages=len(pages), fast_pages=len(pages) - len(pending))
+        if not pending:
+            stats["truncated_by"] = budget.truncated_by
+            return pages, stats
+
+    try:
+        with pdfplumber.open(_rewind(source)) as pdf:
+            if pages is None or total != len(pdf.pages):
+                # Couche rapide illisible : tout passe par pdfplumber, toujours dans le budget
+                # (limite de caractères appliquée pendant l'extraction ci-dessous)
+                total = len(pdf.pages)
+                pending = []
+                for index in range(total):
+                    if budget.stop(index, 0):
+                        break
+                    pending.append(index)
+                pages = [""] * len(pending)
+                stats.update(pages=len(pages), total_pages=total, fast_pages=0)
+
+            chars = sum(len(page_text.strip()) for index, page_text in enumerate(pages) if index not in pending)
+            missing = []
+            for index in pending:
+                if budget.full(chars) or budget.expired():
+                    break
+                layout_text = pdf.pages[index].extract_text() or ""
+                stats["layout_pages"] += 1
+                if layout_text.strip():
+                    pages[index] = layout_text
+                if len(pages[index].strip()) < PDF_MIN_PAGE_CHARS:
+                    missing.append(index)
+                chars += len(pages[index].strip())
 
-    # Créer le dossier s'il n'existe pas
-    os.makedirs(output_folder, exist_ok=True)
+            # Pages sans couche texte : rendu puis OCR en parallèle (ocr_engine, avec cache),
+            # dans la limite de max_ocr_pages et du temps restant
+            images = []
+            for index in missing[:max_ocr_pages]:
+                if budget.expired():
+                    break
+                images.append(_render_page(pdf.pages[index], dpi))
+            if images:
+                try:
+                    ocr_texts = ocr_engine.ocr(images, deadline=budget.deadline)
+                except Exception:
+                    ocr_texts = []  # OCR indisponible ou en échec : on garde le texte trouvé
+                if None in ocr_texts:
+                    budget.expired()  # échéance atteinte pendant l'OCR
+                for index, ocr_text in zip(missing, ocr_texts):
+                    if ocr_text is None:
+                        continue
+                    stats["ocr_pages"] += 1
+                    if len(ocr_text.strip()) > len(pages[index].strip()):
+                        pages[index] = ocr_text
+    except Exception as e:
+        # pdfplumber ne lit pas le fichier : se contenter de la couche texte rapide
+        if pages is None:
+            raise ValueError(f"Impossible de lire le PDF. Le fichier est peut-être corrompu ou n'est pas un PDF valide. Erreur: {str(e)}")
 
-    # Chemin de sortie
-    output_path = os.path.join(output_folder, output_file)
+    stats["truncated_by"] = budget.truncated_by
+    return pages, stats
 
-    # Sauvegarder le texte dans un fichier
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(text)
+def extract_text_from_pdf(pdf_path, store_dir=CV_TEXT_STORE_DIR, budget=None):
+    """
+    Texte du PDF, construit en mémoire page par page (voir extract_pdf_pages).
+    pdf_path peut être un chemin ou un flux binaire déjà en mémoire. Rien
+    n'est écrit sur disque sauf si store_dir est renseigné (voir
+    store_extracted_text).
+    """
+    budget = budget or ParseBudget()
+    pages, stats = extract_pdf_pages(pdf_path, budget=budget)
+    text = budget.clip("".join(page_text + "\n" for page_text in pages if page_text and page_text.strip()))
+    stats["truncated_by"] = budget.truncated_by
+    pipeline_metrics.annotate(**stats)
 
-    print(f"Le CV a été enregistré dans : {output_path}")
+    if store_dir:
+        output_path = store_extracted_text(text, store_dir)
+        print(f"Le CV a été enregistré dans : {output_path}")
     return text
 
 # --- Image ---
 def extract_text_from_image(image_path):
-    img = Image.open(image_path)
-    return pytesseract.image_to_string(img, lang="eng")
+    """Chemin ou flux binaire ; reconnu par ocr_engine (cache par hash de l'image)"""
+    with Image.open(image_path) as img:
+        return ocr_engine.ocr_image(img)
 
 # --- DOCX ---
-def extract_text_from_docx(docx_path):
+def extract_text_from_docx(docx_path, budget=None):
+    """Chemin ou flux binaire ; paragraphes lus jusqu'à la limite de caractères du budget"""
+    budget = budget or ParseBudget()
     try:
         import docx
     except ImportError:
@@ -78,32 +256,85 @@ def extract_text_from_docx(docx_path):
 
     try:
         doc = docx.Document(docx_path)
-        return "\n".join([p.text for p in doc.paragraphs if p.text.strip() != ""])
+        paragraphs, chars = [], 0
+        for p in doc.paragraphs:
+            if p.text.strip() == "":
+                continue
+            if budget.full(chars) or budget.expired():
+                break
+            paragraphs.append(p.text)
+            chars += len(p.text) + 1
+        return "\n".join(paragraphs)
     except Exception as e:
         raise ValueError(f"Impossible de lire le fichier DOCX. Erreur: {str(e)}")
 
 # --- Fonction unifiée ---
-def parse_cv(file_or_uploaded):
+def _input_size(file_or_uploaded):
+    """Taille en octets de l'entrée si elle est connue sans la lire"""
+    try:
+        if isinstance(file_or_uploaded, str):
+            return os.path.getsize(file_or_uploaded)
+        if hasattr(file_or_uploaded, "seek") and hasattr(file_or_uploaded, "tell"):
+            # seek/tell plutôt que getbuffer(), qui forcerait une copie du BytesIO
+            position = file_or_uploaded.tell()
+            size = file_or_uploaded.seek(0, os.SEEK_END)
+            file_or_uploaded.seek(position)
+            return size
+        return getattr(file_or_uploaded, "size", None)
+    except (OSError, TypeError, ValueError):
+        return None
+
+def parse_cv(file_or_uploaded, budget=None):
     """
     Gère à la fois :
       - Un chemin classique (str)
       - Un objet UploadedFile venant de Streamlit
+    Avec un budget (ParseBudget), la lecture s'arrête à la première limite
+    atteinte et le texte partiel est renvoyé (voir parse_cv_bounded).
+    Durée, taille d'entrée et caractères extraits sont mesurés (étape parse_cv).
+    """
+    budget = budget or ParseBudget()
+    name = file_or_uploaded if isinstance(file_or_uploaded, str) else getattr(file_or_uploaded, "name", "")
+    with pipeline_metrics.stage("parse_cv", input_size=_input_size(file_or_uploaded),
+                                format=Path(str(name)).suffix.lower()) as record:
+        text = budget.clip(_parse_cv(file_or_uploaded, budget) or "")
+        record["output_chars"] = len(text)
+        record["truncated_by"] = budget.truncated_by
+        return text
+
+def parse_cv_bounded(file_or_uploaded, budget=None):
+    """
+    parse_cv à coût borné (par défaut ParseBudget.default()) : renvoie
+    {"text", "truncated", "truncated_by"} au lieu du seul texte.
     """
+    budget = budget or ParseBudget.default()
+    text = parse_cv(file_or_uploaded, budget)
+    return {"text": text, "truncated": budget.truncated_by is not None, "truncated_by": budget.truncated_by}
+
+def _extract(source, ext, budget):
+    """Extraction selon l'extension ; source est un chemin ou un flux binaire"""
+    if ext == ".pdf":
+        return extract_text_from_pdf(source, budget=budget)
+    elif ext in (".png", ".jpg", ".jpeg"):
+        return extract_text_from_image(source)
+    elif ext == ".docx":
+        return extract_text_from_docx(source, budget=budget)
+    elif ext == ".txt":
+        # Lecture bornée : pas besoin de charger plus que la limite de caractères
+        limit = budget.max_chars + 1 if budget.max_chars else -1
+        if isinstance(source, str):
+            with open(source, 'r', encoding='utf-8') as f:
+                return f.read(limit)
+        return source.read().decode('utf-8')
+    else:
+        raise ValueError(f"Format non supporté: {ext}")
+
+def _parse_cv(file_or_uploaded, budget):
     # Cas 1 : Si c'est déjà un chemin string
     if isinstance(file_or_uploaded, str):
         ext = Path(file_or_uploaded).suffix.lower()
         try:
-            if ext == ".pdf":
-                return extract_text_from_pdf(file_or_uploaded)
-            elif ext in (".png", ".jpg", ".jpeg"):
-                return extract_text_from_image(file_or_uploaded)
-            elif ext == ".docx":
-                return extract_text_from_docx(file_or_uploaded)
-            elif ext == ".txt":
-                with open(file_or_uploaded, 'r', encoding='utf-8') as f:
-                    return f.read()
-            else:
-                raise ValueError(f"Format non supporté: {ext}")
+            return _extract(file_or_uploaded, ext, budget)
         except Exception as e:
             # Essayer de traiter comme texte brut si tout échoue
             try:
@@ -112,31 +343,41 @@ def parse_cv(file_or_uploaded):
             except:
                 raise ValueError(f"Impossible de traiter le fichier {file_or_uploaded}. Erreur: {str(e)}")
 
-    # Cas 2 : Si c'est un fichier Streamlit
+    # Cas 2 : Si c'est un fichier Streamlit (ou un BytesIO nommé) : lu directement
+    # en mémoire par pdfplumber / PyPDF2 / python-docx, sans fichier temporaire
     if hasattr(file_or_uploaded, "name") and hasattr(file_or_uploaded, "read"):
-        suffix = Path(file_or_uploaded.name).suffix
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            tmp.write(file_or_uploaded.read())
-            tmp_path = tmp.name
-
+        ext = Path(file_or_uploaded.name).suffix.lower()
         try:
-            # On appelle la même logique que pour les chemins
-            return parse_cv(tmp_path)
+            return _extract(_rewind(file_or_uploaded), ext, budget)
         except Exception as e:
             # Essayer de lire comme texte brut
             try:
-                file_or_uploaded.seek(0)  # Remettre au début
-                content = file_or_uploaded.read()
+                content = _rewind(file_or_uploaded).read()
                 if isinstance(content, bytes):
                     return content.decode('utf-8', errors='ignore')
                 return str(content)
             except:
                 raise ValueError(f"Impossible de traiter le fichier uploadé. Erreur: {str(e)}")
-        finally:
-            try:
-                os.remove(tmp_path)
-            except:
-                pass
 
     # Sinon type inconnu
     raise TypeError("parse_cv attend un chemin (str) ou un UploadedFile Streamlit")
+
+def parse_cv_bytes_bounded(file_content, file_name, max_bytes=CV_MAX_UPLOAD_BYTES, budget=None):
+    """
+    Parse un CV déjà en mémoire (upload Flask). BytesIO partage le tampon
+    des octets reçus : ni copie ni fichier temporaire avant l'extracteur.
+    Le coût est borné par ParseBudget.default() ; renvoie, comme
+    parse_cv_bounded, {"text", "truncated", "truncated_by"}.
+    """
+    if max_bytes and len(file_content) > max_bytes:
+        raise ValueError(f"Fichier trop volumineux ({len(file_content)} octets, maximum {max_bytes})")
+    file_obj = io.BytesIO(file_content)
+    file_obj.name = file_name
+    result = parse_cv_bounded(file_obj, budget)
+    if result["truncated"]:
+        print(f"✂️  CV {file_name} tronqué (limite atteinte : {result['truncated_by']}), {len(result['text'])} caractères gardés")
+    return result
+
+def parse_cv_bytes(file_content, file_name, max_bytes=CV_MAX_UPLOAD_BYTES, budget=None):
+    """parse_cv_bytes_bounded réduit au texte (partiel si une limite a été atteinte)"""
+    return parse_cv_bytes_bounded(file_content, file_name, max_bytes, budget)["text"]
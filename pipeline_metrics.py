@@ -0,0 +1,181 @@
+"""
+Instrumentation par étape du traitement des CV
+==============================================
+
+Chaque étape (parse_cv, preprocess_cv, process_job_matching, caches...)
+est mesurée avec pipeline_metrics.stage(...) : durée, taille d'entrée,
+hit/miss de cache et tokens LLM consommés. Les dernières mesures de chaque
+étape sont gardées en mémoire (fenêtre glissante) pour calculer p50 / p90 /
+p99 ; avec PIPELINE_TRACE_PATH chaque mesure est aussi ajoutée à un fichier
+JSONL, ce qui permet de voir quelle étape d'un CV précis a été lente.
+
+    with pipeline_metrics.trace():            # un identifiant par CV traité
+        with pipeline_metrics.stage("parse_cv", input_size=len(data)) as record:
+            ...
+            pipeline_metrics.annotate(cache="miss")
+
+Les tokens sont ajoutés par openrouter_client (add_tokens) à l'étape en
+cours, y compris depuis les threads des pools de preprocessing (le contexte
+est copié avec contextvars.copy_context).
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# Nombre de mesures gardées par étape pour les percentiles
+PIPELINE_METRICS_WINDOW = int(os.environ.get("PIPELINE_METRICS_WINDOW", "500"))
+# Fichier JSONL de trace (vide = désactivé)
+PIPELINE_TRACE_PATH = os.environ.get("PIPELINE_TRACE_PATH", "")
+
+PERCENTILES = (50, 90, 99)
+
+_current_trace = contextvars.ContextVar("pipeline_trace", default=None)
+_current_record = contextvars.ContextVar("pipeline_record", default=None)
+
+
+def percentile(sorted_values, p):
+    """Percentile (interpolation linéaire) d'une liste déjà triée"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+class PipelineMetrics:
+    """Mesures par étape, fenêtre glissante en mémoire et trace JSONL optionnelle"""
+
+    def __init__(self, window=PIPELINE_METRICS_WINDOW, trace_path=PIPELINE_TRACE_PATH):
+        self.window = window
+        self.trace_path = trace_path or None
+        self._lock = threading.Lock()
+        self._trace_lock = threading.Lock()
+        self._records = defaultdict(lambda: deque(maxlen=self.window))
+        self._counts = defaultdict(int)
+        self._errors = defaultdict(int)
+
+    # ---------- Mesure ----------
+    def begin_trace(self, trace_id=None):
+        """Ouvre une trace (ex. une requête Flask) ; renvoie le jeton pour end_trace"""
+        return _current_trace.set(trace_id or uuid.uuid4().hex[:12])
+
+    def end_trace(self, token):
+        _current_trace.reset(token)
+
+    @contextmanager
+    def trace(self, trace_id=None):
+        """Regroupe les étapes d'un même CV sous un identifiant commun"""
+        token = self.begin_trace(trace_id)
+        try:
+            yield _current_trace.get()
+        finally:
+            self.end_trace(token)
+
+    @contextmanager
+    def stage(self, name, input_size=None, **fields):
+        """Mesure le bloc comme une étape ; le dict renvoyé peut être complété"""
+        record = {
+            "stage": name,
+            "trace_id": _current_trace.get(),
+            "input_size": input_size,
+            "cache": None,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            **fields,
+        }
+        parent = _current_record.get()
+        token = _current_record.set(record)
+        started = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record["error"] = type(e).__name__
+            raise
+        finally:
+            record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            _current_record.reset(token)
+            if parent is not None:
+                # Les tokens d'une sous-étape comptent aussi pour l'étape englobante
+                self.add_tokens(record["prompt_tokens"], record["completion_tokens"], parent)
+            self.record(record)
+
+    def annotate(self, **fields):
+        """Ajoute des champs (ex. cache="hit") à l'étape en cours, s'il y en a une"""
+        record = _current_record.get()
+        if record is not None:
+            record.update(fields)
+
+    def add_tokens(self, prompt_tokens=0, completion_tokens=0, record=None):
+        """Ajoute la consommation d'un appel LLM à l'étape en cours"""
+        record = record if record is not None else _current_record.get()
+        if record is None:
+            return
+        with self._lock:
+            record["prompt_tokens"] += prompt_tokens or 0
+            record["completion_tokens"] += completion_tokens or 0
+
+    def record(self, record):
+        record = dict(record, timestamp=round(time.time(), 3))
+        with self._lock:
+            self._records[record["stage"]].append(record)
+            self._counts[record["stage"]] += 1
+            if record.get("error"):
+                self._errors[record["stage"]] += 1
+        if self.trace_path:
+            line = json.dumps(record, ensure_ascii=False, default=str)
+            with self._trace_lock, open(self.trace_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    # ---------- Lecture ----------
+    def stats(self):
+        """Par étape : nombre, erreurs, percentiles de durée, caches et tokens sur la fenêtre"""
+        with self._lock:
+            snapshot = {name: list(records) for name, records in self._records.items()}
+            counts = dict(self._counts)
+            errors = dict(self._errors)
+
+        stats = {}
+        for name, records in snapshot.items():
+            durations = sorted(r["duration_ms"] for r in records)
+            sizes = [r["input_size"] for r in records if r.get("input_size") is not None]
+            cache = defaultdict(int)
+            for r in records:
+                if r.get("cache"):
+                    cache[r["cache"]] += 1
+            entry = {
+                "count": counts.get(name, 0),
+                "errors": errors.get(name, 0),
+                "window": len(records),
+                "mean_ms": round(sum(durations) / len(durations), 3),
+                "max_ms": durations[-1],
+                "mean_input_size": round(sum(sizes) / len(sizes), 1) if sizes else None,
+                "cache": dict(cache),
+                "prompt_tokens": sum(r.get("prompt_tokens", 0) for r in records),
+                "completion_tokens": sum(r.get("completion_tokens", 0) for r in records),
+            }
+            for p in PERCENTILES:
+                entry[f"p{p}_ms"] = round(percentile(durations, p), 3)
+            stats[name] = entry
+        return stats
+
+    def recent(self, name, n=20):
+        """Dernières mesures d'une étape"""
+        with self._lock:
+            return list(self._records.get(name, ()))[-n:]
+
+    def reset(self):
+        with self._lock:
+            self._records.clear()
+            self._counts.clear()
+            self._errors.clear()
+
+
+# Instance globale
+pipeline_metrics = PipelineMetrics()
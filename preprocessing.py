@@ -2,8 +2,16 @@
 
 import re
 import os
+import time
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from dotenv import load_dotenv
-from openrouter_client import extract_skills_from_cv
+from openrouter_client import extract_cv_profile, extract_cv_profiles_batch
+from skill_vocabulary import skill_vocabulary
+from skill_taxonomy import skill_taxonomy
+from cv_rules import estimate_experience_years, detect_education_level, local_confidence
+from pipeline_metrics import pipeline_metrics
 
 load_dotenv()
 
@@ -76,91 +84,239 @@ def _fallback_name_extraction(text):
     return "Unknown"
 
 def extract_skills(text):
-    # Extended skill list with variations
-    skill_variations = {
-        "python": ["python", "py", "python programming", "python developer"],
-        "java": ["java", "java programming", "java developer"],
-        "javascript": ["javascript", "js", "node.js", "nodejs", "react", "angular", "vue.js", "vue", "jquery"],
-        "sql": ["sql", "mysql", "postgresql", "postgres", "sqlite", "database", "databases"],
-        "html": ["html", "html5", "css", "css3", "bootstrap", "frontend"],
-        "machine learning": ["machine learning", "ml", "ai", "artificial intelligence", "tensorflow", "pytorch", "deep learning", "neural networks"],
-        "aws": ["aws", "amazon web services", "cloud", "azure", "gcp", "google cloud"],
-        "docker": ["docker", "kubernetes", "k8s", "container", "containers"],
-        "git": ["git", "github", "version control", "svn"],
-        "linux": ["linux", "unix", "bash", "shell scripting"],
-        "c++": ["c++", "cpp", "c/c++"],
-        "c#": ["c#", "csharp", ".net"],
-        "php": ["php", "laravel", "symfony"],
-        "ruby": ["ruby", "rails", "ruby on rails"],
-        "go": ["go", "golang"],
-        "rust": ["rust", "systems programming"],
-        "swift": ["swift", "ios", "mobile development"],
-        "kotlin": ["kotlin", "android"],
-        "typescript": ["typescript", "ts"],
-        "graphql": ["graphql", "api", "rest api", "rest"],
-        "django": ["django", "flask", "web framework", "backend"],
-        "spring": ["spring", "java spring", "microservices"],
-        "mongodb": ["mongodb", "nosql", "redis", "cassandra"],
-        "penetration testing": ["penetration testing", "pentest", "security", "cybersecurity", "network security"],
-        "nlp": ["nlp", "natural language processing", "text mining", "computational linguistics"]
+    # Tous les alias de la taxonomie cherchés en une passe, limites de mots respectées
+    return skill_taxonomy.extract(text)
+
+def _build_cv_data(cv_text, profile, local=None, tier=None):
+    """
+    Dictionnaire du CV à partir du profil extrait (nom heuristique si le modèle n'en a pas trouvé)
+    local : résultats des étapes locales déjà calculés (email, phone, name)
+    tier : niveau qui a produit le profil (local / llm / fallback), gardé dans "extraction_tier"
+    """
+    local = local or {}
+
+    def field(name, extract):
+        return local[name] if name in local else extract(cv_text)
+
+    data = {
+        "name": profile.get("name") or field("name", _fallback_name_extraction),
+        "email": field("email", extract_email),
+        "phone": field("phone", extract_phone),
+        "skills": profile.get("skills", []),
+        "programming_languages": profile.get("programming_languages", []),
+        "frameworks": profile.get("frameworks", []),
+        "tools": profile.get("tools", []),
+        "experience_years": profile.get("experience_years", 0),
+        "education_level": profile.get("education_level", "Unknown"),
+        "experience": [],  # TODO: extraction plus fine
+        "education": []    # TODO: extraction plus fine
     }
+    data["skill_ids"] = skill_vocabulary.encode(data["skills"])
+    if tier is not None:
+        data["extraction_tier"] = tier
+    return data
+
+def _basic_profile(cv_text, skills=None):
+    """Profil sans LLM (fallback)"""
+    return {
+        "name": None,
+        "skills": extract_skills(cv_text) if skills is None else skills,
+        "experience_years": 0,
+        "education_level": "Unknown",
+    }
+
+def _basic_cv_data(cv_text):
+    """Extraction sans LLM (fallback)"""
+    return _build_cv_data(cv_text, _basic_profile(cv_text))
+
+# ---------- Étapes exécutées sur le pool ----------
+# Pool partagé et borné : un upload ne crée pas de threads, et la charge LLM reste plafonnée
+PREPROCESS_WORKERS = int(os.environ.get("PREPROCESS_WORKERS", "8"))
+LLM_STAGE_TIMEOUT = float(os.environ.get("PREPROCESS_LLM_TIMEOUT", "30"))
+# Attente maximale d'un thread libre du pool avant de renoncer à l'étape
+STAGE_QUEUE_TIMEOUT = float(os.environ.get("PREPROCESS_QUEUE_TIMEOUT", "60"))
+
+_stage_pool = ThreadPoolExecutor(max_workers=PREPROCESS_WORKERS, thread_name_prefix="cv-stage")
 
-    found_skills = set()
-    text_lower = text.lower()
+_STAGE_TIMEOUT = object()
 
-    for canonical_skill, variations in skill_variations.items():
-        for variation in variations:
-            if variation in text_lower:
-                found_skills.add(canonical_skill)
-                break
+def _run_stages(cv_text, stages):
+    """
+    Lance toutes les étapes (nom → (fonction, timeout)) en même temps sur le
+    pool. Le timeout d'une étape court à partir de son démarrage, pas de sa
+    mise en file : sous charge, une étape qui attend un thread libre n'est
+    pas abandonnée pour autant (attente bornée par STAGE_QUEUE_TIMEOUT).
+    Renvoie nom → résultat, l'exception levée, ou _STAGE_TIMEOUT.
+    """
+    def timed(func, started_at, started):
+        def run():
+            started_at.append(time.monotonic())
+            started.set()
+            return func(cv_text)
+        return run
+
+    submitted = time.monotonic()
+    futures = {}
+    for name, (func, timeout) in stages.items():
+        started_at, started = [], threading.Event()
+        run = timed(func, started_at, started)
+        futures[name] = (_stage_pool.submit(contextvars.copy_context().run, run), started_at, started, timeout)
+
+    results = {}
+    for name, (future, started_at, started, timeout) in futures.items():
+        if not started.wait(max(0.0, submitted + STAGE_QUEUE_TIMEOUT - time.monotonic())) and future.cancel():
+            print(f"⏱️  Étape '{name}' abandonnée : aucun thread libre après {STAGE_QUEUE_TIMEOUT}s")
+            results[name] = _STAGE_TIMEOUT
+            continue
+        started.wait()  # démarrée entre-temps (cancel refusé)
+        try:
+            results[name] = future.result(timeout=max(0.0, started_at[0] + timeout - time.monotonic()))
+        except FutureTimeout:
+            print(f"⏱️  Étape '{name}' abandonnée après {timeout}s")  # son résultat sera ignoré
+            results[name] = _STAGE_TIMEOUT
+        except Exception as e:
+            results[name] = e
+    return results
+
+# ---------- Passe locale et seuil de confiance ----------
+# En dessous de ce seuil (0 à 1) la passe locale ne suffit pas et le LLM est appelé
+LLM_CONFIDENCE_THRESHOLD = float(os.environ.get("CV_LLM_CONFIDENCE_THRESHOLD", "0.8"))
 
-    return list(found_skills)
+_LOCAL_STAGES = {
+    "email": extract_email,
+    "phone": extract_phone,
+    "name": _fallback_name_extraction,
+    "skills": extract_skills,
+    "experience_years": estimate_experience_years,
+    "education_level": detect_education_level,
+}
+
+def _stage_value(results, name):
+    value = results.get(name)
+    return None if value is _STAGE_TIMEOUT or isinstance(value, Exception) else value
+
+def _run_local_stages(cv_text):
+    """Étapes locales (quelques microsecondes chacune) exécutées directement : nom → résultat ou exception"""
+    results = {}
+    for name, func in _LOCAL_STAGES.items():
+        try:
+            results[name] = func(cv_text)
+        except Exception as e:
+            results[name] = e
+    return results
+
+def local_extraction(cv_text):
+    """
+    Passe locale (regex, automate de compétences, règles d'expérience et de
+    diplôme), dans le thread appelant. Renvoie (profil, champs locaux, confiance).
+    """
+    results = _run_local_stages(cv_text)
+    fields = {name: _stage_value(results, name) for name in ("email", "phone", "name")}
+
+    name = fields["name"] if fields["name"] and fields["name"] != "Unknown" else None
+    skills = _stage_value(results, "skills") or []
+    experience_years = _stage_value(results, "experience_years")
+    education_level = _stage_value(results, "education_level")
+
+    taxonomy = skill_taxonomy.current()
+    profile = {
+        "name": name,
+        "skills": skills,
+        "programming_languages": [s for s in skills if taxonomy.categories.get(s) == "language"],
+        "frameworks": [s for s in skills if taxonomy.categories.get(s) == "framework"],
+        "tools": [s for s in skills if taxonomy.categories.get(s) in ("tool", "cloud")],
+        "experience_years": experience_years or 0,
+        "education_level": education_level or "Unknown",
+    }
+    confidence = local_confidence({
+        "name": name is not None,
+        "email": fields["email"] is not None,
+        "phone": fields["phone"] is not None,
+        "skills": len(skills),
+        "experience": experience_years is not None,
+        "education": education_level is not None,
+    })
+    return profile, fields, confidence
 
 def preprocess_cv(cv_text: str):
     """
-    Transforme le texte brut en dictionnaire structuré
-    Utilise OpenRouter pour une extraction avancée des compétences
+    Transforme le texte brut en dictionnaire structuré, par niveaux :
+    1. passe locale (regex, automate, règles) avec un score de confiance ;
+    2. si la confiance est sous CV_LLM_CONFIDENCE_THRESHOLD, extraction
+       OpenRouter (nom et compétences en un seul appel, avec timeout) ;
+       le profil local sert de fallback si le LLM échoue.
+    Chaque niveau est mesuré (pipeline_metrics : preprocess_local, preprocess_llm).
+    Le niveau utilisé est renvoyé dans "extraction_tier" (local / llm /
+    llm_partial / fallback) : seuls local et llm sont mis en cache
+    (cv_cache.is_cacheable). llm_partial : profil du modèle dont certains
+    morceaux du CV n'ont pas pu être analysés.
     """
-    try:
-        # Essayer d'abord l'extraction avancée avec OpenRouter
-        advanced_data = extract_skills_from_cv(cv_text)
-
-        # Compléter avec les informations de base
-        data = {
-            "name": extract_name(cv_text),
-            "email": extract_email(cv_text),
-            "phone": extract_phone(cv_text),
-            "skills": advanced_data.get("skills", []),
-            "programming_languages": advanced_data.get("programming_languages", []),
-            "frameworks": advanced_data.get("frameworks", []),
-            "tools": advanced_data.get("tools", []),
-            "experience_years": advanced_data.get("experience_years", 0),
-            "education_level": advanced_data.get("education_level", "Unknown"),
-            "experience": [],  # TODO: extraction plus fine
-            "education": []    # TODO: extraction plus fine
-        }
-
-        print(f"✅ CV preprocessé avec IA: {len(data['skills'])} compétences extraites")
-        return data
+    with pipeline_metrics.stage("preprocess_cv", input_size=len(cv_text)) as record:
+        with pipeline_metrics.stage("preprocess_local", input_size=len(cv_text)):
+            local_profile, fields, confidence = local_extraction(cv_text)
+        record["confidence"] = confidence
 
-    except Exception as e:
-        print(f"⚠️  Erreur extraction IA: {e}")
-        print("🔄 Utilisation de l'extraction basique...")
+        if confidence >= LLM_CONFIDENCE_THRESHOLD:
+            record["tier"] = "local"
+            data = _build_cv_data(cv_text, local_profile, fields, tier="local")
+            print(f"✅ CV preprocessé localement (confiance {confidence}): {len(data['skills'])} compétences extraites")
+            return data
 
-        # Fallback vers l'extraction basique
-        data = {
-            "name": extract_name(cv_text),
-            "email": extract_email(cv_text),
-            "phone": extract_phone(cv_text),
-            "skills": extract_skills(cv_text),
-            "programming_languages": [],
-            "frameworks": [],
-            "tools": [],
-            "experience_years": 0,
-            "education_level": "Unknown",
-            "experience": [],
-            "education": []
-        }
+        with pipeline_metrics.stage("preprocess_llm", input_size=len(cv_text)) as llm_record:
+            profile = _run_stages(cv_text, {"profile": (extract_cv_profile, LLM_STAGE_TIMEOUT)})["profile"]
+            llm_record["outcome"] = _llm_outcome(profile)
+        if llm_record["outcome"] in ("ok", "partial"):
+            record["tier"] = _LLM_TIERS[llm_record["outcome"]]
+            data = _build_cv_data(cv_text, profile, fields, tier=record["tier"])
+            print(f"✅ CV preprocessé avec IA (confiance locale {confidence}): {len(data['skills'])} compétences extraites")
+            return data
 
+        reason = "timeout" if profile is _STAGE_TIMEOUT else "modèle indisponible" if isinstance(profile, dict) else profile
+        print(f"⚠️  Erreur extraction IA: {reason}")
+        print("🔄 Utilisation de l'extraction basique...")
+
+        record["tier"] = "fallback"
+        data = _build_cv_data(cv_text, local_profile, fields, tier="fallback")
         print(f"✅ CV preprocessé (fallback): {len(data['skills'])} compétences extraites")
         return data
+
+# Résultat de l'appel LLM → niveau d'extraction ("extraction_tier")
+_LLM_TIERS = {"ok": "llm", "partial": "llm_partial"}
+
+def _llm_outcome(profile):
+    """
+    ok / partial (morceaux du CV non analysés) / fallback (extract_cv_profile
+    a renvoyé son profil de secours) / timeout / error
+    """
+    if isinstance(profile, dict):
+        if profile.get("fallback"):
+            return "fallback"
+        return "partial" if profile.get("partial") else "ok"
+    return "timeout" if profile is _STAGE_TIMEOUT else "error"
+
+def preprocess_cv_batch(cv_texts):
+    """
+    preprocess_cv pour plusieurs CV : seuls les CV dont la passe locale n'est
+    pas assez sûre partent au LLM, regroupés dans une même requête.
+    Renvoie les dictionnaires dans le même ordre.
+    """
+    cv_texts = list(cv_texts)
+    local = [local_extraction(cv_text) for cv_text in cv_texts]
+    pending = [i for i, (_, _, confidence) in enumerate(local) if confidence < LLM_CONFIDENCE_THRESHOLD]
+
+    profiles = {}
+    if pending:
+        try:
+            profiles = dict(zip(pending, extract_cv_profiles_batch([cv_texts[i] for i in pending])))
+        except Exception as e:
+            print(f"⚠️  Erreur extraction IA par lot: {e}")
+
+    results = []
+    for i, (cv_text, (local_profile, fields, confidence)) in enumerate(zip(cv_texts, local)):
+        if confidence >= LLM_CONFIDENCE_THRESHOLD:
+            results.append(_build_cv_data(cv_text, local_profile, fields, tier="local"))
+        elif _llm_outcome(profiles.get(i)) in _LLM_TIERS:
+            results.append(_build_cv_data(cv_text, profiles[i], fields, tier=_LLM_TIERS[_llm_outcome(profiles[i])]))
+        else:
+            results.append(_build_cv_data(cv_text, local_profile, fields, tier="fallback"))
+    return results
@@ -0,0 +1,106 @@
+"""
+Extraction des compétences en une seule passe (Aho–Corasick)
+============================================================
+
+Tous les alias de compétences sont compilés une fois dans un automate
+multi-motifs (instance partagée : skill_taxonomy). Le texte du CV est
+parcouru une seule fois, quel que soit le nombre d'alias, au lieu d'un
+test `alias in texte` par alias.
+
+Les correspondances respectent les limites de mots : "go" n'est pas trouvé
+dans "google", ni "ts" dans "results". Un bord de motif qui n'est pas une
+lettre ou un chiffre ("c++", ".net") n'impose pas de limite de ce côté.
+"""
+
+from collections import deque
+
+from skill_vocabulary import normalize_skill
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == "_"
+
+
+class SkillAutomaton:
+    """Automate d'Aho–Corasick : motif (alias) → valeur (compétence canonique)"""
+
+    def __init__(self, patterns):
+        # patterns : dict alias → valeur renvoyée quand l'alias est trouvé
+        self._goto = [{}]      # état → {caractère: état suivant}
+        self._fail = [0]
+        self._output = [[]]    # état → [(longueur, valeur, limite gauche, limite droite)]
+
+        for pattern, value in patterns.items():
+            pattern = normalize_skill(pattern)
+            if pattern:
+                self._insert(pattern, value)
+        self._build_links()
+
+    # ---------- Construction ----------
+    def _insert(self, pattern, value):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((len(pattern), value, _is_word_char(pattern[0]), _is_word_char(pattern[-1])))
+
+    def _build_links(self):
+        # Parcours en largeur : le lien d'échec d'un état pointe vers son plus long suffixe connu
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_state] = self._goto[fail].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    # ---------- Recherche ----------
+    def find_all(self, text):
+        """
+        Liste des (début, fin, valeur) de chaque alias trouvé, limites de mots
+        respectées. Les suites d'espaces et de retours à la ligne comptent pour
+        un seul espace, comme dans les alias ; début et fin restent des
+        positions du texte d'origine.
+        """
+        text = (text or "").lower()
+        goto, fail, output = self._goto, self._fail, self._output
+        length = len(text)
+        matches = []
+        state = 0
+        after_space = False
+        origins = []       # position dans le texte normalisé → position d'origine
+
+        for position, char in enumerate(text):
+            if char.isspace():
+                if after_space:
+                    continue
+                char = " "
+            after_space = char == " "
+            origins.append(position)
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            for size, value, left_bound, right_bound in output[state]:
+                start = origins[len(origins) - size]
+                end = position + 1
+                if left_bound and start > 0 and _is_word_char(text[start - 1]):
+                    continue
+                if right_bound and end < length and _is_word_char(text[end]):
+                    continue
+                matches.append((start, end, value))
+        return matches
+
+    def find(self, text):
+        """Valeurs distinctes trouvées dans le texte, dans l'ordre de première apparition"""
+        return list(dict.fromkeys(value for _, _, value in self.find_all(text)))
+
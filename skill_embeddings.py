@@ -0,0 +1,196 @@
+"""
+Matching sémantique des compétences (embeddings)
+================================================
+
+Mode de matching optionnel : "PyTorch" peut correspondre à "deep learning"
+même si les chaînes (et leurs identifiants canoniques) diffèrent.
+
+Chaque compétence distincte est encodée une seule fois avec
+SentenceTransformer (même modèle que agent.py) puis stockée dans une
+matrice de vecteurs sur disque (.npy + index .json). Les compétences déjà
+vues ne sont jamais ré-encodées, y compris après un redémarrage.
+La similarité CV → jobs est un produit matriciel (cosinus) en un seul lot.
+
+Les nouveaux vecteurs sont ajoutés dans une matrice à capacité doublée
+(pas de copie complète par compétence) et écrits sur disque en arrière-plan,
+regroupés, SKILL_EMBEDDINGS_SAVE_DELAY secondes après le premier ajout :
+une requête n'attend jamais la réécriture du fichier .npy.
+Si le modèle ne peut pas être chargé (paquet absent, hors ligne), le store
+se déclare indisponible et le matching repasse en mode exact.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+from skill_vocabulary import normalize_skill
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "all-mpnet-base-v2"
+EMBEDDINGS_PATH = os.environ.get("SKILL_EMBEDDINGS_PATH", os.path.join("embeddings", "skill_vectors"))
+SEMANTIC_THRESHOLD = float(os.environ.get("SEMANTIC_MATCH_THRESHOLD", "0.6"))
+SAVE_DELAY = float(os.environ.get("SKILL_EMBEDDINGS_SAVE_DELAY", "5"))
+
+
+class SkillEmbeddingStore:
+    """Cache persistant compétence → vecteur normalisé"""
+
+    def __init__(self, path=EMBEDDINGS_PATH, model_name=EMBEDDING_MODEL, encoder=None, save_delay=SAVE_DELAY):
+        # encoder : fonction liste de chaînes → tableau (n, d) ; par défaut SentenceTransformer
+        # save_delay : secondes avant l'écriture groupée des nouveaux vecteurs (flush() pour écrire tout de suite)
+        self.path = path
+        self.model_name = model_name
+        self.save_delay = save_delay
+        self._encoder = encoder
+        self._load_error = None
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._save_timer = None
+        self._dirty = False    # vecteurs ajoutés depuis la dernière écriture
+        self._loaded = False
+        self.skills = []       # ligne → compétence
+        self.rows = {}         # compétence → ligne
+        self.matrix = None     # (n, d) float32, lignes normalisées (vue sur _buffer)
+        self._buffer = None    # (capacité, d), capacité doublée quand elle est atteinte
+
+    # ---------- Encodeur ----------
+    def available(self):
+        """True si un encodeur est disponible (sentence-transformers installé et modèle chargeable)"""
+        if self._encoder is not None:
+            return True
+        if self._load_error is not None:
+            return False
+        try:
+            import sentence_transformers  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def _encode(self, skills):
+        if self._encoder is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+                model = SentenceTransformer(self.model_name)
+            except Exception as e:
+                # Pas de nouvel essai à chaque requête : le matching reste en mode exact
+                self._load_error = e
+                logger.warning(f"⚠️  Modèle {self.model_name} indisponible, matching sémantique désactivé: {e}")
+                raise
+            self._encoder = lambda texts: model.encode(texts, batch_size=64, show_progress_bar=False)
+            logger.info(f"✅ SentenceTransformer {self.model_name} chargé pour le matching sémantique")
+
+        vectors = np.asarray(self._encoder(list(skills)), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    # ---------- Persistance ----------
+    def _load(self):
+        if self._loaded:
+            return
+        try:
+            with open(self.path + ".json", "r", encoding="utf-8") as f:
+                skills = json.load(f)
+            matrix = np.load(self.path + ".npy")
+            if len(skills) == matrix.shape[0]:
+                self.skills = skills
+                self.rows = {skill: row for row, skill in enumerate(skills)}
+                self._buffer = matrix.astype(np.float32, copy=False)
+                self.matrix = self._buffer
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"⚠️  Cache d'embeddings illisible, reconstruction: {e}")
+        self._loaded = True
+
+    def _append(self, vectors):
+        # Ajout en fin de matrice ; les lignes déjà écrites ne bougent pas (instantané sûr pour flush)
+        size = 0 if self.matrix is None else self.matrix.shape[0]
+        needed = size + len(vectors)
+        if self._buffer is None or needed > self._buffer.shape[0]:
+            buffer = np.empty((max(needed, 2 * size, 64), vectors.shape[1]), dtype=np.float32)
+            if size:
+                buffer[:size] = self.matrix
+            self._buffer = buffer
+        self._buffer[size:needed] = vectors
+        self.matrix = self._buffer[:needed]
+
+    def _schedule_save(self):
+        # Appelé sous self._lock : une seule écriture en attente, qui regroupe les ajouts suivants
+        if self._save_timer is None:
+            self._save_timer = threading.Timer(self.save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Écrit sur disque les vecteurs ajoutés depuis la dernière écriture"""
+        with self._save_lock:
+            with self._lock:
+                if self._save_timer is not None:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                if not self._dirty:
+                    return
+                matrix, skills = self.matrix, list(self.skills)
+                self._dirty = False
+            try:
+                self._save(matrix, skills)
+            except OSError as e:
+                logger.warning(f"⚠️  Impossible d'enregistrer le cache d'embeddings: {e}")
+                with self._lock:
+                    self._dirty = True
+
+    def _save(self, matrix, skills):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        # Écriture atomique : fichiers temporaires puis remplacement
+        with open(self.path + ".tmp.npy", "wb") as f:
+            np.save(f, matrix)
+        with open(self.path + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump(skills, f)
+        os.replace(self.path + ".tmp.npy", self.path + ".npy")
+        os.replace(self.path + ".json.tmp", self.path + ".json")
+
+    # ---------- Accès aux vecteurs ----------
+    def row_ids(self, skills):
+        """Lignes de la matrice pour ces compétences, en encodant d'un seul lot celles jamais vues"""
+        keys = [normalize_skill(s) for s in skills]
+        with self._lock:
+            self._load()
+            missing = list(dict.fromkeys(k for k in keys if k and k not in self.rows))
+            if missing:
+                vectors = self._encode(missing)
+                self._append(vectors)
+                for skill in missing:
+                    self.rows[skill] = len(self.skills)
+                    self.skills.append(skill)
+                self._dirty = True
+                self._schedule_save()
+            return np.asarray([self.rows[k] for k in keys if k], dtype=np.int64)
+
+    def vectors(self, skills):
+        """Vecteurs normalisés (n, d) des compétences"""
+        rows = self.row_ids(skills)
+        return self.matrix[rows]
+
+    def similar(self, query_skills, candidate_rows, threshold=SEMANTIC_THRESHOLD):
+        """
+        Pour chaque ligne candidate, meilleure similarité cosinus avec les
+        compétences du CV ; renvoie le masque des candidates >= threshold.
+        """
+        query = self.vectors(query_skills)
+        if not len(query) or not len(candidate_rows):
+            return np.zeros(len(candidate_rows), dtype=bool)
+        similarity = self.matrix[candidate_rows] @ query.T
+        return similarity.max(axis=1) >= threshold
+
+
+# Instance globale (vecteurs partagés par tous les appels)
+skill_embeddings = SkillEmbeddingStore()
+# Vecteurs encore en attente d'écriture : enregistrés à l'arrêt du processus
+atexit.register(skill_embeddings.flush)
@@ -0,0 +1,153 @@
+"""
+Taxonomie des compétences (fichier externe, rechargé à chaud)
+=============================================================
+
+Une seule source pour toutes les listes de compétences : skill_taxonomy.json
+(nom canonique, alias, catégorie language / framework / tool / ...).
+Le fichier est lu et compilé une fois (table alias → canonique, catégories,
+automate d'extraction) ; tous les extracteurs (preprocessing,
+openrouter_client, math test) et le vocabulaire de matching lisent la même
+instance compilée.
+
+Quand la date de modification du fichier change, la taxonomie est
+recompilée puis remplacée d'un seul coup : un appel en cours garde
+l'ancienne version complète, jamais un mélange des deux. Un fichier
+invalide est ignoré (la version précédente reste active).
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+
+from skill_automaton import SkillAutomaton
+from skill_vocabulary import normalize_skill
+
+logger = logging.getLogger(__name__)
+
+TAXONOMY_PATH = os.environ.get(
+    "SKILL_TAXONOMY_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "skill_taxonomy.json"),
+)
+# Intervalle minimal entre deux vérifications de mtime (secondes)
+CHECK_INTERVAL = float(os.environ.get("SKILL_TAXONOMY_CHECK_INTERVAL", "1.0"))
+
+
+class CompiledTaxonomy:
+    """Structures de recherche immuables construites à partir du fichier"""
+
+    def __init__(self, entries, generation=0, mtime=None):
+        self.generation = generation
+        self.mtime = mtime
+        self.variations = {}   # canonique → alias (dans l'ordre du fichier)
+        self.categories = {}   # canonique → catégorie
+        self.aliases = {}      # alias normalisé → canonique
+
+        for entry in entries:
+            canonical = normalize_skill(entry["name"])
+            self.variations[canonical] = [normalize_skill(a) for a in entry.get("aliases", [])]
+            self.categories[canonical] = entry.get("category", "other")
+
+        # Premier canonique gagnant en cas d'alias partagé
+        for canonical in self.variations:
+            self.aliases[canonical] = canonical
+        for canonical, aliases in self.variations.items():
+            for alias in aliases:
+                self.aliases.setdefault(alias, canonical)
+
+        self.automaton = SkillAutomaton(self.aliases)
+
+    def extract(self, text):
+        """Compétences canoniques trouvées dans le texte, dans l'ordre d'apparition"""
+        return self.automaton.find(text)
+
+    def extract_surface(self, text):
+        """
+        Compétences telles qu'écrites dans le texte ("Kubernetes", "Flask"),
+        pour l'affichage ; le matching passe par les identifiants canoniques.
+        Un alias contenu dans un alias plus long ("java" dans "java spring")
+        n'est pas repris.
+        """
+        found = {}
+        covered_until = 0
+        for start, end, _ in sorted(self.automaton.find_all(text), key=lambda m: (m[0], -m[1])):
+            if end <= covered_until:
+                continue
+            covered_until = end
+            surface = " ".join(text[start:end].split())
+            found.setdefault(surface.lower(), surface)
+        return list(found.values())
+
+    def category_of(self, skill):
+        return self.categories.get(self.aliases.get(normalize_skill(skill)), "other")
+
+
+class SkillTaxonomy:
+    """Taxonomie chargée depuis un fichier JSON et recompilée quand il change"""
+
+    def __init__(self, path=TAXONOMY_PATH, check_interval=CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._compiled = None
+        self._checked_at = 0.0
+
+    def _read(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        with open(self.path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data.get("skills", []), mtime
+
+    def current(self):
+        """Taxonomie compilée à jour (recompilée si le fichier a changé)"""
+        compiled = self._compiled
+        now = time.monotonic()
+        if compiled is not None and now - self._checked_at < self.check_interval:
+            return compiled
+
+        with self._lock:
+            compiled = self._compiled
+            if compiled is not None and now - self._checked_at < self.check_interval:
+                return compiled
+            self._checked_at = now
+            try:
+                if compiled is not None and os.stat(self.path).st_mtime_ns == compiled.mtime:
+                    return compiled
+                entries, mtime = self._read()
+                generation = compiled.generation + 1 if compiled is not None else 0
+                # Compilation complète avant de remplacer la référence
+                self._compiled = CompiledTaxonomy(entries, generation=generation, mtime=mtime)
+                if compiled is not None:
+                    logger.info(f"🔄 Taxonomie des compétences rechargée ({len(entries)} compétences)")
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                if compiled is None:
+                    raise
+                logger.warning(f"⚠️  Taxonomie invalide, version précédente conservée: {e}")
+            return self._compiled
+
+    # Raccourcis vers la version courante
+    @property
+    def generation(self):
+        return self.current().generation
+
+    @property
+    def variations(self):
+        return self.current().variations
+
+    @property
+    def automaton(self):
+        return self.current().automaton
+
+    def extract(self, text):
+        return self.current().extract(text)
+
+    def extract_surface(self, text):
+        return self.current().extract_surface(text)
+
+    def category_of(self, skill):
+        return self.current().category_of(skill)
+
+
+# Instance globale partagée par tous les extracteurs et le matching
+skill_taxonomy = SkillTaxonomy()
@@ -0,0 +1,124 @@
+"""
+Vocabulaire canonique des compétences
+=====================================
+
+Associe chaque alias de compétence ("postgres", "PostgreSQL", "mysql"...)
+à un identifiant entier canonique ("sql"). Les CV et les jobs portent
+une liste triée de ces identifiants (skill_ids) : le matching compare des
+entiers au lieu de renormaliser des chaînes à chaque appel.
+
+Les identifiants sont dérivés d'un hash du nom canonique : ils sont
+identiques d'un processus à l'autre et peuvent être stockés (session,
+base de données) sans table de correspondance.
+
+La table des alias vient de la taxonomie partagée (skill_taxonomy.json) ;
+elle est relue quand le fichier change.
+"""
+
+import hashlib
+import threading
+import time
+
+
+def normalize_skill(skill):
+    """Minuscules et espaces normalisés"""
+    return " ".join(str(skill).lower().split())
+
+
+def _stable_id(canonical):
+    # 53 bits : reste exact en JSON (y compris côté JavaScript)
+    digest = hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") >> 11
+
+
+class SkillVocabulary:
+    """Table alias → identifiant canonique, avec cache des chaînes déjà vues"""
+
+    def __init__(self, variations=None):
+        # variations : dict canonique → alias ; par défaut la taxonomie partagée (skill_taxonomy.json)
+        self._lock = threading.Lock()
+        self._static = variations is not None
+        self._generation = None
+        self._next_check = 0.0
+        self._aliases = {}   # alias normalisé → nom canonique
+        self._ids = {}       # chaîne brute ou normalisée → id
+        self.names = {}      # id → nom canonique
+
+        if self._static:
+            for canonical, aliases in variations.items():
+                canonical = normalize_skill(canonical)
+                self._aliases[canonical] = canonical
+                for alias in aliases:
+                    self._aliases.setdefault(normalize_skill(alias), canonical)
+
+    def _sync(self):
+        """Suit la taxonomie partagée : nouvelle table d'alias et cache vidé quand elle est rechargée"""
+        if self._static:
+            return
+        # Appelé très souvent : on ne consulte la taxonomie qu'à son intervalle de vérification
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        from skill_taxonomy import skill_taxonomy
+
+        compiled = skill_taxonomy.current()
+        if compiled.generation != self._generation:
+            with self._lock:
+                self._aliases = compiled.aliases
+                self._ids = {}
+                self._generation = compiled.generation
+        self._next_check = now + skill_taxonomy.check_interval
+
+    @property
+    def generation(self):
+        """Version de la taxonomie utilisée (None pour une table fixe)"""
+        self._sync()
+        return self._generation
+
+    def canonical(self, skill):
+        """Nom canonique d'une compétence (la compétence elle-même si inconnue)"""
+        self._sync()
+        normalized = normalize_skill(skill)
+        return self._aliases.get(normalized, normalized)
+
+    def id_of(self, skill):
+        """Identifiant canonique d'une compétence (None pour une chaîne vide)"""
+        # Chemin rapide sans vérification : le cache est vidé par _sync (encode, canonical) au rechargement
+        skill_id = self._ids.get(skill)
+        if skill_id is not None:
+            return skill_id
+
+        canonical = self.canonical(skill)
+        if not canonical:
+            return None
+        skill_id = _stable_id(canonical)
+        with self._lock:
+            self.names[skill_id] = canonical
+            self._ids[skill] = skill_id
+        return skill_id
+
+    def encode(self, skills):
+        """Liste triée et dédoublonnée des identifiants d'une liste de compétences"""
+        self._sync()
+        ids = set()
+        for skill in skills or []:
+            skill_id = self.id_of(skill)
+            if skill_id is not None:
+                ids.add(skill_id)
+        return sorted(ids)
+
+    def decode(self, skill_ids):
+        """Noms canoniques correspondant à une liste d'identifiants"""
+        return [self.names.get(skill_id, str(skill_id)) for skill_id in skill_ids]
+
+
+def skill_ids_of(data):
+    """skill_ids d'un CV ou d'un job, calculés à partir de "skills" s'ils manquent"""
+    skill_ids = data.get("skill_ids")
+    if skill_ids is None:
+        skill_ids = skill_vocabulary.encode(data.get("skills"))
+    return skill_ids
+
+
+# Instance globale partagée par les CV, les jobs et le matching
+skill_vocabulary = SkillVocabulary()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the matching benchmark generator and baseline comparison
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append('.')
+
+from bench_matching import generate_catalog, run_benchmarks, compare_to_baseline, main
+from matching import match_jobs
+
+def test_bench_matching():
+    print("=== Testing Matching Benchmarks ===")
+
+    companies, flat_jobs, cvs = generate_catalog(120, 60, 5, seed=1)
+    assert sum(len(c["jobs"]) for c in companies) == len(flat_jobs) == 120
+    assert len(cvs) == 5
+
+    # Nested and flat formats describe the same catalog
+    for cv_data in cvs:
+        nested = match_jobs(cv_data, companies)
+        flat = match_jobs(cv_data, flat_jobs)
+        assert [(j["id"], j["match_score"]) for j in nested] == [(j["id"], j["match_score"]) for j in flat]
+    print("✅ Nested and flat catalogs agree")
+
+    results = run_benchmarks(120, 60, 5, seed=1, engines=["match_jobs_nested", "matrix_matcher", "process_job_matching_flat"])
+    for name, measured in results.items():
+        print(f"- {name}: {measured}")
+        assert measured["ops_per_s"] > 0
+        assert measured["p95_ms"] >= measured["p50_ms"]
+
+    # flask_app.process_job_matching's core is measured without importing the Flask app
+    assert "flask_app" not in sys.modules
+
+    baseline = {"matrix_matcher": {"ops_per_s": results["matrix_matcher"]["ops_per_s"] * 10}}
+    assert len(compare_to_baseline(results, baseline, tolerance=0.3)) == 1
+    assert compare_to_baseline(results, {"match_jobs_nested": {"ops_per_s": 0.001}}) == []
+    print("✅ Baseline regressions detected")
+
+    # A missing baseline or one recorded with other sizes fails unless --no-baseline is given
+    small = ["--jobs", "40", "--skills", "30", "--cvs", "3", "--engine", "matrix_matcher"]
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "baseline.json")
+        assert main(small + ["--baseline", path]) == 1
+        assert main(small + ["--baseline", path, "--no-baseline"]) == 0
+        assert main(small + ["--baseline", path, "--update-baseline"]) == 0
+        assert main(small + ["--baseline", path, "--tolerance", "1"]) == 0
+        assert main(small + ["--baseline", path, "--jobs", "50"]) == 1
+    print("✅ Missing or mismatched baseline fails the benchmark")
+
+    print("\n=== Matching Benchmarks Test Complete ===")
+
+if __name__ == "__main__":
+    test_bench_matching()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the synthetic parsing corpus and the per-backend harness
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append('.')
+
+import parsing
+import bench_parsing
+from bench_parsing import generate_corpus, run_benchmarks, summarize, main
+from parsing import extract_pdf_pages
+
+def bench_ocr_dirs():
+    return {name for name in os.listdir(tempfile.gettempdir()) if name.startswith("bench_ocr_")}
+
+def test_bench_parsing():
+    print("=== Testing Parsing Benchmarks ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = generate_corpus(tmp, sizes=(1, 2), seed=1)
+        kinds = sorted({item["kind"] for item in corpus})
+        assert kinds == ["docx", "image_pdf", "png", "text_pdf", "two_column_pdf"]
+        assert all(os.path.getsize(item["path"]) > 0 for item in corpus)
+
+        by_name = {os.path.basename(item["path"]): item for item in corpus}
+        pages, stats = extract_pdf_pages(by_name["text_2p.pdf"]["path"])
+        assert stats["pages"] == 2 and stats["fast_pages"] == 2
+        _, stats = extract_pdf_pages(by_name["image_1p.pdf"]["path"], max_ocr_pages=0)
+        assert stats["fast_pages"] == 0 and stats["layout_pages"] == 1
+        print(f"✅ Corpus of {len(corpus)} files: {kinds}")
+
+        default_engine = parsing.ocr_engine
+        calls_before = default_engine.hits + default_engine.misses
+        dirs_before = bench_ocr_dirs()
+        results = run_benchmarks(corpus, backends=["parse_cv", "pypdf2", "python_docx"], runs=1, isolate=False)
+        # parse_cv OCRs scanned pages with a throwaway engine: the production cache is untouched, nothing left behind
+        assert parsing.ocr_engine is default_engine
+        assert default_engine.hits + default_engine.misses == calls_before
+        assert bench_ocr_dirs() == dirs_before
+        measured = [row for row in results if "pages_per_s" in row]
+        assert {row["backend"] for row in measured} == {"parse_cv", "pypdf2", "python_docx"}
+        assert all(row["pages_per_s"] > 0 for row in measured)
+        for row in measured:
+            if row["kind"] in ("text_pdf", "docx"):
+                assert abs(row["chars"] - row["expected_chars"]) <= 2, row
+            if row["kind"] == "image_pdf" and row["backend"] == "pypdf2":
+                assert row["chars"] == 0
+
+        summary = summarize(results)
+        assert summary["pypdf2/text_pdf"]["chars_ratio"] > 0.99
+        for name, values in summary.items():
+            print(f"- {name}: {values}")
+        print("✅ Harness reports pages/s and extracted characters per backend")
+
+    # A backend that raises makes the benchmark fail instead of passing silently
+    def broken(path, engine):
+        raise RuntimeError("extractor crashed")
+    saved = bench_parsing.BACKENDS["pypdf2"]
+    bench_parsing.BACKENDS["pypdf2"] = (saved[0], broken, saved[2])
+    try:
+        assert main(["--sizes", "1", "--runs", "1", "--no-isolate", "--backend", "pypdf2"]) == 1
+    finally:
+        bench_parsing.BACKENDS["pypdf2"] = saved
+    assert main(["--sizes", "1", "--runs", "1", "--no-isolate", "--backend", "pypdf2"]) == 0
+    print("✅ Backend errors fail the benchmark")
+
+    print("\n=== Parsing Benchmarks Test Complete ===")
+
+if __name__ == "__main__":
+    test_bench_parsing()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test script to verify applicant ranking for a job on a temporary SQLite database
+"""
+
+import sys
+import os
+import json
+import tempfile
+sys.path.append('.')
+
+import db
+from candidate_ranking import rank_candidates_for_job
+
+def test_candidate_ranking():
+    print("=== Testing Candidate Ranking ===")
+
+    if db.DB_TYPE != 'sqlite':
+        print("⚠️ Skipped: SQLite only")
+        return
+
+    original_url = db.DATABASE_URL
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DATABASE_URL = 'sqlite:///' + os.path.join(tmp, 'ranking.db')
+        try:
+            db.create_tables()
+            db.add_recruiter("recruiter", "recruiter@test.com", "123")
+            recruiter_id = db.get_recruiter("recruiter@test.com", "123")['id']
+            company_id = db.add_company("Test Co", "", False, "", "")
+            job_id = db.add_job(company_id, recruiter_id, "Engineer", "Data Engineer", "", "", "full-time",
+                                "2024-01-01", "Remote", ["Python", "PostgreSQL", "Docker", "AWS"],
+                                None, None, "EUR", 0, 0, [], "")
+
+            applicants = [
+                ("alice", ["python", "postgres", "docker", "aws"]),
+                ("bob", ["python"]),
+                ("carol", ["java"]),
+                ("dave", ["python", "kubernetes"]),
+            ]
+            for username, skills in applicants:
+                db.add_candidate(username, f"{username}@test.com", "", "", recruiter_id)
+                candidate_id = db.get_candidate_by_email(f"{username}@test.com")['id']
+                db.add_resume(candidate_id, recruiter_id, job_id, "cv text", json.dumps({"skills": skills}))
+
+            # A resume stored without skill_ids gets backfilled from extracted_data
+            conn = db.get_db_connection()
+            conn.execute("UPDATE resumes SET skill_ids = NULL WHERE id = 2")
+            conn.commit()
+            conn.close()
+
+            page1 = rank_candidates_for_job(job_id, k=2, offset=0)
+            page2 = rank_candidates_for_job(job_id, k=2, offset=2)
+            for c in page1['candidates'] + page2['candidates']:
+                print(f"- {c['username']}: {c['match_score']}% ({c['matched_skills']})")
+
+            assert page1['total'] == 4
+            assert [c['username'] for c in page1['candidates']] == ["alice", "dave"]
+            assert [c['username'] for c in page2['candidates']] == ["bob", "carol"]
+            assert page1['candidates'][0]['match_score'] == 100.0
+            assert rank_candidates_for_job(9999) is None
+        finally:
+            db.DATABASE_URL = original_url
+
+    print("\n=== Candidate Ranking Test Complete ===")
+
+if __name__ == "__main__":
+    test_candidate_ranking()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the persistent CV preprocessing cache (TTL, eviction, hit rate)
+"""
+
+import sys
+import os
+import json
+import time
+import tempfile
+sys.path.append('.')
+
+from cv_cache import CVCache, bytes_key, text_key, is_cacheable
+import openrouter_client as orc
+import preprocessing
+
+SPARSE_CV = "Worked on various internal projects. Python."
+# Long enough to be split into 3 chunks extracted separately
+LONG_CV = "\n".join(f"Worked on internal project {i} with the data team." for i in range(250)) + "\nPython."
+
+def failing_generate(prompt, max_tokens=1000):
+    raise RuntimeError("503 Service Unavailable")
+
+def chunk_generate(failures):
+    """Model failing failures[part] times on that part of the CV, then answering"""
+    def generate_content(prompt, max_tokens=1000):
+        for part in list(failures):
+            if f"(part {part} of" in prompt and failures[part] > 0:
+                failures[part] -= 1
+                raise RuntimeError("503 Service Unavailable")
+        return json.dumps({"name": "Unknown", "skills": ["python"]})
+    return generate_content
+
+def test_cv_cache():
+    print("=== Testing CV Cache ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cv_cache.db")
+        cache = CVCache(path, ttl=3600, max_entries=3, maintenance_interval=0)
+
+        content = b"%PDF-1.4 fake resume bytes"
+        cv_text = "Alice Martin\nPython   Django"
+        cv_data = {"name": "Alice Martin", "skills": ["python", "django"]}
+
+        assert cache.get(bytes_key(content)) is None
+        cache.record_miss()
+        cache.put([bytes_key(content), text_key(cv_text)], cv_text, cv_data)
+
+        # Same file, and same text from another file (case / spacing differences ignored)
+        assert cache.get(bytes_key(content)) == (cv_text, cv_data)
+        assert cache.get(text_key("alice martin python django")) == (cv_text, cv_data)
+
+        # Persisted across instances (restart)
+        assert CVCache(path).get(bytes_key(content)) == (cv_text, cv_data)
+
+        stats = cache.stats()
+        print(f"Stats: {stats}")
+        assert stats["hits_bytes"] == 1 and stats["hits_text"] == 1 and stats["misses"] == 1
+        assert stats["hit_rate"] == round(2 / 3, 4)
+
+        # Size-bounded eviction: least recently used entries go first
+        for i in range(3):
+            time.sleep(0.01)
+            cache.put([f"bytes:{i}"], f"text {i}", {"skills": [str(i)]})
+        assert cache.stats()["entries"] == 3
+        assert cache.get(bytes_key(content)) is None
+        assert cache.get("bytes:2") is not None
+
+        # Purge/eviction is periodic, not on every put: the table may overflow until maintain()
+        lazy = CVCache(os.path.join(tmp, "lazy.db"), ttl=3600, max_entries=2, maintenance_interval=3600)
+        for i in range(5):
+            lazy.put([f"bytes:{i}"], f"text {i}", {"skills": [str(i)]})
+        assert lazy.stats()["entries"] == 5
+        lazy.maintain()
+        assert lazy.stats()["entries"] == 2
+        print("✅ Eviction OK")
+
+        # TTL
+        expired = CVCache(path, ttl=0)
+        time.sleep(0.01)
+        assert expired.get("bytes:2") is None
+        print("✅ TTL OK")
+
+        # LLM outage: the fallback profile is returned but never cached
+        outage = CVCache(os.path.join(tmp, "outage.db"))
+        client = orc.openrouter_client
+        saved = (client.client, client.generate_content)
+        try:
+            client.client = object()
+            client.generate_content = failing_generate
+            cv_data = preprocessing.preprocess_cv(SPARSE_CV)
+        finally:
+            client.client, client.generate_content = saved
+        assert cv_data["extraction_tier"] == "fallback" and cv_data["skills"] == ["python"]
+        assert cv_data["experience_years"] == 0  # not the hardcoded default of the basic extraction
+        assert outage.put_result([bytes_key(b"sparse"), text_key(SPARSE_CV)], SPARSE_CV, cv_data) is False
+        assert outage.stats()["entries"] == 0
+        assert is_cacheable({"extraction_tier": "llm"}) and is_cacheable({"extraction_tier": "local"})
+        assert not is_cacheable({"skills": ["python"]}) and not is_cacheable(None)
+        print("✅ Fallback results not cached")
+
+        # Long CV: a chunk failing once is retried; a chunk failing for good makes a partial, uncached profile
+        try:
+            client.client = object()
+            client.generate_content = chunk_generate({2: 1})
+            retried = preprocessing.preprocess_cv(LONG_CV)
+            client.generate_content = chunk_generate({2: 5})
+            partial = preprocessing.preprocess_cv(LONG_CV)
+        finally:
+            client.client, client.generate_content = saved
+        assert retried["extraction_tier"] == "llm" and is_cacheable(retried)
+        assert partial["extraction_tier"] == "llm_partial" and partial["skills"] == ["python"]
+        assert outage.put_result([text_key(LONG_CV)], LONG_CV, partial) is False
+        assert outage.stats()["entries"] == 0
+        print("✅ Failed chunks retried, partial merges not cached")
+
+    print("\n=== CV Cache Test Complete ===")
+
+if __name__ == "__main__":
+    test_cv_cache()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script to verify long CVs are extracted chunk by chunk in parallel and merged
+"""
+
+import sys
+import json
+import time
+import threading
+sys.path.append('.')
+
+import openrouter_client as orc
+from cv_chunking import split_cv_chunks, merge_profiles, count_tokens
+
+PAGE_1 = "Alice Martin\nSenior engineer\n" + "Built Python services with Django.\n" * 60
+PAGE_3 = "Earlier work: Rust and Kubernetes.\n" * 60 + "Master of Science, 12 years of experience\n"
+LONG_CV = PAGE_1 + "Misc project notes.\n" * 200 + PAGE_3
+
+def fake_generate(calls):
+    lock = threading.Lock()
+    def generate_content(prompt, max_tokens=1000):
+        with lock:
+            calls.append(prompt)
+        time.sleep(0.2)
+        cv = prompt.split("CV to analyze:", 1)[1]
+        skills = [s for s in ["Python", "Django", "Rust", "Kubernetes"] if s in cv]
+        return json.dumps({
+            "name": "Alice Martin" if "Alice Martin" in cv else "Unknown",
+            "skills": skills,
+            "experience_years": 12 if "12 years" in cv else 3,
+            "education_level": "Master" if "Master" in cv else "Unknown",
+        })
+    return generate_content
+
+def test_cv_chunking():
+    print("=== Testing Chunked CV Extraction ===")
+
+    chunks = split_cv_chunks(LONG_CV, max_tokens=400)
+    print(f"Chunks: {len(chunks)}")
+    assert len(chunks) > 2
+    assert all(count_tokens(chunk) <= 400 for chunk in chunks)
+    assert split_cv_chunks("short cv", max_tokens=400) == ["short cv"]
+    assert split_cv_chunks("") == []
+
+    merged = merge_profiles([
+        {"name": None, "skills": ["Postgres", "python"], "experience_years": 2, "education_level": "Bachelor"},
+        {"name": "Alice", "skills": ["SQL", "Python", "rust"], "experience_years": "5", "education_level": "PhD"},
+        None,
+    ])
+    print(f"Merged: {merged}")
+    assert merged["skills"] == ["Postgres", "python", "rust"]  # postgres / sql share one canonical skill
+    assert merged["name"] == "Alice" and merged["education_level"] == "PhD" and merged["experience_years"] == "5"
+
+    client = orc.openrouter_client
+    saved = (client.client, client.generate_content)
+    calls = []
+    try:
+        client.client = object()
+        client.generate_content = fake_generate(calls)
+
+        truncated = orc.extract_cv_profile(LONG_CV, mode="truncate")
+        assert "Rust" not in truncated["skills"]
+
+        calls.clear()
+        started = time.perf_counter()
+        profile = orc.extract_cv_profile(LONG_CV, mode="chunked")
+        elapsed = time.perf_counter() - started
+        print(f"Chunked profile from {len(calls)} calls in {elapsed:.2f}s: {profile}")
+        assert len(calls) > 1
+        assert elapsed < 0.2 * len(calls)
+        assert {"Python", "Django", "Rust", "Kubernetes"} <= set(profile["skills"])
+        assert profile["name"] == "Alice Martin"
+        assert profile["experience_years"] == 12 and profile["education_level"] == "Master"
+        print("✅ Skills from the last page are kept")
+    finally:
+        client.client, client.generate_content = saved
+
+    print("\n=== Chunked CV Extraction Test Complete ===")
+
+if __name__ == "__main__":
+    test_cv_chunking()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script to verify name and skills come from a single LLM call (and batches share one call)
+"""
+
+import sys
+import json
+sys.path.append('.')
+
+import openrouter_client as orc
+from preprocessing import preprocess_cv, preprocess_cv_batch
+
+CV_A = "Alice Martin\nalice@example.com\nPython, Django, Docker"
+CV_B = "Bob Stone\nbob@example.com\nJava, Spring"
+
+def fake_generate(calls):
+    def generate_content(prompt, max_tokens=1000):
+        calls.append(prompt)
+        if "### CV" in prompt:
+            return "```json\n" + json.dumps({"cvs": [
+                {"id": 0, "name": "Alice Martin", "skills": ["python", "django"]},
+                {"id": "1", "name": "Unknown", "skills": ["java"]},
+            ]}) + "\n```"
+        return json.dumps({"name": "Alice Martin", "skills": ["python", "django", "docker"],
+                           "experience_years": 4, "education_level": "Master",
+                           "programming_languages": ["python"], "frameworks": ["django"], "tools": ["docker"]})
+    return generate_content
+
+def test_cv_profile():
+    print("=== Testing Structured CV Extraction ===")
+
+    client = orc.openrouter_client
+    saved = (client.client, client.generate_content)
+    calls = []
+    try:
+        client.client = object()
+        client.generate_content = fake_generate(calls)
+
+        data = preprocess_cv(CV_A)
+        print(f"CV data: {data}")
+        assert len(calls) == 1
+        assert data["name"] == "Alice Martin"
+        assert data["email"] == "alice@example.com"
+        assert data["experience_years"] == 4 and data["skill_ids"]
+        print("✅ One LLM call per CV")
+
+        calls.clear()
+        batch = preprocess_cv_batch([CV_A, CV_B])
+        assert len(calls) == 1
+        assert [d["skills"] for d in batch] == [["python", "django"], ["java"]]
+        # "Unknown" from the model falls back to the heuristic
+        assert batch[1]["name"] == "Bob Stone"
+        print("✅ Two short CVs packed into one call")
+    finally:
+        client.client, client.generate_content = saved
+
+    # Long CVs are not packed together
+    assert orc._pack_batches(["x" * 1500, "y" * 1500, "z" * 4000, "w" * 600], max_chars=3500) == [[2], [0, 1], [3]]
+
+    print("\n=== Structured CV Extraction Test Complete ===")
+
+if __name__ == "__main__":
+    test_cv_profile()
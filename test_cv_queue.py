@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the SQLite CV processing queue (status, workers, failures, recovery)
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+sys.path.append('.')
+
+from cv_queue import CVQueue
+
+def wait_for(queue, task_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = queue.status(task_id)
+        if status["status"] in ("done", "failed"):
+            return status
+        time.sleep(0.02)
+    raise AssertionError(f"task {task_id} still {status['status']}")
+
+def test_cv_queue():
+    print("=== Testing CV Queue ===")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "queue.db")
+
+        # Sans worker démarré : enqueue immédiat, la tâche attend avec sa position
+        queue = CVQueue(path=path, workers=0, poll_interval=0.05)
+        stages = []
+        def handle(payload, file_content, file_name, progress):
+            progress("processing_cv")
+            stages.append(queue.status(task_id)["stage"])
+            return {"name": file_name, "size": len(file_content), "skills": payload["skills"]}
+        queue.register("upload", handle)
+
+        task_id = queue.enqueue("upload", {"skills": ["python"]}, b"%PDF-1.4 cv", "cv.pdf")
+        second_id = queue.enqueue("upload", {"skills": []}, b"second", "second.pdf")
+        status = queue.status(task_id)
+        assert status["status"] == "queued" and status["queued_ahead"] == 0
+        assert queue.status(second_id)["queued_ahead"] == 1
+        assert "result" not in status and queue.status("unknown") is None
+        try:
+            queue.enqueue("unknown", {})
+            raise AssertionError("unknown kind accepted")
+        except ValueError:
+            pass
+
+        assert queue.run_once() is True
+        assert stages == ["processing_cv"]
+        done = queue.status(task_id, include_result=True)
+        assert done["status"] == "done" and done["attempts"] == 1
+        assert done["result"] == {"name": "cv.pdf", "size": 11, "skills": ["python"]}
+        assert queue.run_once() is True and queue.run_once() is False
+        print("✅ Tasks processed in order with progress and result")
+
+        # Échec du traitement : erreur enregistrée, le fichier n'est pas gardé
+        def broken(payload, file_content, file_name, progress):
+            raise ValueError("Could not extract skills from CV")
+        queue.register("broken", broken)
+        failed_id = queue.enqueue("broken", {}, b"x" * 100, "bad.pdf")
+        queue.run_once()
+        failed = queue.status(failed_id)
+        assert failed["status"] == "failed" and "Could not extract skills" in failed["error"]
+        conn = queue._connect()
+        assert conn.execute("SELECT file_content FROM cv_jobs WHERE id = ?", (failed_id,)).fetchone()[0] is None
+        conn.close()
+        print("✅ Failures recorded without keeping the upload")
+
+        # Plusieurs workers (deux files sur la même base, comme deux processus) : chaque tâche une seule fois
+        seen = []
+        lock = threading.Lock()
+        def count(payload, file_content, file_name, progress):
+            time.sleep(0.01)
+            with lock:
+                seen.append(payload["n"])
+            return payload["n"]
+        queues = [CVQueue(path=path, workers=3, poll_interval=0.05) for _ in range(2)]
+        for q in queues:
+            q.register("count", count)
+        ids = [queues[n % 2].enqueue("count", {"n": n}) for n in range(20)]
+        try:
+            for task in ids:
+                assert wait_for(queues[0], task)["status"] == "done"
+        finally:
+            for q in queues:
+                q.stop()
+        assert sorted(seen) == list(range(20)), seen
+        print("✅ Each task claimed by exactly one worker")
+
+        # Worker arrêté en cours de traitement : tâche remise en file, puis en échec après max_attempts
+        recovering = CVQueue(path=path, workers=0, stale_after=0, max_attempts=2)
+        recovering.register("upload", handle)
+        task_id = recovering.enqueue("upload", {"skills": []}, b"cv", "cv.pdf")
+        recovering._claim()
+        time.sleep(0.01)
+        assert recovering.requeue_stale() == 1
+        assert recovering.status(task_id)["status"] == "queued"
+        recovering._claim()
+        time.sleep(0.01)
+        assert recovering.requeue_stale() == 0
+        interrupted = recovering.status(task_id)
+        assert interrupted["status"] == "failed" and interrupted["attempts"] == 2
+        print("✅ Interrupted tasks requeued then given up")
+
+        # Une tâche abandonnée après le démarrage des workers est reprise sans redémarrage
+        crashed = CVQueue(path=path, workers=0)
+        crashed.register("upload", handle)
+        orphan_id = crashed.enqueue("upload", {"skills": []}, b"cv", "cv.pdf")
+        crashed._claim()
+        watcher = CVQueue(path=path, workers=1, poll_interval=0.05, stale_after=0.3)
+        watcher.register("upload", handle)
+        watcher.start()
+        try:
+            recovered = wait_for(watcher, orphan_id)
+        finally:
+            watcher.stop()
+        assert recovered["status"] == "done" and recovered["attempts"] == 2
+        print("✅ Stale tasks recovered periodically by running workers")
+
+        # Tâche plus longue que stale_after : le battement la garde "running", elle n'est pas relancée
+        runs = []
+        def slow(payload, file_content, file_name, progress):
+            runs.append(payload)
+            time.sleep(1.0)
+            return "ok"
+        long_running = CVQueue(path=path, workers=0, stale_after=0.3)
+        long_running.register("slow", slow)
+        slow_id = long_running.enqueue("slow", {}, b"cv", "cv.pdf")
+        worker = threading.Thread(target=long_running.run_once)
+        worker.start()
+        other_process = CVQueue(path=path, workers=0, stale_after=0.3)
+        while worker.is_alive():
+            assert other_process.requeue_stale() == 0
+            time.sleep(0.05)
+        worker.join()
+        finished = long_running.status(slow_id)
+        assert finished["status"] == "done" and finished["attempts"] == 1 and len(runs) == 1
+        print("✅ Long-running tasks kept alive by a heartbeat")
+
+        # Base verrouillée par un autre processus : l'erreur d'origine remonte, pas celle du ROLLBACK
+        blocker = sqlite3.connect(path, isolation_level=None)
+        blocker.execute("BEGIN IMMEDIATE")
+        busy = CVQueue(path=path, workers=0)
+        busy._ready = True
+        def short_timeout_connect():
+            conn = sqlite3.connect(path, timeout=0.05, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            return conn
+        busy._connect = short_timeout_connect
+        try:
+            busy._claim()
+            raise AssertionError("claim succeeded on a locked database")
+        except sqlite3.OperationalError as e:
+            assert "locked" in str(e), e
+        finally:
+            blocker.execute("ROLLBACK")
+            blocker.close()
+        print("✅ Locked database reported without a spurious rollback error")
+
+        # Ménage : les tâches terminées au-delà de la rétention sont supprimées au prochain enqueue
+        purging = CVQueue(path=path, workers=0, retention=0)
+        purging.register("upload", handle)
+        time.sleep(0.01)
+        purging.enqueue("upload", {"skills": []}, b"cv", "cv.pdf")
+        assert purging.status(failed_id) is None
+        assert set(purging.stats()) >= {"workers", "queued"}
+        print("✅ Finished tasks purged after retention")
+
+    return True
+
+if __name__ == "__main__":
+    test_cv_queue()
@@ -1,5 +1,10 @@
 # Test script for CV data extraction using the same technique as Adding Admin
 
+import os
+import tempfile
+
+import parsing
+from ocr_engine import OCREngine
 from parsing import parse_cv
 from preprocessing import preprocess_cv
 
@@ -12,24 +17,31 @@ def test_cv_extraction():
         "images/images.png"
     ]
 
-    for file_path in test_files:
+    # OCR cache in a temp dir, not ocr_cache.db in the repo
+    saved_ocr = parsing.ocr_engine
+    with tempfile.TemporaryDirectory() as tmp:
+        parsing.ocr_engine = OCREngine(cache_path=os.path.join(tmp, "ocr.db"))
         try:
-            print(f"\n--- Testing: {file_path} ---")
-
-            # Extract text
-            cv_text = parse_cv(file_path)
-            print(f"Text extracted: {len(cv_text)} characters")
-
-            # Extract data
-            cv_data = preprocess_cv(cv_text)
-
-            print(f"Name: {cv_data['name']}")
-            print(f"Email: {cv_data['email']}")
-            print(f"Phone: {cv_data['phone']}")
-            print(f"Skills: {cv_data['skills']}")
-
-        except Exception as e:
-            print(f"Error processing {file_path}: {e}")
+            for file_path in test_files:
+                try:
+                    print(f"\n--- Testing: {file_path} ---")
+
+                    # Extract text
+                    cv_text = parse_cv(file_path)
+                    print(f"Text extracted: {len(cv_text)} characters")
+
+                    # Extract data
+                    cv_data = preprocess_cv(cv_text)
+
+                    print(f"Name: {cv_data['name']}")
+                    print(f"Email: {cv_data['email']}")
+                    print(f"Phone: {cv_data['phone']}")
+                    print(f"Skills: {cv_data['skills']}")
+
+                except Exception as e:
+                    print(f"Error processing {file_path}: {e}")
+        finally:
+            parsing.ocr_engine = saved_ocr
 
 if __name__ == "__main__":
     test_cv_extraction()
\ No newline at end of file
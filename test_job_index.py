@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the inverted skill index gives the same results as a full scan
+"""
+
+import sys
+import json
+sys.path.append('.')
+
+from job_index import JobSkillIndex
+from matching import match_jobs
+
+def test_job_index():
+    print("=== Testing Job Skill Index ===")
+
+    with open("jobs.json", "r", encoding="utf-8") as f:
+        companies_data = json.load(f)
+
+    cv_data = {"skills": ["Python", "SQL", "aws", "machine learning", "docker"]}
+
+    index = JobSkillIndex.from_jobs(companies_data)
+    print(f"Indexed jobs: {len(index)}")
+
+    full_scan = match_jobs(cv_data, companies_data)
+    indexed = index.match(cv_data, k=None)
+
+    print(f"Full scan matches: {len(full_scan)}")
+    print(f"Index matches: {len(indexed)}")
+    assert len(full_scan) == len(indexed)
+    assert [j["match_score"] for j in full_scan] == [j["match_score"] for j in indexed]
+    for job in indexed[:3]:
+        print(f"- {job['title']} @ {job['company_name']}: {job['match_score']}% ({job['matched_skills']})")
+
+    # Incremental updates
+    index.add_job({"id": "new", "title": "Rust Engineer", "skills": ["rust"], "location": "Remote", "type": "full-time"})
+    assert index.match({"skills": ["rust"]}, k=1)[0]["title"] == "Rust Engineer"
+    index.remove_job("new")
+    assert all(j.get("id") != "new" for j in index.match({"skills": ["rust"]}, k=None))
+    print("✅ Incremental add/remove OK")
+
+    # IDF mode: a rare skill weighs more than a common one
+    idf_index = JobSkillIndex.from_jobs([
+        {"id": 1, "title": "Common", "skills": ["python", "sql"]},
+        {"id": 2, "title": "Rare", "skills": ["python", "rust"]},
+        {"id": 3, "title": "Other", "skills": ["python", "sql"]},
+    ])
+    idf_top = idf_index.match({"skills": ["sql", "rust"]}, k=1, mode="idf")
+    print(f"IDF top match: {idf_top[0]['title']} ({idf_top[0]['match_score']}%)")
+    assert idf_top[0]["title"] == "Rare"
+    assert len(idf_index.match({"skills": ["python"]}, k=2, mode="idf")) == 2
+
+    # A CV without skills touches no job
+    assert index.match({"skills": []}) == []
+
+    print("\n=== Job Skill Index Test Complete ===")
+
+if __name__ == "__main__":
+    test_job_index()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script to verify streaming top-k matching gives the same results as match_jobs
+"""
+
+import sys
+import io
+import os
+import json
+import tempfile
+sys.path.append('.')
+
+from job_stream import iter_json_array, stream_match_jobs
+from matching import match_jobs
+
+def test_job_stream():
+    print("=== Testing Streaming Job Matching ===")
+
+    with open("jobs.json", "r", encoding="utf-8") as f:
+        companies_data = json.load(f)
+
+    cv_data = {"skills": ["Python", "SQL", "aws", "machine learning", "docker"]}
+    full_scan = match_jobs(cv_data, companies_data)
+
+    # Tiny chunks force elements to be split across reads
+    with open("jobs.json", "r", encoding="utf-8") as f:
+        items = list(iter_json_array(f, chunk_size=7))
+    assert items == companies_data
+    assert list(iter_json_array(io.StringIO('[1, 22 ,{"a": [3]}, "x"]'), chunk_size=2)) == [1, 22, {"a": [3]}, "x"]
+    assert list(iter_json_array(io.StringIO("  [ ]"))) == []
+    print("✅ Incremental JSON array reader OK")
+
+    # A large element split across many chunks is decoded after a logarithmic number of reads
+    class CountingReader(io.StringIO):
+        reads = 0
+        def read(self, size=-1):
+            CountingReader.reads += 1
+            return super().read(size)
+    big = {"description": "x" * 500_000, "skills": ["python"]}
+    feed = CountingReader(json.dumps([big, 1]))
+    assert list(iter_json_array(feed, chunk_size=64)) == [big, 1]
+    assert CountingReader.reads < 30, CountingReader.reads
+
+    # A malformed element fails once it exceeds the maximum size, without reading the rest of the file
+    broken = '[{"a": 1,, "b": "' + "y" * 200_000 + '"}, 2]'
+    feed = io.StringIO(broken)
+    try:
+        list(iter_json_array(feed, chunk_size=64, max_element_size=4096))
+        raise AssertionError("malformed element accepted")
+    except ValueError:
+        pass
+    assert feed.tell() < 20_000
+    print("✅ Large and malformed elements handled in linear time")
+
+    streamed = stream_match_jobs(cv_data, "jobs.json", k=3)
+    print(f"Full scan matches: {len(full_scan)}, streamed top-3: {len(streamed)}")
+    assert [(j["title"], j["match_score"]) for j in streamed] == [(j["title"], j["match_score"]) for j in full_scan[:3]]
+    for job in streamed:
+        print(f"- {job['title']} @ {job['company_name']}: {job['match_score']}% ({job['matched_skills']})")
+
+    # JSONL feed: one company per line
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "jobs.jsonl")
+        with open(path, "w", encoding="utf-8") as f:
+            for company in companies_data:
+                f.write(json.dumps(company) + "\n")
+        streamed_jsonl = stream_match_jobs(cv_data, path, k=len(full_scan) + 5)
+    assert [j["match_score"] for j in streamed_jsonl] == [j["match_score"] for j in full_scan]
+    assert [j["company_name"] for j in streamed_jsonl] == [j["company_name"] for j in full_scan]
+    print("✅ JSONL feed OK")
+
+    assert stream_match_jobs({"skills": []}, "jobs.json", k=3) == []
+
+    print("\n=== Streaming Job Matching Test Complete ===")
+
+if __name__ == "__main__":
+    test_job_stream()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the versioned match cache on a temporary SQLite database
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append('.')
+
+import db
+from job_index import job_index
+from match_cache import match_cache, cached_job_matches
+
+def add_test_job(company_id, recruiter_id, title, skills):
+    return db.add_job(company_id, recruiter_id, "Engineer", title, "", "", "full-time",
+                      "2024-01-01", "Remote", skills, None, None, "EUR", 0, 0, [], "")
+
+def test_match_cache():
+    print("=== Testing Match Cache ===")
+
+    if db.DB_TYPE != 'sqlite':
+        print("⚠️ Skipped: SQLite only")
+        return
+
+    original_url = db.DATABASE_URL
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DATABASE_URL = 'sqlite:///' + os.path.join(tmp, 'cache.db')
+        job_index.invalidate()
+        match_cache.clear()
+        try:
+            db.create_tables()
+            db.add_recruiter("recruiter", "recruiter@test.com", "123")
+            recruiter_id = db.get_recruiter("recruiter@test.com", "123")['id']
+            company_id = db.add_company("Test Co", "", False, "", "")
+            add_test_job(company_id, recruiter_id, "Backend Developer", ["python", "sql"])
+
+            cv_data = {"skills": ["Python", "postgres"]}
+            version = db.get_catalog_version()
+            hits_before, misses_before = match_cache.hits, match_cache.misses
+
+            first = cached_job_matches(cv_data)
+            second = cached_job_matches({"skills": ["postgresql", "python"]})
+            print(f"First: {[j['title'] for j in first]}, second: {[j['title'] for j in second]}")
+            assert first == second
+            assert match_cache.misses == misses_before + 1
+            assert match_cache.hits == hits_before + 1
+
+            # Adding a job bumps the catalog version: the next lookup is a miss
+            add_test_job(company_id, recruiter_id, "Data Engineer", ["python"])
+            assert db.get_catalog_version() == version + 1
+            third = cached_job_matches(cv_data)
+            print(f"After add_job: {[j['title'] for j in third]}")
+            assert len(third) == 2
+            assert match_cache.misses == misses_before + 2
+
+            # A job change made behind the index's back (other process) is picked up too
+            db.bump_catalog_version()
+            assert len(cached_job_matches(cv_data)) == 2
+            print(f"Stats: {match_cache.stats()}")
+        finally:
+            db.DATABASE_URL = original_url
+            job_index.invalidate()
+            match_cache.clear()
+
+    print("\n=== Match Cache Test Complete ===")
+
+if __name__ == "__main__":
+    test_match_cache()
@@ -5,8 +5,11 @@ Test script to debug the job matching issue
 
 import sys
 import os
+import tempfile
 sys.path.append('.')
 
+import parsing
+from ocr_engine import OCREngine
 from parsing import parse_cv
 from preprocessing import preprocess_cv
 from matching import compute_score
@@ -15,14 +18,19 @@ import json
 def test_matching():
     print("=== Testing Job Matching ===")
 
-    # 1. Load CV
+    # 1. Load CV (OCR cache in a temp dir, not ocr_cache.db in the repo)
+    saved_ocr = parsing.ocr_engine
     try:
-        cv_text = parse_cv("cv_test.png")
+        with tempfile.TemporaryDirectory() as tmp:
+            parsing.ocr_engine = OCREngine(cache_path=os.path.join(tmp, "ocr.db"))
+            cv_text = parse_cv("cv_test.png")
         cv_data = preprocess_cv(cv_text)
         print(f"✅ CV loaded with skills: {cv_data.get('skills', [])}")
     except Exception as e:
         print(f"❌ Error loading CV: {e}")
         return
+    finally:
+        parsing.ocr_engine = saved_ocr
 
     # 2. Load jobs from JSON file
     try:
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the vectorized matching engine agrees with match_jobs
+"""
+
+import sys
+import json
+import numpy as np
+sys.path.append('.')
+
+from matching import match_jobs
+from matching_engine import MatrixMatcher
+
+def test_matching_engine():
+    print("=== Testing Matrix Matcher ===")
+
+    with open("jobs.json", "r", encoding="utf-8") as f:
+        companies_data = json.load(f)
+
+    matcher = MatrixMatcher(companies_data)
+    print(f"Jobs: {len(matcher)}, vocabulary: {len(matcher.skills)} skills")
+
+    cvs = [
+        {"skills": ["python", "sql", "machine learning"]},
+        {"skills": ["AWS", "Python", "penetration testing"]},
+        {"skills": ["cobol"]},
+        {"skills": []},
+    ]
+
+    batch_results = matcher.match_batch(cvs)
+    for cv_data, results in zip(cvs, batch_results):
+        expected = match_jobs(cv_data, companies_data)
+        print(f"\nCV skills: {cv_data['skills']} → {len(results)} matches")
+        assert [j["title"] for j in results] == [j["title"] for j in expected]
+        assert [j["match_score"] for j in results] == [j["match_score"] for j in expected]
+        for job, ref in zip(results, expected):
+            assert sorted(job["matched_skills"]) == sorted(ref["matched_skills"])
+            print(f"- {job['title']}: {job['match_score']}% ({job['matched_skills']})")
+
+    scores = matcher.score_batch(cvs)
+    print(f"\nScore matrix shape: {scores.shape}")
+    assert scores.shape == (len(cvs), len(matcher))
+
+    top1 = matcher.match(cvs[0], k=1)
+    assert len(top1) == 1
+
+    # Partial top-k selection: same jobs and order as the full ranking, ties included
+    for cv_data, results in zip(cvs, batch_results):
+        for k in (1, 2, 3, 5, len(results), len(results) + 3):
+            top = matcher.match(cv_data, k=k)
+            assert [(j["title"], j["match_score"]) for j in top] == \
+                [(j["title"], j["match_score"]) for j in results[:k]]
+
+    # Many ex aequo at the k-th score: ties keep the original job order
+    skill_sets = [["python"], ["python", "sql"], ["sql"], ["python", "go"]]
+    synthetic = [{"company": "Acme", "jobs": [
+        {"title": f"Job {i}", "skills": skill_sets[i % len(skill_sets)]} for i in range(40)
+    ]}]
+    tied = MatrixMatcher(synthetic)
+    full = tied.match(cvs[0])
+    for k in (1, 7, 10, 11, 25):
+        assert [j["title"] for j in tied.match(cvs[0], k=k)] == [j["title"] for j in full[:k]]
+
+    # Sparse counts equal the dense CV × jobsᵀ product
+    dense_jobs = np.zeros((len(matcher), len(matcher.skills)), dtype=np.int32)
+    for row in range(len(matcher)):
+        dense_jobs[row, matcher.indices[matcher.indptr[row]:matcher.indptr[row + 1]]] += 1
+    cv_matrix = matcher.cv_matrix(cvs)
+    assert (matcher._counts(cv_matrix) == cv_matrix.astype(np.int32) @ dense_jobs.T).all()
+
+    empty = MatrixMatcher([])
+    assert empty.match(cvs[0]) == [] and empty.score_batch(cvs).shape == (len(cvs), 0)
+
+    print("\n=== Matrix Matcher Test Complete ===")
+
+if __name__ == "__main__":
+    test_matching_engine()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test script to verify OCR fan-out to the process pool and the page-hash cache
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append('.')
+
+from PIL import Image, ImageDraw
+from ocr_engine import OCREngine, image_key
+
+def fake_recognize(payload):
+    """Remplace Tesseract (top-level : exécuté dans les processus du pool)"""
+    cmd, lang, mode, size, data = payload
+    return f"{cmd}|{lang}|{mode}|{size[0]}x{size[1]}|{os.getpid()}"
+
+def slow_recognize(payload):
+    """Page longue à reconnaître : pages sur/après l'échéance"""
+    time.sleep(1.0)
+    return fake_recognize(payload)
+
+def page(label, mode="RGB"):
+    image = Image.new(mode, (120, 40), "white")
+    ImageDraw.Draw(image).text((5, 10), label, fill="black")
+    return image
+
+def test_ocr_engine():
+    print("=== Testing OCR Engine ===")
+
+    assert image_key(page("a")) == image_key(page("a"))
+    assert image_key(page("a")) != image_key(page("b"))
+    assert image_key(page("a"), lang="eng") != image_key(page("a"), lang="fra")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, "ocr.db")
+        engine = OCREngine(tesseract_cmd="/opt/tesseract", workers=2, cache_path=cache_path, recognize=fake_recognize)
+        try:
+            images = [page(f"page {i}") for i in range(4)] + [page("page 0")]
+            texts = engine.ocr(images)
+            assert all(text.startswith("/opt/tesseract|eng|RGB|120x40|") for text in texts)
+            assert texts[0] == texts[4]
+            assert any(text.rsplit("|", 1)[1] != str(os.getpid()) for text in texts), "pages should run in the pool"
+            assert engine.stats()["misses"] == 4 and engine.stats()["entries"] == 4
+            print("✅ Distinct pages recognized in the process pool")
+
+            # Palette convertie en RGB avant l'envoi au pool
+            assert engine.ocr_image(page("palette").convert("P")).split("|")[2] == "RGB"
+        finally:
+            engine.shutdown()
+
+        # Nouveau processus / redémarrage : le cache SQLite suffit, Tesseract n'est plus appelé
+        def must_not_run(payload):
+            raise AssertionError("cached page OCR'd again")
+        restarted = OCREngine(workers=2, cache_path=cache_path, recognize=must_not_run)
+        assert restarted.ocr([page("page 3"), page("page 1")]) == [texts[3], texts[1]]
+        assert restarted.stats()["hits"] == 2
+        print("✅ Re-uploaded pages served from the cache")
+
+        # Raw pixels read once per page, shared by the cache key and the OCR payload
+        assert image_key(page("a"), data=page("a").tobytes()) == image_key(page("a"))
+        calls = []
+        original_tobytes = Image.Image.tobytes
+        def counting_tobytes(self, *args, **kwargs):
+            calls.append(self.size)
+            return original_tobytes(self, *args, **kwargs)
+        single = OCREngine(workers=1, cache_path=os.path.join(tmp, "single.db"), recognize=fake_recognize)
+        new_pages = [page("new 1"), page("new 2")]
+        Image.Image.tobytes = counting_tobytes
+        try:
+            single.ocr(new_pages)
+        finally:
+            Image.Image.tobytes = original_tobytes
+        assert len(calls) == 2, calls
+        print("✅ Page bytes extracted once")
+
+        # Deadline: pages not recognized in time come back as None and are not cached
+        slow = OCREngine(workers=2, cache_path=os.path.join(tmp, "slow.db"), recognize=slow_recognize)
+        try:
+            slow.ocr([page("warm 1"), page("warm 2")])  # pool started outside the timing
+            started = time.monotonic()
+            texts = slow.ocr([page(f"late {i}") for i in range(4)], deadline=time.monotonic() + 0.3)
+            assert time.monotonic() - started < 0.9
+            assert texts == [None] * 4 and slow.stats()["entries"] == 2
+        finally:
+            slow.shutdown()
+        print("✅ OCR stops waiting at the deadline")
+
+    return True
+
+if __name__ == "__main__":
+    test_ocr_engine()
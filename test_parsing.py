@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test script to verify PDF extraction stays in memory and the optional text store is content-addressed
+"""
+
+import sys
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append('.')
+
+import parsing
+from parsing import (extract_text_from_pdf, store_extracted_text, parse_cv, parse_cv_bytes,
+                     parse_cv_bytes_bounded, parse_cv_bounded, ParseBudget)
+from cv_cache import is_cacheable
+from ocr_engine import OCREngine
+from bench_parsing import make_text_pdf as make_pdf
+
+PDF = os.path.abspath("data/IT_exercices.pdf")
+
+def test_parsing():
+    print("=== Testing In-Memory PDF Extraction ===")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            text = extract_text_from_pdf(PDF, store_dir="")
+            assert text.strip()
+            assert parse_cv(PDF) == text
+            assert os.listdir(tmp) == [], "no artifact should be written by default"
+            print(f"✅ {len(text)} characters extracted, nothing written to disk")
+
+            store = os.path.join(tmp, "store")
+            texts = [f"CV number {i}\nPython" for i in range(8)] * 2
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                paths = list(pool.map(lambda t: store_extracted_text(t, store), texts))
+            assert len(set(paths)) == 8
+            assert sorted(os.listdir(store)) == sorted(os.path.basename(p) for p in set(paths))
+            for t, p in zip(texts, paths):
+                with open(p, encoding="utf-8") as f:
+                    assert f.read() == t
+            assert extract_text_from_pdf(PDF, store_dir=store) == text
+            assert len(os.listdir(store)) == 9
+            print("✅ Concurrent uploads get one file per content")
+
+            # Uploads : octets en mémoire passés directement aux extracteurs
+            saved = parsing.tempfile.NamedTemporaryFile
+            def no_temp_file(*args, **kwargs):
+                raise AssertionError("uploads must not go through a temp file")
+            parsing.tempfile.NamedTemporaryFile = no_temp_file
+            try:
+                with open(PDF, "rb") as f:
+                    content = f.read()
+                assert parse_cv_bytes(content, "cv.pdf") == text
+
+                import docx
+                document = docx.Document()
+                document.add_paragraph("Alice Martin")
+                document.add_paragraph("Python, Django")
+                buffer = io.BytesIO()
+                document.save(buffer)
+                assert parse_cv_bytes(buffer.getvalue(), "cv.docx") == "Alice Martin\nPython, Django"
+                assert parse_cv_bytes("Alice\nPython".encode("utf-8"), "cv.txt") == "Alice\nPython"
+
+                try:
+                    parse_cv_bytes(content, "cv.pdf", max_bytes=1000)
+                    assert False, "oversized upload accepted"
+                except ValueError:
+                    pass
+            finally:
+                parsing.tempfile.NamedTemporaryFile = saved
+            assert os.listdir(tmp) == ["store"]
+            print("✅ Uploads parsed in memory, size capped")
+
+            # Niveaux : couche texte rapide, pdfplumber si nécessaire, OCR des seules pages vides
+            pdf = make_pdf([
+                ["Alice Martin - Senior Python developer", "Skills: Python, Django, Docker, AWS"],
+                [],
+                ["Experience: 2015 - 2020 Backend engineer at Acme Corp"],
+            ])
+            ocr_calls = []
+            saved_ocr = parsing.ocr_engine
+            parsing.ocr_engine = OCREngine(
+                workers=1, cache_path=os.path.join(tmp, "ocr.db"),
+                recognize=lambda payload: ocr_calls.append(payload[3]) or "Scanned page: Kubernetes",
+            )
+            try:
+                pages, stats = parsing.extract_pdf_pages(io.BytesIO(pdf), dpi=72)
+                _, stats_again = parsing.extract_pdf_pages(io.BytesIO(pdf), dpi=72)
+                _, stats_blank = parsing.extract_pdf_pages(io.BytesIO(make_pdf([[]] * 4)), dpi=36, max_ocr_pages=2)
+            finally:
+                parsing.ocr_engine = saved_ocr
+            assert stats == {"pages": 3, "total_pages": 3, "fast_pages": 2, "layout_pages": 1,
+                             "ocr_pages": 1, "truncated_by": None}, stats
+            assert "Django" in pages[0] and "Acme" in pages[2]
+            assert pages[1] == "Scanned page: Kubernetes"
+            # Second upload served from the OCR cache; identical blank pages recognized once
+            assert ocr_calls[0] == (595, 842) and len(ocr_calls) == 2
+            assert stats_again == stats
+
+            assert stats_blank["layout_pages"] == 4 and stats_blank["ocr_pages"] == 2
+
+            # Deadline checked per OCR page: slow pages past the deadline are dropped, not awaited
+            parsing.ocr_engine = OCREngine(
+                workers=1, cache_path=os.path.join(tmp, "slow_ocr.db"),
+                recognize=lambda payload: time.sleep(0.5) or "Scanned page: Kubernetes",
+            )
+            try:
+                started = time.monotonic()
+                pages, stats = parsing.extract_pdf_pages(
+                    io.BytesIO(make_pdf([[f"p{i}"] for i in range(4)])), dpi=36, budget=ParseBudget(timeout=0.3))
+                elapsed = time.monotonic() - started
+            finally:
+                parsing.ocr_engine = saved_ocr
+            assert stats["ocr_pages"] == 1 and stats["truncated_by"] == "deadline", stats
+            assert pages[0] == "Scanned page: Kubernetes" and pages[1] == "p1"
+            assert elapsed < 1.0, elapsed
+
+            _, stats = parsing.extract_pdf_pages(PDF)
+            assert stats["layout_pages"] == 2  # texte rapide découpé mot par mot
+            print("✅ Tiered extraction: OCR only on pages without a text layer")
+
+            # Budgets : pages, caractères, échéance → texte partiel et motif de troncature
+            line = "Python Django Docker developer with cloud experience on AWS and Kubernetes"
+            long_pdf = make_pdf([[f"Page {i}", line, line] for i in range(30)])
+
+            pages, stats = parsing.extract_pdf_pages(io.BytesIO(long_pdf), budget=ParseBudget(max_pages=3))
+            assert len(pages) == 3 and stats["total_pages"] == 30 and stats["truncated_by"] == "pages"
+
+            stream = io.BytesIO(long_pdf)
+            stream.name = "long.pdf"
+            result = parse_cv_bounded(stream, ParseBudget(max_chars=500))
+            assert result["truncated"] and result["truncated_by"] == "chars"
+            assert len(result["text"]) == 500 and result["text"].startswith("Page 0")
+
+            stream.seek(0)
+            result = parse_cv_bounded(stream, ParseBudget(timeout=1e-9))
+            assert result == {"text": "", "truncated": True, "truncated_by": "deadline"}
+
+            stream.seek(0)
+            assert parse_cv_bounded(stream, ParseBudget())["truncated"] is False
+
+            text = parse_cv_bytes(long_pdf, "long.pdf")  # budget par défaut des uploads
+            assert "Page 9" in text and "Page 10" not in text
+
+            # The flag reaches the caller; a deadline cut is never cached, a page cut is
+            result = parse_cv_bytes_bounded(long_pdf, "long.pdf", budget=ParseBudget(timeout=1e-9))
+            assert result["truncated_by"] == "deadline"
+            assert not is_cacheable({"extraction_tier": "local", "truncated_by": result["truncated_by"]})
+            assert parse_cv_bytes_bounded(long_pdf, "long.pdf")["truncated_by"] == "pages"
+            assert is_cacheable({"extraction_tier": "local", "truncated_by": "pages"})
+
+            import docx
+            document = docx.Document()
+            for i in range(200):
+                document.add_paragraph(f"Paragraph {i}: {line}")
+            buffer = io.BytesIO()
+            document.save(buffer)
+            text = parse_cv_bytes(buffer.getvalue(), "long.docx", budget=ParseBudget(max_chars=300))
+            assert len(text) <= 300 and "Paragraph 10" not in text
+            print("✅ Page, character and deadline budgets return partial text")
+        finally:
+            os.chdir(cwd)
+
+    return True
+
+if __name__ == "__main__":
+    test_parsing()
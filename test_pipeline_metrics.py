@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test script to verify per-stage timing, percentiles, token accounting and the JSONL trace
+"""
+
+import sys
+import os
+import json
+import tempfile
+from types import SimpleNamespace
+sys.path.append('.')
+
+import openrouter_client as orc
+import preprocessing
+from parsing import parse_cv
+from pipeline_metrics import PipelineMetrics, pipeline_metrics, percentile
+
+class FakeCompletions:
+    def create(self, **kwargs):
+        content = json.dumps({"name": "Bob Durand", "skills": ["python"]})
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(prompt_tokens=120, completion_tokens=30),
+        )
+
+def test_pipeline_metrics():
+    print("=== Testing Pipeline Metrics ===")
+
+    assert percentile([1, 2, 3, 4, 5], 50) == 3
+    assert percentile([10, 20], 90) == 19
+    assert percentile([], 50) is None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        trace_path = os.path.join(tmp, "trace.jsonl")
+        metrics = PipelineMetrics(window=3, trace_path=trace_path)
+        with metrics.trace("cv-1"):
+            for size in (10, 20, 30, 40):
+                with metrics.stage("parse_cv", input_size=size):
+                    metrics.annotate(cache="miss" if size < 40 else "hit")
+            with metrics.stage("preprocess_cv"):
+                with metrics.stage("preprocess_llm"):
+                    metrics.add_tokens(100, 20)
+        try:
+            with metrics.stage("parse_cv"):
+                raise ValueError("broken")
+        except ValueError:
+            pass
+
+        stats = metrics.stats()
+        assert stats["parse_cv"]["count"] == 5 and stats["parse_cv"]["window"] == 3
+        assert stats["parse_cv"]["errors"] == 1
+        assert stats["parse_cv"]["cache"] == {"miss": 1, "hit": 1}
+        assert stats["preprocess_cv"]["prompt_tokens"] == 100
+        assert stats["preprocess_llm"]["completion_tokens"] == 20
+        assert stats["parse_cv"]["p50_ms"] <= stats["parse_cv"]["p99_ms"] <= stats["parse_cv"]["max_ms"]
+
+        with open(trace_path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        assert len(lines) == 7
+        assert {line["trace_id"] for line in lines[:6]} == {"cv-1"} and lines[6]["trace_id"] is None
+        print("✅ Rolling stats and JSONL trace")
+
+    # Pipeline réel : parse_cv + preprocess_cv avec un LLM factice qui renvoie l'usage en tokens
+    client = orc.openrouter_client
+    saved = client.client
+    pipeline_metrics.reset()
+    try:
+        client.client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cv.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("Worked on various internal projects. Python.")
+            with pipeline_metrics.trace("upload-1"):
+                preprocessing.preprocess_cv(parse_cv(path))
+    finally:
+        client.client = saved
+
+    stats = pipeline_metrics.stats()
+    assert stats["parse_cv"]["count"] == 1 and stats["parse_cv"]["mean_input_size"] == 44
+    assert stats["preprocess_cv"]["prompt_tokens"] == 120
+    assert stats["preprocess_llm"]["completion_tokens"] == 30
+    assert pipeline_metrics.recent("preprocess_cv")[0]["tier"] == "llm"
+    assert pipeline_metrics.recent("parse_cv")[0]["trace_id"] == "upload-1"
+    print("✅ CV pipeline instrumented")
+    pipeline_metrics.reset()
+
+    return True
+
+if __name__ == "__main__":
+    test_pipeline_metrics()
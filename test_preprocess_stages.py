@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test script to verify preprocessing stages and their timeouts (counted from stage start)
+"""
+
+import sys
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append('.')
+
+import openrouter_client as orc
+import preprocessing
+
+CV = "Alice Martin\nalice@example.com\n+33 6 12 34 56 78\nPython, Django, Docker"
+
+def slow_generate(delay):
+    def generate_content(prompt, max_tokens=1000):
+        time.sleep(delay)
+        return json.dumps({"name": "Alice Martin", "skills": ["python", "django", "docker"]})
+    return generate_content
+
+def test_preprocess_stages():
+    print("=== Testing Preprocessing Stages ===")
+
+    client = orc.openrouter_client
+    saved = (client.client, client.generate_content, preprocessing._stage_pool,
+             preprocessing.LLM_STAGE_TIMEOUT, preprocessing.STAGE_QUEUE_TIMEOUT)
+    try:
+        client.client = object()
+        client.generate_content = slow_generate(0.1)
+        data = preprocessing.preprocess_cv(CV)
+        assert data["name"] == "Alice Martin" and data["email"] == "alice@example.com"
+        assert data["skills"] == ["python", "django", "docker"] and data["extraction_tier"] == "llm"
+        print("✅ Local stages inline, LLM stage on the pool")
+
+        # Pool busy with other uploads: waiting for a thread does not count against the LLM timeout
+        preprocessing._stage_pool = ThreadPoolExecutor(max_workers=1)
+        preprocessing.LLM_STAGE_TIMEOUT = 0.3
+        preprocessing._stage_pool.submit(time.sleep, 0.4)
+        queued = preprocessing.preprocess_cv(CV)
+        assert queued["extraction_tier"] == "llm", queued
+        print("✅ Timeout starts when the stage starts running")
+
+        # LLM slower than its timeout: local extraction is used, same dict shape
+        client.generate_content = slow_generate(1.0)
+        preprocessing.LLM_STAGE_TIMEOUT = 0.2
+        started = time.perf_counter()
+        fallback = preprocessing.preprocess_cv(CV)
+        assert time.perf_counter() - started < 0.8
+        assert set(fallback) == set(data)
+        assert fallback["name"] == "Alice Martin" and fallback["extraction_tier"] == "fallback"
+        assert "python" in fallback["skills"]
+        print("✅ LLM timeout falls back to local extraction")
+
+        # No free thread within the queue timeout: the stage is dropped without ever running
+        preprocessing._stage_pool = ThreadPoolExecutor(max_workers=1)
+        preprocessing.STAGE_QUEUE_TIMEOUT = 0.1
+        preprocessing._stage_pool.submit(time.sleep, 0.5)
+        calls = []
+        client.generate_content = lambda prompt, max_tokens=1000: calls.append(prompt)
+        results = preprocessing._run_stages(CV, {"profile": (preprocessing.extract_cv_profile, 5)})
+        assert results["profile"] is preprocessing._STAGE_TIMEOUT
+        time.sleep(0.5)
+        assert calls == []
+        print("✅ Queue wait bounded")
+    finally:
+        (client.client, client.generate_content, preprocessing._stage_pool,
+         preprocessing.LLM_STAGE_TIMEOUT, preprocessing.STAGE_QUEUE_TIMEOUT) = saved
+
+    print("\n=== Preprocessing Stages Test Complete ===")
+
+if __name__ == "__main__":
+    test_preprocess_stages()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the single-pass skill automaton and its word boundaries
+"""
+
+import sys
+sys.path.append('.')
+
+from skill_automaton import SkillAutomaton
+from skill_taxonomy import skill_taxonomy
+from preprocessing import extract_skills
+
+def test_skill_automaton():
+    print("=== Testing Skill Automaton ===")
+
+    # No hits inside other words
+    assert skill_taxonomy.automaton.find("Worked at Google on search results") == []
+    assert extract_skills("Pythonic scripts") == []
+    print("✅ 'go' in 'google' and 'ts' in 'results' are ignored")
+
+    skills = extract_skills("Go, TypeScript (ts) and C++ / C#; Node.js backend\nMachine\nLearning")
+    print(f"Extracted skills: {skills}")
+    for expected in ["go", "typescript", "c++", "c#", "javascript", "machine learning"]:
+        assert expected in skills, expected
+
+    # Same canonical skills as the old substring scan whenever aliases are whole words
+    text = "Skills: python, mysql, docker, kubernetes, rust, swift, graphql, nlp"
+    old_scan = {c for c, aliases in skill_taxonomy.variations.items() if any(a in text.lower() for a in aliases)}
+    assert set(extract_skills(text)) == old_scan
+
+    # Overlapping patterns are all reported
+    automaton = SkillAutomaton({"he": "he", "she": "she", "hers": "hers", "c++": "cpp"})
+    assert automaton.find("she said hers c++17 c++") == ["she", "hers", "cpp"]
+    assert automaton.find_all("x he") == [(2, 4, "he")]
+
+    # Runs of spaces / line breaks inside a multi-word alias still match, offsets stay in the original text
+    assert "machine learning" in extract_skills("Machine  learning and\tdeep \r\n learning")
+    automaton = SkillAutomaton({"machine learning": "ml", "deep learning": "dl", "go": "go"})
+    assert automaton.find("Machine  learning and\tdeep \r\n learning") == ["ml", "dl"]
+    assert automaton.find_all("use  machine \n\n learning, go") == [(5, 24, "ml"), (26, 28, "go")]
+
+    assert extract_skills("") == []
+
+    print("\n=== Skill Automaton Test Complete ===")
+
+if __name__ == "__main__":
+    test_skill_automaton()
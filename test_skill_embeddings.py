@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Test script to verify semantic skill matching and the persistent vector cache
+"""
+
+import sys
+import os
+import tempfile
+import numpy as np
+sys.path.append('.')
+
+import skill_embeddings
+from skill_embeddings import SkillEmbeddingStore
+from job_index import JobSkillIndex
+
+# Toy encoder: "pytorch" and "keras" point the same way
+TOY_VECTORS = {
+    "pytorch": [1.0, 0.1, 0.0],
+    "keras": [0.95, 0.0, 0.1],
+    "sql": [0.0, 1.0, 0.0],
+    "javascript": [0.0, 0.0, 1.0],
+    "python": [0.0, 0.5, 0.5],
+}
+
+def test_skill_embeddings():
+    print("=== Testing Semantic Skill Matching ===")
+    encoded = []
+
+    def toy_encoder(texts):
+        encoded.extend(texts)
+        return np.array([TOY_VECTORS.get(t, [0.1, 0.1, 0.1]) for t in texts])
+
+    def broken_encoder(texts):
+        raise OSError("We couldn't connect to 'https://huggingface.co' to load this model")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "skill_vectors")
+        store = SkillEmbeddingStore(path=path, encoder=toy_encoder, save_delay=60)
+        default_store = skill_embeddings.skill_embeddings
+        skill_embeddings.skill_embeddings = store
+        try:
+            index = JobSkillIndex.from_jobs([
+                {"id": 1, "title": "ML Engineer", "skills": ["keras", "python"]},
+                {"id": 2, "title": "Data Analyst", "skills": ["sql"]},
+            ])
+
+            exact = index.match({"skills": ["PyTorch"]}, k=3, mode="count")
+            semantic = index.match({"skills": ["PyTorch"]}, k=3, mode="semantic")
+            print(f"Exact matches: {len(exact)}, semantic matches: {[j['title'] for j in semantic]}")
+            assert len(exact) == 0
+            assert semantic[0]["title"] == "ML Engineer"
+            assert semantic[0]["matched_skills"] == ["keras"]
+
+            # New vectors are written later in one batch, not during the request
+            assert not os.path.exists(path + ".npy")
+            store.flush()
+            assert os.path.exists(path + ".npy")
+
+            # Skills seen before are never re-encoded, even by a fresh store
+            count_before = len(encoded)
+            index.match({"skills": ["PyTorch"]}, k=3, mode="semantic")
+            assert len(encoded) == count_before
+            reloaded = SkillEmbeddingStore(path=path, encoder=toy_encoder)
+            reloaded.vectors(["pytorch", "sql"])
+            assert len(encoded) == count_before
+            print(f"✅ {len(reloaded.skills)} skills loaded from disk without re-encoding")
+
+            # A skill no job asks for any more is dropped from the semantic candidates
+            index.remove_job(1)
+            assert index.match({"skills": ["PyTorch"]}, k=3, mode="semantic") == []
+            assert set(index.skill_names.values()) == {"sql"}
+            print("✅ Removed jobs' skills pruned")
+
+            # Model that cannot be loaded: semantic mode falls back to exact matching
+            skill_embeddings.skill_embeddings = SkillEmbeddingStore(path=os.path.join(tmp, "offline"),
+                                                                    encoder=broken_encoder)
+            index = JobSkillIndex.from_jobs([{"id": 1, "title": "ML Engineer", "skills": ["keras", "python"]}])
+            fallback = index.match({"skills": ["Python", "PyTorch"]}, k=3, mode="semantic")
+            assert fallback == index.match({"skills": ["Python", "PyTorch"]}, k=3, mode="count")
+            assert fallback[0]["match_score"] == 50.0
+            print("✅ Encoder failure falls back to count mode")
+        finally:
+            skill_embeddings.skill_embeddings = default_store
+
+    print("\n=== Semantic Skill Matching Test Complete ===")
+
+if __name__ == "__main__":
+    test_skill_embeddings()
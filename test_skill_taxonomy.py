@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the shared skill taxonomy file and its hot reload
+"""
+
+import sys
+import os
+import json
+import time
+import tempfile
+sys.path.append('.')
+
+from skill_taxonomy import SkillTaxonomy, skill_taxonomy
+from skill_vocabulary import skill_vocabulary
+from openrouter_client import _basic_skill_extraction
+
+def write_taxonomy(path, skills):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "skills": skills}, f)
+
+def test_skill_taxonomy():
+    print("=== Testing Skill Taxonomy ===")
+
+    # Shared file: same canonical names for the extractors and the matcher
+    assert skill_taxonomy.category_of("golang") == "language"
+    assert skill_vocabulary.canonical("Postgres") == "sql"
+    basic = _basic_skill_extraction("Python, Django and Docker on AWS")
+    print(f"Basic extraction: {basic}")
+    assert basic["programming_languages"] == ["python"]
+    assert basic["frameworks"] == ["django"]
+    assert basic["tools"] == ["docker", "aws"]
+
+    # Displayed skills are the ones written in the CV, not their canonical group
+    basic = _basic_skill_extraction("Flask and React apps on Kubernetes and Azure, Java Spring")
+    assert basic["skills"] == ["flask", "react", "kubernetes", "azure", "java spring"]
+    assert basic["frameworks"] == ["flask", "java spring"] and basic["tools"] == ["kubernetes", "azure"]
+    assert skill_taxonomy.extract_surface("Kubernetes,  Machine\nLearning") == ["Kubernetes", "Machine Learning"]
+    assert skill_vocabulary.encode(basic["skills"]) == skill_vocabulary.encode(["django", "javascript", "docker", "aws", "spring"])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "taxonomy.json")
+        write_taxonomy(path, [{"name": "python", "category": "language", "aliases": ["py"]}])
+        taxonomy = SkillTaxonomy(path, check_interval=0)
+        first = taxonomy.current()
+        assert taxonomy.extract("py and rust") == ["python"]
+
+        # Unchanged file: same compiled instance
+        assert taxonomy.current() is first
+
+        # New mtime: recompiled and swapped
+        write_taxonomy(path, [
+            {"name": "python", "category": "language", "aliases": ["py"]},
+            {"name": "rust", "category": "language", "aliases": ["rustlang"]},
+        ])
+        os.utime(path, ns=(time.time_ns(), first.mtime + 1_000_000))
+        assert taxonomy.extract("py and rustlang") == ["python", "rust"]
+        assert taxonomy.generation == first.generation + 1
+        print("✅ Hot reload OK")
+
+        # Invalid file: previous version kept
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("{not json")
+        os.utime(path, ns=(time.time_ns(), first.mtime + 2_000_000))
+        assert taxonomy.extract("rustlang") == ["rust"]
+        print("✅ Invalid file ignored")
+
+    print("\n=== Skill Taxonomy Test Complete ===")
+
+if __name__ == "__main__":
+    test_skill_taxonomy()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the canonical skill vocabulary
+"""
+
+import sys
+sys.path.append('.')
+
+from skill_vocabulary import skill_vocabulary
+from matching import compute_score, match_jobs, top_job_matches
+
+def test_skill_vocabulary():
+    print("=== Testing Skill Vocabulary ===")
+
+    # Aliases share the same canonical id
+    for a, b in [("postgres", "PostgreSQL"), ("golang", "Go"), ("K8s", "docker"), ("Node.js", "javascript")]:
+        print(f"{a} → {skill_vocabulary.id_of(a)}, {b} → {skill_vocabulary.id_of(b)}")
+        assert skill_vocabulary.id_of(a) == skill_vocabulary.id_of(b)
+
+    # Unknown skills still get a stable id of their own
+    assert skill_vocabulary.id_of("COBOL") == skill_vocabulary.id_of("cobol")
+    assert skill_vocabulary.id_of("cobol") != skill_vocabulary.id_of("fortran")
+
+    ids = skill_vocabulary.encode(["Python", "python", "postgres", "sql"])
+    print(f"Encoded ids: {ids} → {skill_vocabulary.decode(ids)}")
+    assert ids == sorted(ids) and len(ids) == 2
+
+    score, matched = compute_score({"skills": ["postgres", "python"]}, ["PostgreSQL", "Python", "Redis"])
+    print(f"Score: {score}% matched: {matched}")
+    assert score == 66.67
+    assert compute_score({"skills": ["python"]}, ["Redis"]) == (0.0, [])
+
+    # The CV is encoded once per call, not once per job, and the caller's dict is left untouched
+    jobs = [{"title": f"Job {i}", "skills": ["Python", "Redis"]} for i in range(50)]
+    cv_data = {"skills": ["python", "postgres"]}
+    encoded = []
+    original_encode = skill_vocabulary.encode
+    skill_vocabulary.encode = lambda skills: encoded.append(skills) or original_encode(skills)
+    try:
+        matches = match_jobs(cv_data, jobs)
+        top = top_job_matches(cv_data, jobs, k=3)
+    finally:
+        skill_vocabulary.encode = original_encode
+    assert len(matches) == 50 and matches[0]["matched_skills"] == ["python"] and len(top) == 3
+    assert len(encoded) == 2, len(encoded)
+    assert cv_data == {"skills": ["python", "postgres"]}
+    print("✅ CV skills encoded once per matching call")
+
+    print("\n=== Skill Vocabulary Test Complete ===")
+
+if __name__ == "__main__":
+    test_skill_vocabulary()
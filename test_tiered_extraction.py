@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the local rule pass and the confidence-gated LLM call
+"""
+
+import sys
+import json
+from datetime import date
+sys.path.append('.')
+
+import openrouter_client as orc
+import preprocessing
+from cv_rules import estimate_experience_years, detect_education_level, local_confidence
+
+CLEAN_CV = """Alice Martin
+alice@example.com
++33 6 12 34 56 78
+Senior developer with 7 years of experience
+Skills: Python, Django, Docker, PostgreSQL, React, AWS
+Master in Computer Science
+"""
+
+SPARSE_CV = "Worked on various internal projects. Python."
+
+def counting_generate(calls):
+    def generate_content(prompt, max_tokens=1000):
+        calls.append(prompt)
+        return json.dumps({"name": "Bob Durand", "skills": ["python", "kubernetes"]})
+    return generate_content
+
+def test_tiered_extraction():
+    print("=== Testing Tiered CV Extraction ===")
+
+    # Règles locales
+    assert estimate_experience_years("5+ years of experience in backend") == 5
+    assert estimate_experience_years("2010 - 2015 Dev\n2014 - 2020 Lead", today=date(2024, 1, 1)) == 10
+    assert estimate_experience_years("Nothing dated here") is None
+    assert detect_education_level("MSc Data Science, BSc Maths") == "Master"
+    assert detect_education_level("Certified Scrum Master") is None
+    assert local_confidence({"name": True, "email": True, "phone": True, "skills": 5,
+                             "experience": True, "education": True}) == 1.0
+    assert local_confidence({}) == 0.0
+    print("✅ Rules")
+
+    client = orc.openrouter_client
+    saved = (client.client, client.generate_content)
+    calls = []
+    try:
+        client.client = object()
+        client.generate_content = counting_generate(calls)
+
+        data = preprocessing.preprocess_cv(CLEAN_CV)
+        assert calls == []
+        assert data["name"] == "Alice Martin" and data["email"] == "alice@example.com"
+        assert data["experience_years"] == 7 and data["education_level"] == "Master"
+        assert {"python", "django", "docker", "sql", "javascript", "aws"} <= set(data["skills"])
+        print("✅ Clean CV extracted locally, no LLM call")
+
+        data = preprocessing.preprocess_cv(SPARSE_CV)
+        assert len(calls) == 1
+        assert data["skills"] == ["python", "kubernetes"]
+        print("✅ Sparse CV sent to the LLM")
+
+        calls.clear()
+        batch = preprocessing.preprocess_cv_batch([CLEAN_CV, SPARSE_CV])
+        assert len(calls) == 1 and "Alice Martin" not in calls[0]
+        assert batch[0]["name"] == "Alice Martin" and "kubernetes" in batch[1]["skills"]
+        print("✅ Batch only sends low-confidence CVs")
+    finally:
+        client.client, client.generate_content = saved
+
+    return True
+
+if __name__ == "__main__":
+    test_tiered_extraction()